@@ -0,0 +1,61 @@
+'''
+Benchmark of the batched forward calculation (`calc_batch`) against `calc` in a loop, on the programs of `examples/sec6_2.rem` and random input states.
+
+Usage: python benchmarks/bench_calc_batch.py [number of states]
+'''
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from rem.mTLC.env import Var
+from rem.qplcomp import QVar, QOpt, IQOpt
+from rem.qrefine.language.semantics.state import calc, calc_batch
+from rem.qrefine.mls.mls import MLS
+
+
+def random_states(rng, k : int, qnum : int) -> np.ndarray:
+    d = 2**qnum
+    A = rng.normal(size = (k, d, d)) + 1j * rng.normal(size = (k, d, d))
+    rhos = A @ A.conj().transpose(0, 2, 1)
+    return rhos / np.trace(rhos, axis1 = 1, axis2 = 2)[:, None, None]
+
+
+if __name__ == "__main__":
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+
+    mls = MLS()
+    code = open(os.path.join(ROOT, "examples", "sec6_2.rem")).read()
+    while code.strip():
+        res = mls.step_forward(code)
+        if res is None:
+            raise RuntimeError(mls.error)
+        code = res[0]
+    env = mls.selected_frame.env
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'program':>8} {'input':>14} {'calc (states/s)':>16} {'calc_batch (states/s)':>22} {'equal':>6}")
+    for name, names in [("RepExtr", ["q1", "q2", "q3", "a"]), ("Noise", ["q1", "q2", "q3"]), ("RepExtr", ["q1", "q2"])]:
+        prog = Var(name, env).eval(env)
+        qvar = QVar(names)
+        rhos = random_states(rng, k, qvar.qnum)
+
+        # the superoperators are compiled before the measurements
+        calc_batch(prog, rhos[:1], qvar, env)
+
+        start = time.perf_counter()
+        res_calc = [calc(prog, IQOpt(QOpt(rho), qvar, True), env) for rho in rhos]
+        t_calc = time.perf_counter() - start
+
+        start = time.perf_counter()
+        res_batch, qvar_res = calc_batch(prog, rhos, qvar, env)
+        t_batch = time.perf_counter() - start
+
+        equal = all(IQOpt(QOpt(out), qvar_res, True) == rho for out, rho in zip(res_batch, res_calc))
+        print(f"{name:>8} {' '.join(names):>14} {k / t_calc:>16.0f} {k / t_batch:>22.0f} {str(equal):>6}")
@@ -0,0 +1,63 @@
+'''
+Benchmark of `linalgPP.column_space` on the joined bases of two projectors (as in `QOpt.disjunct`): the singular value decomposition against the Gram-Schmidt orthonormalization it replaced.
+
+Usage: python benchmarks/bench_column_space.py [max qubit number]
+'''
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from rem.qplcomp import linalgPP
+from rem.qplcomp.qval import QVal
+from rem.qplcomp.linalgPP.vmethods import v_normalized, v_complex_dot
+
+
+def gram_schmidt(A : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    The column by column orthonormalization which `column_space` used before.
+    '''
+    dim = A.shape[0]
+    ortho = np.array([]).reshape((dim, 0))
+    for i in range(A.shape[1]):
+        if ortho.shape[1] == dim:
+            break
+        v = A[:, i]
+        for j in range(ortho.shape[1]):
+            v = v - v_complex_dot(v, ortho[:, j]) * ortho[:, j]
+        if not linalgPP.close_zero(v, precision):
+            ortho = np.hstack((ortho, v_normalized(v).reshape((dim, 1))))
+    return ortho
+
+def random_proj(rng, d : int, rank : int) -> np.ndarray:
+    A = rng.normal(size = (d, rank)) + 1j * rng.normal(size = (d, rank))
+    Q = np.linalg.qr(A)[0]
+    return Q @ Q.conj().T
+
+def best_of(f, repeat = 3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = f()
+        best = min(best, time.perf_counter() - start)
+    return res, best
+
+
+if __name__ == "__main__":
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'qubits':>6} {'Gram-Schmidt (ms)':>18} {'SVD (ms)':>9} {'rank':>5} {'same span':>10}")
+    for n in range(2, max_n + 1):
+        d = 2**n
+        A = np.hstack((random_proj(rng, d, d // 2), random_proj(rng, d, max(d // 4, 1))))
+
+        res_gs, t_gs = best_of(lambda: gram_schmidt(A, QVal.prec))
+        res_svd, t_svd = best_of(lambda: linalgPP.column_space(A, QVal.prec))
+        same = res_gs.shape == res_svd.shape and np.allclose(res_gs @ res_gs.conj().T, res_svd @ res_svd.conj().T)
+        print(f"{n:>6} {t_gs * 1000:>18.2f} {t_svd * 1000:>9.2f} {res_svd.shape[1]:>5} {str(same):>10}")
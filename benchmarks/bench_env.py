@@ -0,0 +1,39 @@
+'''
+Benchmark of the environments in persistent maps (see `PMap`): a session of `N` commands, where every command copies the environment (as `Frame.copy` does) and defines a term, against the same session on `dict` copies; and `2N` calls of `Env.append`, half of them duplicates.
+
+Usage: python benchmarks/bench_env.py
+'''
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rem.mTLC import Env, PMap
+from rem.qplcomp import QVar
+from rem.qplcomp.qexpr.eqvar import EQVar
+
+
+def session(N : int, table) -> float:
+    start = time.perf_counter()
+    t = table()
+    for i in range(N):
+        t = t.copy()
+        t[f"X{i}"] = i
+    return time.perf_counter() - start
+
+def appends(N : int) -> float:
+    terms = [EQVar(QVar([f"q{i}"])) for i in range(N)]
+    env = Env()
+    start = time.perf_counter()
+    for term in terms + terms:
+        env.append(term)
+    assert len(env.defs) == N
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"{'N':>6} {'dict session (ms)':>18} {'PMap session (ms)':>18} {'2N appends (ms)':>16}")
+    for N in (1000, 4000, 16000):
+        print(f"{N:>6} {session(N, dict) * 1000:>18.1f} {session(N, PMap) * 1000:>18.1f} {appends(N) * 1000:>16.1f}")
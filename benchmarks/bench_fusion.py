@@ -0,0 +1,91 @@
+'''
+Benchmark of the gate fusion (see `rem.qrefine.language.semantics.optimize`) on random circuits of 6 qubits: the weakest liberal precondition and the forward calculation of the fused program against the statement-by-statement calculation.
+
+Usage: python benchmarks/bench_fusion.py [numbers of gates ...]
+'''
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from rem.mTLC.env import Var
+from rem.qrefine.language.semantics.assertion import wlp, wlp_calc
+from rem.qrefine.language.semantics.state import calc, calc_iter
+from rem.qrefine.mls.mls import MLS
+
+
+QUBITS = [f"q{i}" for i in range(6)]
+
+
+def random_circuit(rng : random.Random, n : int) -> str:
+    gates = []
+    for _ in range(n):
+        if rng.random() < 0.6:
+            gates.append(rng.choice(["H", "X", "S", "Z"]) + f"[{rng.choice(QUBITS)}];")
+        else:
+            a, b = rng.sample(QUBITS, 2)
+            gates.append(f"CX[{a} {b}];")
+    return " ".join(gates)
+
+
+def best_of(f, repeat = 3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = f()
+        best = min(best, time.perf_counter() - start)
+    return res, best
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [100, 1000]
+
+    mls = MLS()
+    for code in [
+        "Def rho := (0.5 [|000000>] + 0.5 [|111111>])[q0 q1 q2 q3 q4 q5].",
+        "Def post := ([|000000>] \\vee [|101010>])[q0 q1 q2 q3 q4 q5].",
+    ]:
+        if mls.step_forward(code) is None:
+            raise RuntimeError(mls.error)
+
+    rng = random.Random(1)
+
+    print(f"{'gates':>6} {'task':>5} {'unfused (ms)':>13} {'fused (ms)':>11} {'equal':>6}")
+    for n in sizes:
+        if mls.step_forward(f"Def C{n} := {random_circuit(rng, n)}.") is None:
+            raise RuntimeError(mls.error)
+        env = mls.selected_frame.env
+        prog = Var(f"C{n}", env).eval(env)
+        rho = Var("rho", env).eval(env).iqopt
+        post = Var("post", env).eval(env).iqopt
+
+        def wlp_unfused():
+            res = post
+            for S in reversed(prog.stmts):
+                res = wlp_calc(S, res, env)
+            return res
+
+        def wlp_fused():
+            # the fused blocks and the memos are rebuilt every time
+            env.eval_cache.clear()
+            return wlp(prog, post, env)
+
+        def calc_fused():
+            env.eval_cache.clear()
+            return calc(prog, rho, env)
+
+        ref, t_ref = best_of(wlp_unfused)
+        new, t_new = best_of(wlp_fused)
+        print(f"{n:>6} {'wlp':>5} {t_ref * 1000:>13.1f} {t_new * 1000:>11.1f} {str(ref == new):>6}")
+
+        ref, t_ref = best_of(lambda: calc_iter(prog, rho, env))
+        new, t_new = best_of(calc_fused)
+        q = ref.qvar + new.qvar
+        equal = bool(np.allclose(ref.extend(q).qval.m_repr, new.extend(q).qval.m_repr, atol = 1e-8))
+        print(f"{n:>6} {'calc':>5} {t_ref * 1000:>13.1f} {t_new * 1000:>11.1f} {str(equal):>6}")
@@ -0,0 +1,59 @@
+'''
+Benchmark of the conjugation of an `n`-qubit operator by 1- and 2-qubit gates: the gates applied locally on the indices of their qubits (`linalgPP.t_apply_left` and `linalgPP.t_apply_right`), against the dense products of the extended matrices.
+
+Usage: python benchmarks/bench_local_apply.py [max qubit number]
+'''
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from rem.qplcomp import QVar, QOpt, IQOpt, linalgPP
+
+
+def random_unitary(rng, n):
+    A = rng.normal(size = (2**n, 2**n)) + 1j * rng.normal(size = (2**n, 2**n))
+    return np.linalg.qr(A)[0]
+
+def random_hermitian(rng, n):
+    A = rng.normal(size = (2**n, 2**n)) + 1j * rng.normal(size = (2**n, 2**n))
+    return A + A.conj().T
+
+def best_of(f, repeat = 3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = f()
+        best = min(best, time.perf_counter() - start)
+    return res, best
+
+
+def conjugate_local(U : IQOpt, P : IQOpt) -> np.ndarray:
+    pos = P.qvar.to(U.qvar)
+    T = linalgPP.t_apply_left(U.qval.dagger().t_repr, P.qval.t_repr, pos)
+    T = linalgPP.t_apply_right(T, U.qval.t_repr, pos)
+    return T.reshape(P.qval.m_repr.shape)
+
+def conjugate_dense(U : IQOpt, P : IQOpt) -> np.ndarray:
+    U_ext = U.extend(P.qvar).qval.m_repr
+    return U_ext.conj().T @ P.qval.m_repr @ U_ext
+
+
+if __name__ == "__main__":
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'qubits':>6} {'gate':>5} {'dense (ms)':>11} {'local (ms)':>11} {'equal':>6}")
+    for n in range(4, max_n + 1):
+        qvar = QVar([f"q{i}" for i in range(n)])
+        P = IQOpt(QOpt(random_hermitian(rng, n)), qvar)
+        for k in (1, 2):
+            U = IQOpt(QOpt(random_unitary(rng, k)), QVar([f"q{i}" for i in range(n - k, n)]))
+            res_dense, t_dense = best_of(lambda: conjugate_dense(U, P))
+            res_local, t_local = best_of(lambda: conjugate_local(U, P))
+            print(f"{n:>6} {k:>5} {t_dense * 1000:>11.1f} {t_local * 1000:>11.1f} {str(np.allclose(res_dense, res_local)):>6}")
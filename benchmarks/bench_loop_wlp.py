@@ -0,0 +1,72 @@
+'''
+Benchmark of the weakest liberal preconditions of loops: the fixpoint iteration (`loop_wlp`) against the direct calculation on the superoperator of the body (`loop_wlp_superop`).
+
+Usage: python benchmarks/bench_loop_wlp.py [max qubit number]
+'''
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from rem.qplcomp import QVar, QOpt, IQOpt, QProj
+from rem.qplcomp.qexpr.eiqopt import EIQOpt
+from rem.qrefine.language.ast import AstSeq, AstUnitary, AstWhile, AstIf, AstSkip
+from rem.qrefine.language.semantics import assertion
+from rem.qrefine.mls.mls import MLS
+
+
+def random_unitary(rng, n):
+    A = rng.normal(size = (2**n, 2**n)) + 1j * rng.normal(size = (2**n, 2**n))
+    return np.linalg.qr(A)[0]
+
+def random_proj(rng, n, k):
+    A = rng.normal(size = (2**n, k)) + 1j * rng.normal(size = (2**n, k))
+    return QProj(np.linalg.qr(A)[0])
+
+def random_loop(rng, n, gates = 12):
+    '''
+    A loop on `n` qubits, whose body is a sequence of random 2-qubit unitaries and a branch.
+    '''
+    qs = [f"q{i}" for i in range(n)]
+    body = []
+    for _ in range(gates):
+        a, b = rng.choice(n, 2, replace = False)
+        body.append(AstUnitary(EIQOpt(IQOpt(QOpt(random_unitary(rng, 2)), QVar([qs[a], qs[b]])))))
+    branch = EIQOpt(IQOpt(random_proj(rng, 1, 1), QVar([qs[-1]])))
+    body.append(AstIf(branch, AstUnitary(EIQOpt(IQOpt(QOpt(random_unitary(rng, 1)), QVar([qs[0]])))), AstSkip()))
+
+    P = EIQOpt(IQOpt(random_proj(rng, 1, 1), QVar([qs[0]])))
+    post = IQOpt(random_proj(rng, n, 2**(n - 1)), QVar(qs))
+    return AstWhile(P, AstSeq(*body)), post
+
+
+def measure(prog, post, env, max_qnum, repeat = 3):
+    assertion.LOOP_WLP_SUPEROP_MAX_QNUM = max_qnum
+    best = np.inf
+    for _ in range(repeat):
+        env.eval_cache.clear()
+        start = time.perf_counter()
+        res = assertion.wlp(prog, post, env)
+        best = min(best, time.perf_counter() - start)
+    return res, best
+
+
+if __name__ == "__main__":
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    default = assertion.LOOP_WLP_SUPEROP_MAX_QNUM
+
+    rng = np.random.default_rng(0)
+    env = MLS().selected_frame.env
+
+    print(f"{'qubits':>6} {'iterate (ms)':>13} {'superop (ms)':>13} {'equal':>6}")
+    for n in range(2, max_n + 1):
+        prog, post = random_loop(rng, n)
+        res_iter, t_iter = measure(prog, post, env, 0)
+        res_so, t_so = measure(prog, post, env, n)
+        print(f"{n:>6} {t_iter * 1000:>13.1f} {t_so * 1000:>13.1f} {str(res_iter == res_so):>6}")
+
+    assertion.LOOP_WLP_SUPEROP_MAX_QNUM = default
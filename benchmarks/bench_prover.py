@@ -0,0 +1,56 @@
+'''
+Benchmark of the prover frames, which share the proof trees (see `Frame.refine_goal`): a refinement of `N` nested `Step Seq` commands, reporting the time of the last steps, the memory of all the frames, and the time a deep copy of the final proof tree would add to every step.
+
+Usage: python benchmarks/bench_prover.py
+'''
+
+import copy
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rem.qrefine.mls.mls import MLS
+
+
+def run(mls : MLS, code : str) -> None:
+    if mls.step_forward(code) is None:
+        raise RuntimeError(mls.error)
+
+
+def refinement(N : int) -> tuple[MLS, float]:
+    '''
+    Run the refinement of `N` steps, and return the session and the time of the last 10 steps per step.
+    '''
+    mls = MLS()
+    run(mls, "Refine pf : < P0[q], P0[q] >.")
+    for _ in range(N - 10):
+        run(mls, "Step Seq P0[q].")
+
+    start = time.perf_counter()
+    for _ in range(10):
+        run(mls, "Step Seq P0[q].")
+    return mls, (time.perf_counter() - start) / 10
+
+
+if __name__ == "__main__":
+    print(f"{'N':>5} {'frames':>7} {'last steps (ms/step)':>21} {'memory (MiB)':>13} {'deep copy (ms)':>15}")
+    for N in (50, 150, 300):
+        # the time is measured on another run, for tracing the allocations slows the steps down
+        tracemalloc.start()
+        refinement(N)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        mls, per_step = refinement(N)
+
+        try:
+            start = time.perf_counter()
+            copy.deepcopy(mls.selected_frame.refine_proof)
+            deep = f"{(time.perf_counter() - start) * 1000:.2f}"
+        except RecursionError:
+            deep = "RecursionError"
+
+        print(f"{N:>5} {len(mls):>7} {per_step * 1000:>21.2f} {memory / 2**20:>13.1f} {deep:>15}")
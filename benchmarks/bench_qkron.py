@@ -0,0 +1,72 @@
+'''
+Benchmark of the lazy Kronecker products (`QKron`) against dense matrices: build `P[q0 q1] ⊗ Omega[q2 q3]` on `n` qubits, conjugate it by a 1-qubit gate, conjoin it with `R[q_{n-2} q_{n-1}]`, compare it (`<=`, `==`) and trace out all but the first two qubits.
+
+Usage: python benchmarks/bench_qkron.py [max qubit number]
+'''
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from rem.qplcomp import QVar, QOpt, IQOpt
+from rem.qplcomp.qval import lattice_cache
+
+
+def random_proj(rng, n : int, r : int) -> np.ndarray:
+    A = rng.normal(size = (2**n, r)) + 1j * rng.normal(size = (2**n, r))
+    B = np.linalg.qr(A)[0]
+    return B @ B.conj().T
+
+def random_unitary(rng, n : int) -> np.ndarray:
+    A = rng.normal(size = (2**n, 2**n)) + 1j * rng.normal(size = (2**n, 2**n))
+    return np.linalg.qr(A)[0]
+
+
+def run_lazy(n, P, Omega, U, R):
+    qs = [f"q{i}" for i in range(n)]
+    qvar = QVar(qs)
+    X = (IQOpt(QOpt(P), QVar(qs[:2])) @ IQOpt(QOpt(Omega), QVar(qs[2:4]))).extend(qvar)
+    G = IQOpt(QOpt(U), QVar(qs[:1]))
+    X = G.dagger() @ X @ G
+    Y = X & IQOpt(QOpt(R), QVar(qs[-2:]))
+    return Y <= X, Y == X, Y.qval.trace(list(range(2, n))).m_repr
+
+def run_dense(n, P, Omega, U, R):
+    d = 2**n
+    X = np.kron(np.kron(P, Omega), np.eye(d // 16))
+    G = np.kron(U, np.eye(d // 2))
+    X = G.conj().T @ X @ G
+    # the conjunction by the complement of the span of the complements
+    I = np.eye(d)
+    W, S, _ = np.linalg.svd(np.hstack((I - X, I - np.kron(np.eye(d // 4), R))))
+    B = W[:, :np.count_nonzero(S > 1e-8)]
+    Y = I - B @ B.conj().T
+    le = np.linalg.eigvalsh(X - Y).min() > -1e-8
+    eq = np.allclose(X, Y)
+    return le, eq, np.einsum('iaja->ij', Y.reshape(4, d // 4, 4, d // 4))
+
+
+if __name__ == "__main__":
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 9
+
+    rng = np.random.default_rng(0)
+    P, Omega, R = random_proj(rng, 2, 2), random_proj(rng, 2, 3), random_proj(rng, 2, 3)
+    U = random_unitary(rng, 1)
+
+    print(f"{'qubits':>6} {'dense (ms)':>11} {'QKron (ms)':>11} {'equal':>6}")
+    for n in range(4, max_n + 1):
+        start = time.perf_counter()
+        res_dense = run_dense(n, P, Omega, U, R)
+        t_dense = time.perf_counter() - start
+
+        lattice_cache.clear()
+        start = time.perf_counter()
+        res_lazy = run_lazy(n, P, Omega, U, R)
+        t_lazy = time.perf_counter() - start
+
+        equal = res_dense[:2] == res_lazy[:2] and np.allclose(res_dense[2], res_lazy[2])
+        print(f"{n:>6} {t_dense * 1000:>11.1f} {t_lazy * 1000:>11.1f} {str(equal):>6}")
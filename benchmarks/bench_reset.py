@@ -0,0 +1,60 @@
+'''
+Benchmark of the reset of qubits in the forward calculation of `[q] :=0` (see `linalgPP.t_reset`), against applying the Kraus operators `|0><0|` and `|0><1|` of every qubit extended to the whole register.
+
+Usage: python benchmarks/bench_reset.py [max qubit number]
+'''
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from rem.qplcomp import QVar, QOpt, IQOpt
+from rem.qrefine.language.ast import AstInit
+from rem.qplcomp.qexpr.eqvar import EQVar
+from rem.qrefine.language.semantics.state import calc_iter
+from rem.qrefine.mls.mls import MLS
+
+
+def random_state(rng, n : int) -> np.ndarray:
+    A = rng.normal(size = (2**n, 2**n)) + 1j * rng.normal(size = (2**n, 2**n))
+    rho = A @ A.conj().T
+    return rho / np.trace(rho)
+
+def reset_by_kraus(rho : IQOpt, qvar : QVar) -> IQOpt:
+    K0 = QOpt(np.array([[1., 0.], [0., 0.]]))
+    K1 = QOpt(np.array([[0., 1.], [0., 0.]]))
+    M = rho.qval.m_repr
+    for q in qvar:
+        E0 = IQOpt(K0, QVar([q])).extend(rho.qvar).qval.m_repr
+        E1 = IQOpt(K1, QVar([q])).extend(rho.qvar).qval.m_repr
+        M = E0 @ M @ E0.conj().T + E1 @ M @ E1.conj().T
+    return IQOpt(QOpt(M), rho.qvar, True)
+
+def best_of(f, repeat = 3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = f()
+        best = min(best, time.perf_counter() - start)
+    return res, best
+
+
+if __name__ == "__main__":
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    env = MLS().selected_frame.env
+    rng = np.random.default_rng(0)
+
+    print(f"{'qubits':>6} {'reset':>5} {'Kraus (ms)':>11} {'kernel (ms)':>12} {'equal':>6}")
+    for n in range(6, max_n + 1, 2):
+        rho = IQOpt(QOpt(random_state(rng, n)), QVar([f"q{i}" for i in range(n)]), True)
+        for k in (1, 3):
+            qvar = QVar([f"q{i}" for i in range(0, 2 * k, 2)])
+            prog = AstInit(EQVar(qvar))
+            res_kraus, t_kraus = best_of(lambda: reset_by_kraus(rho, qvar))
+            res_kernel, t_kernel = best_of(lambda: calc_iter(prog, rho, env))
+            print(f"{n:>6} {k:>5} {t_kraus * 1000:>11.1f} {t_kernel * 1000:>12.1f} {str(res_kraus == res_kernel):>6}")
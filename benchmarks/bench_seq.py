@@ -0,0 +1,52 @@
+'''
+Benchmark of the traversals of long straight-line programs on the n-ary sequential composition: parsing, printing, extraction, the weakest liberal precondition and the forward calculation of generated programs of `N` statements on 3 qubits.
+
+Usage: python benchmarks/bench_seq.py
+'''
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rem.qrefine.mls.mls import MLS
+from rem.qrefine.language.semantics.assertion import wlp
+from rem.qrefine.language.semantics.extract import extract
+from rem.qrefine.language.semantics.state import calc_iter
+from rem.mTLC.env import Var
+
+
+GATES = ["H[q0];", "CX[q0 q1];", "X[q2];", "CX[q1 q2];", "H[q1];", "CX[q2 q0];"]
+
+
+def define(mls : MLS, name : str, code : str):
+    if mls.step_forward(f"Def {name} := {code}.") is None:
+        raise RuntimeError(mls.error)
+    env = mls.selected_frame.env
+    return Var(name, env).eval(env)
+
+def timed(f) -> float:
+    start = time.perf_counter()
+    f()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"{'N':>6} {'parse (ms)':>11} {'str (ms)':>9} {'extract (ms)':>13} {'wlp (ms)':>9} {'calc_iter (ms)':>15}")
+    for N in [1000, 3000, 10000]:
+        mls = MLS()
+        code = " ".join(GATES[i % len(GATES)] for i in range(N))
+
+        start = time.perf_counter()
+        prog = define(mls, "prog", code)
+        t_parse = time.perf_counter() - start
+
+        post = define(mls, "post", "[|101>][q0 q1 q2]").iqopt
+        env = mls.selected_frame.env
+
+        t_str = timed(lambda: prog.prefix_str())
+        t_extract = timed(lambda: extract(prog))
+        t_wlp = timed(lambda: wlp(prog, post, env))
+        t_calc = timed(lambda: calc_iter(prog, post, env))
+        print(f"{N:>6} {t_parse * 1000:>11.1f} {t_str * 1000:>9.1f} {t_extract * 1000:>13.1f} {t_wlp * 1000:>9.1f} {t_calc * 1000:>15.1f}")
@@ -0,0 +1,60 @@
+'''
+Benchmark of the partial trace and the weakest liberal preconditions of initialization: the single contraction and the initialization of all the variables at once, against tracing and initializing the qubits one by one.
+
+Usage: python benchmarks/bench_trace_init.py
+'''
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from rem.qplcomp import QVar, QOpt, QProj, IQOpt
+from rem.qplcomp.qval import lattice_cache
+
+
+def random_proj(rng, n : int) -> np.ndarray:
+    A = rng.normal(size = (2**n, 2**(n - 1))) + 1j * rng.normal(size = (2**n, 2**(n - 1)))
+    return np.linalg.qr(A)[0]
+
+def best_of(f, repeat = 3):
+    best = np.inf
+    for _ in range(repeat):
+        lattice_cache.clear()
+        start = time.perf_counter()
+        res = f()
+        best = min(best, time.perf_counter() - start)
+    return res, best
+
+def trace_one_by_one(opt : QOpt, qls : list[int]) -> QOpt:
+    for q in sorted(qls, reverse = True):
+        opt = opt.trace([q])
+    return opt
+
+def init_one_by_one(P : IQOpt, qvar : QVar, method : str) -> IQOpt:
+    for q in qvar:
+        P = getattr(P, method)(QVar([q]))
+    return P
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    print(f"{'case':>22} {'one by one (ms)':>16} {'at once (ms)':>13} {'equal':>6}")
+    for k, n in [(4, 6), (6, 8), (8, 9)]:
+        qvar = QVar([f"q{i}" for i in range(n)])
+        P = IQOpt(QProj(random_proj(rng, n)), qvar)
+        init = QVar([f"q{i}" for i in range(k)])
+
+        for method in ("initwlp", "initwlp2"):
+            res_old, t_old = best_of(lambda: init_one_by_one(P, init, method))
+            res_new, t_new = best_of(lambda: getattr(P, method)(init))
+            print(f"{f'{method} k={k} n={n}':>22} {t_old * 1000:>16.2f} {t_new * 1000:>13.2f} {str(res_old == res_new):>6}")
+
+    M = QOpt(rng.normal(size = (2**9, 2**9)))
+    res_old, t_old = best_of(lambda: trace_one_by_one(M, list(range(8))))
+    res_new, t_new = best_of(lambda: M.trace(list(range(8))))
+    print(f"{'trace 8 of 9 qubits':>22} {t_old * 1000:>16.2f} {t_new * 1000:>13.2f} {str(res_old == res_new):>6}")
@@ -1,4 +1,5 @@
 # a micro type language core
 # all variables are explicitly typed
 
-from .env import TypedTerm, Types, Env, TermError
\ No newline at end of file
+from .env import TypedTerm, Types, Env, TermError
+from .pmap import PMap
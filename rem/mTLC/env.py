@@ -4,7 +4,7 @@ env
 
 This package provides a simple variable system. It includes:
 
-- class `TypedTerm`: the typed expressions of the system. More specific definition of expressions should be defined as its subclasses.
+- class `TypedTerm`: the typed expressions of the system. More specific definition of expressions should be defined as its subclasses. The terms are hash-consed, see `TermMeta`.
 - class `Variable`: It is the expression constructed by a variable.
 - class `Env`: environments for the variable system. It is a dictionary from identifiers (`str`) to its definitions (`TypedTerm`).
 
@@ -12,9 +12,13 @@ This package provides a simple variable system. It includes:
 
 from __future__ import annotations
 
-from typing import Type, Any
+from typing import Type, Any, Callable
 
-from abc import ABC, abstractmethod
+from abc import ABC, ABCMeta, abstractmethod
+
+import weakref
+
+from .pmap import PMap
 
 class TermError(Exception):
     pass
@@ -30,15 +34,61 @@ class Types(ABC):
         pass
 
     def __eq__(self, other : Any) -> bool:
-        return isinstance(other, Types) and str(self) == str(other)
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def __hash__(self) -> int:
+        return hash((type(self).__name__, tuple(self.__dict__.items())))
+
+
+class TermMeta(ABCMeta):
+    '''
+    The metaclass of terms, which hash-conses (interns) them.
 
+    After a term is constructed, it is replaced by the existing term with the same class and the same components (see `TypedTerm._struct_key`), if there is one. Therefore the structurally identical terms built from the same subterms are one object, and their equality is decided by the identity. The components are identified by identity if they are objects, and by value if they are strings or numbers.
 
-class TypedTerm(ABC):
+    The table holds the terms weakly, so that the unused terms are released.
+    '''
+
+    _table : weakref.WeakValueDictionary[tuple, TypedTerm] = weakref.WeakValueDictionary()
+
+    def __call__(cls, *args, **kwargs):
+        term = super().__call__(*args, **kwargs)
+
+        key = term._struct_key()
+        if key is None:
+            return term
+
+        # the subterms are hashed already, so that the hash of a deep term does not recurse
+        term._hash = term._calc_hash(key)
+
+        if not cls._interned:
+            return term
+
+        return TermMeta._table.setdefault((cls,) + tuple(TermMeta._ident(c) for c in key), term)
+
+    @staticmethod
+    def _ident(c : Any) -> Any:
+        if isinstance(c, (str, int)):
+            return c
+        if isinstance(c, (float, complex)):
+            # distinguish the values which are equal but printed differently, e.g. 0.0 and -0.0
+            return repr(c)
+        if isinstance(c, tuple):
+            return tuple(TermMeta._ident(x) for x in c)
+        return id(c)
+
+
+class TypedTerm(metaclass=TermMeta):
     '''
     The class for (typed) terms.
     Type checking is implemented in the construction of TypedTerm.
+
+    The terms which define `_struct_key` are compared and hashed structurally on their components, and are hash-consed by `TermMeta` unless `_interned` is False (for the terms with mutable parts). The structural hash is calculated once, at the construction. Other terms are compared by their string representations.
     '''
 
+    # whether the terms of this class are hash-consed
+    _interned : bool = True
+
     def __init__(self, type: Types):
         if not isinstance(type, Types):
             raise TermError("The type should be a Types object.")
@@ -66,11 +116,71 @@ class TypedTerm(ABC):
             if not isinstance(self.type, type):
                 raise ValueError(f"The parameter expression '{self}' should have type '{type.symbol}', but actually has type '{self.type}'.")
             
+    def _struct_key(self) -> None | tuple:
+        '''
+        Return the components of this term, which determine the structural equality and hash. Return `None` if the term is to be compared by its string representation.
+        '''
+        return None
+
+    def _calc_hash(self, key : tuple) -> int:
+        return hash((type(self).__name__,) + key)
+
     def __hash__(self) -> int:
-        return hash(str(self))
-    
+        h = self.__dict__.get('_hash')
+        if h is None:
+            key = self._struct_key()
+            if key is None:
+                return hash(str(self))
+            h = self._hash = self._calc_hash(key)
+        return h
+
     def __eq__(self, other : Any) -> bool:
-        return isinstance(other, TypedTerm) and str(self) == str(other)
+        if self is other:
+            return True
+
+        if self._struct_key() is None:
+            return isinstance(other, TypedTerm) and str(self) == str(other)
+
+        # the components are compared with an explicit stack, so that deep terms do not exhaust the recursion
+        stack = [(self, other)]
+        while len(stack) > 0:
+            a, b = stack.pop()
+            if a is b:
+                continue
+
+            if type(a) is not type(b) or hash(a) != hash(b):
+                return False
+
+            key_a, key_b = a._struct_key(), b._struct_key()
+            if key_a is None:
+                if str(a) != str(b):
+                    return False
+                continue
+
+            if len(key_a) != len(key_b):
+                return False
+
+            for x, y in zip(key_a, key_b):
+                if isinstance(x, TypedTerm) and isinstance(y, TypedTerm):
+                    stack.append((x, y))
+                elif x != y:
+                    return False
+
+        return True
+
+    def __getstate__(self) -> dict:
+        # the hash is calculated again after copying or unpickling, because string hashes differ among processes
+        state = self.__dict__.copy()
+        state.pop('_hash', None)
+        return state
+
+    def __setstate__(self, state : dict) -> None:
+        self.__dict__.update(state)
+
+        # the subterms are restored before this term
+        key = self._struct_key()
+        if key is not None:
+            self._hash = self._calc_hash(key)
 
 class Var(TypedTerm):
     '''
@@ -89,7 +199,7 @@ class Var(TypedTerm):
 
     
     def eval(self, env: Env) -> TypedTerm:
-        val = env[self.id].eval(env)
+        val = env.eval_def(self.id)
 
         if self.type != val.type:
             raise TermError(f"The variable '{self.id}' should be of type '{self.type}', but the value defined in the environment is of type '{val.type}'.")
@@ -105,38 +215,155 @@ class Var(TypedTerm):
     def __str__(self) -> str:
         return self.id
     
-    def __hash__(self) -> int:
-        return hash(self.id)
+    def _struct_key(self) -> tuple:
+        return (self.id, self.type)
 
-    def __eq__(self, other : Any) -> bool:
-        return isinstance(other, Var) and self.id == other.id
+
+class EvalCache:
+    '''
+    The cache of the evaluated definitions, shared by an environment and its copies.
+
+    The definitions cannot be changed, so the evaluation of a definition stays valid in the copies of the environment. An entry records the definition term it is calculated from, and is used only if the environment defines the name by that term. The entries of the definitions which are discarded (by popping the proof frames) are released by `invalidate`.
+
+    It also holds the tables of other values calculated in the environment (see `table`), which are cleared by `invalidate`, and the memos keyed by the environment versions (see `memo`), which are kept.
+    '''
+
+    def __init__(self) -> None:
+        self._entries : dict[str, tuple[TypedTerm, TypedTerm]] = {}
+
+        self._tables : dict[str, dict] = {}
+
+        self._memos : dict[str, Any] = {}
+
+        # the interned versions of the environments (see `Env.version`), with weak references to the definition terms, which remove the entries when the terms are released
+        self._versions : dict[tuple, tuple[object, weakref.ref]] = {}
+
+        # the evaluations avoided, and the evaluations calculated
+        self.hits : int = 0
+        self.evals : int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key : str, term : TypedTerm) -> TypedTerm | None:
+        '''
+        Return the cached evaluation of definition `key := term`, or `None` if there is not.
+        '''
+        entry = self._entries.get(key)
+        if entry is None or entry[0] is not term:
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key : str, term : TypedTerm, val : TypedTerm) -> None:
+        self.evals += 1
+        self._entries[key] = (term, val)
+
+    def table(self, name : str) -> dict:
+        '''
+        Return the table `name` for the values calculated in the environment, e.g. the compiled programs. The values should depend only on the definitions, and not on the environment copy.
+        '''
+        return self._tables.setdefault(name, {})
+
+    def next_version(self, version : object, key : str, term : TypedTerm) -> object:
+        '''
+        Return the version of the environment of `version` after defining `key := term`. The same definitions in the same order give the same version.
+
+        The definitions are identified by the identity of their terms, as the cached evaluations (see `get`). The structural equality is not enough, for it ignores the refinements of the prescriptions (see `AstPres`). The hash-consed terms built again (e.g. by replaying a proof frame) are still the same objects.
+
+        The terms are held weakly, and the version of a definition is forgotten when its term is released (e.g. with the popped proof frames), before the `id` can be reused. A term defined again later gets a new version.
+        '''
+        entry = (version, key, id(term))
+        res = self._versions.get(entry)
+        if res is None:
+            res = object()
+            self._versions[entry] = (res, weakref.ref(term, lambda _: self._versions.pop(entry, None)))
+            return res
+        return res[0]
+
+    def memo(self, name : str, factory : Callable[[], Any]) -> Any:
+        '''
+        Return the memo `name`, which is created by `factory` at the first time. The memos are not cleared by `invalidate`, so their keys should contain the version of the environment (see `Env.version`), and they should bound their sizes.
+        '''
+        res = self._memos.get(name)
+        if res is None:
+            res = self._memos[name] = factory()
+        return res
+
+    def invalidate(self, env : Env) -> None:
+        '''
+        Remove the entries of the definitions which are not in `env`, and clear the tables.
+        '''
+        for key in [key for key, (term, _) in self._entries.items() if env.defs.get(key) is not term]:
+            del self._entries[key]
+
+        for table in self._tables.values():
+            table.clear()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        for table in self._tables.values():
+            table.clear()
+        for memo in self._memos.values():
+            memo.clear()
+
+    def __str__(self) -> str:
+        return f"evaluation cache: {self.hits} evaluations avoided, {self.evals} calculated, {len(self._entries)} entries"
 
 
 class Env:
     '''
     The environment relates variable (string) to their definitions.
+
+    The declarations and definitions are kept in persistent maps, so that the copies share them and are created in O(1). The definitions are also indexed by their terms for `append`.
+
+    The evaluations of the definitions are memoized in `eval_cache`, which is shared with the copies.
     '''
 
     DEFAULT_PREFIX = "X"
 
+    # the version of the environments without definitions
+    ROOT_VERSION = ()
+
     def __init__(self) -> None:
 
-        self.decs : dict[str, Types] = {}
+        self.decs : PMap[str, Types] = PMap()
+
+        self.defs : PMap[str, TypedTerm] = PMap()
+
+        # the reverse index from the terms to the first keys defining them
+        self._index : PMap[TypedTerm, str] = PMap()
+
+        # the least numbers possibly unused for the prefixes of unique names
+        self._fresh : dict[str, int] = {}
+
+        self.eval_cache : EvalCache = EvalCache()
 
-        self.defs : dict[str, TypedTerm] = {}
+        self._version : object = Env.ROOT_VERSION
 
     def __eq__(self, other : Env) -> bool:
         if self is other:
             return True
         return self.decs == other.decs and self.defs == other.defs
 
+    @property
+    def version(self) -> object:
+        '''
+        The object identifying the definitions. The environments sharing the evaluation cache have the same version if they make the same definitions in the same order, e.g. the copies of a proof frame, or the frames replayed after popping.
+        '''
+        return self._version
+
     def copy(self) -> Env:
         '''
-        Return a shallow copy of this environment.
+        Return a shallow copy of this environment in O(1).
         '''
-        res = Env()
+        res = Env.__new__(Env)
         res.decs = self.decs.copy()
         res.defs = self.defs.copy()
+        res._index = self._index.copy()
+        res._fresh = self._fresh.copy()
+        res.eval_cache = self.eval_cache
+        res._version = self._version
         return res
     
     def sub_env(self, defs: set[str]) -> Env:
@@ -159,12 +386,14 @@ class Env:
         Parameters: prefix = "VAL" : str.
         Returns: a key which is not used in this environment.
         '''
-        n = 0
+        # the keys are never removed, so the numbers checked before are still used
+        n = self._fresh.get(prefix, 0)
         res = prefix + str(n)
         n += 1
         while res in self.defs:
             res = prefix + str(n)
             n += 1
+        self._fresh[prefix] = n - 1
         return res
 
 
@@ -175,14 +404,16 @@ class Env:
         If not, create a new item with an auto key and return the key used.
         '''
         
-        for key in self.defs:
-            if self.defs[key] == term:
-                return key
+        key = self._index.get(term)
+        if key is not None:
+            return key
             
         name = self._get_unique_name()
 
         self.decs[name] = term.type
         self.defs[name] = term
+        self._index[term] = name
+        self._version = self.eval_cache.next_version(self._version, name, term)
 
         return name
     
@@ -214,6 +445,9 @@ class Env:
 
         self.decs[key] = term.type
         self.defs[key] = term
+        if term not in self._index:
+            self._index[term] = key
+        self._version = self.eval_cache.next_version(self._version, key, term)
 
     def __getitem__(self, key : str) -> TypedTerm:
         if key not in self.defs:
@@ -222,6 +456,19 @@ class Env:
     
     def __contains__(self, key : str) -> bool:
         return key in self.defs
+
+    def eval_def(self, key : str) -> TypedTerm:
+        '''
+        Return the evaluation of the definition of `key`, which is calculated once and then cached.
+        '''
+        term = self[key]
+
+        val = self.eval_cache.get(key, term)
+        if val is None:
+            val = term.eval(self)
+            self.eval_cache.put(key, term, val)
+
+        return val
     
 
     ##################################################################
@@ -0,0 +1,227 @@
+'''
+pmap
+=====
+
+This module provides `PMap`, a dictionary with O(1) copies.
+
+The items are stored in a persistent hash array mapped trie: a node branches on 5 bits of the key hash, and keeps only its non-empty children, located by a bitmap. The nodes are never modified. An assignment copies the O(log n) nodes on the path to the item, and the copies of a `PMap` share all the other nodes.
+
+The items are iterated in the order of insertion, as `dict` does.
+'''
+
+from __future__ import annotations
+
+from typing import Any, Iterator, Generic, TypeVar
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+BITS = 5
+MASK = (1 << BITS) - 1
+
+# the hashes are taken as unsigned integers of this length
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+
+
+class _Entry:
+    __slots__ = ('hash', 'key', 'value', 'seq')
+
+    def __init__(self, hash : int, key : Any, value : Any, seq : int):
+        self.hash = hash
+        self.key = key
+        self.value = value
+
+        # the order of insertion
+        self.seq = seq
+
+class _Node:
+    __slots__ = ('bitmap', 'slots')
+
+    def __init__(self, bitmap : int, slots : tuple):
+        '''
+        `slots` are the children (`_Entry`, `_Node` or `_Bucket`) for the set bits of `bitmap`, in the increasing order of the bits.
+        '''
+        self.bitmap = bitmap
+        self.slots = slots
+
+class _Bucket:
+    '''
+    The entries with the same full hash.
+    '''
+    __slots__ = ('hash', 'entries')
+
+    def __init__(self, hash : int, entries : tuple[_Entry, ...]):
+        self.hash = hash
+        self.entries = entries
+
+
+_EMPTY = _Node(0, ())
+
+
+def _lookup(node : _Node | _Bucket, h : int, key : Any) -> _Entry | None:
+    shift = 0
+    while True:
+        if isinstance(node, _Bucket):
+            for e in node.entries:
+                if e.key is key or e.key == key:
+                    return e
+            return None
+
+        bit = 1 << ((h >> shift) & MASK)
+        if not node.bitmap & bit:
+            return None
+
+        child = node.slots[(node.bitmap & (bit - 1)).bit_count()]
+        if isinstance(child, _Entry):
+            if child.hash == h and (child.key is key or child.key == key):
+                return child
+            return None
+
+        node = child
+        shift += BITS
+
+def _merge(e1 : _Entry, e2 : _Entry, shift : int) -> _Node | _Bucket:
+    '''
+    Return the subtrie at level `shift` holding two entries with different keys.
+    '''
+    if shift >= HASH_BITS:
+        return _Bucket(e1.hash, (e1, e2))
+
+    i1 = (e1.hash >> shift) & MASK
+    i2 = (e2.hash >> shift) & MASK
+    if i1 == i2:
+        return _Node(1 << i1, (_merge(e1, e2, shift + BITS),))
+    if i1 < i2:
+        return _Node((1 << i1) | (1 << i2), (e1, e2))
+    return _Node((1 << i1) | (1 << i2), (e2, e1))
+
+def _insert(node : _Node | _Bucket, shift : int, entry : _Entry) -> tuple[_Node | _Bucket, bool]:
+    '''
+    Return the copy of `node` with `entry` inserted, and whether the key is new. The value of an existing key is replaced, and its order is kept.
+    '''
+    if isinstance(node, _Bucket):
+        for i, e in enumerate(node.entries):
+            if e.key is entry.key or e.key == entry.key:
+                entry.seq = e.seq
+                return _Bucket(node.hash, node.entries[:i] + (entry,) + node.entries[i+1:]), False
+        return _Bucket(node.hash, node.entries + (entry,)), True
+
+    bit = 1 << ((entry.hash >> shift) & MASK)
+    pos = (node.bitmap & (bit - 1)).bit_count()
+
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, node.slots[:pos] + (entry,) + node.slots[pos:]), True
+
+    child = node.slots[pos]
+    if isinstance(child, _Entry):
+        if child.hash == entry.hash and (child.key is entry.key or child.key == entry.key):
+            entry.seq = child.seq
+            new_child, added = entry, False
+        else:
+            new_child, added = _merge(child, entry, shift + BITS), True
+    else:
+        new_child, added = _insert(child, shift + BITS, entry)
+
+    return _Node(node.bitmap, node.slots[:pos] + (new_child,) + node.slots[pos+1:]), added
+
+def _entries(node : _Node | _Bucket, res : list[_Entry]) -> None:
+    if isinstance(node, _Bucket):
+        res.extend(node.entries)
+        return
+    for child in node.slots:
+        if isinstance(child, _Entry):
+            res.append(child)
+        else:
+            _entries(child, res)
+
+
+class PMap(Generic[K, V]):
+    '''
+    The dictionary with O(1) copies and O(log n) assignments, in a persistent hash array mapped trie. Items cannot be deleted.
+    '''
+
+    def __init__(self, items : Any = ()) -> None:
+        self._root : _Node = _EMPTY
+        self._len : int = 0
+        self._seq : int = 0
+
+        # the entries in the order of insertion, calculated when iterated
+        self._ordered : list[_Entry] | None = []
+
+        for key, value in (items.items() if hasattr(items, 'items') else items):
+            self[key] = value
+
+    def copy(self) -> PMap[K, V]:
+        '''
+        Return a copy in O(1). The copies share the trie.
+        '''
+        res = PMap.__new__(PMap)
+        res._root = self._root
+        res._len = self._len
+        res._seq = self._seq
+        res._ordered = self._ordered
+        return res
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, key : K) -> V:
+        e = _lookup(self._root, hash(key) & HASH_MASK, key)
+        if e is None:
+            raise KeyError(key)
+        return e.value
+
+    def get(self, key : K, default : Any = None) -> Any:
+        e = _lookup(self._root, hash(key) & HASH_MASK, key)
+        return default if e is None else e.value
+
+    def __contains__(self, key : Any) -> bool:
+        return _lookup(self._root, hash(key) & HASH_MASK, key) is not None
+
+    def __setitem__(self, key : K, value : V) -> None:
+        self._root, added = _insert(self._root, 0, _Entry(hash(key) & HASH_MASK, key, value, self._seq))  # type: ignore
+        if added:
+            self._len += 1
+            self._seq += 1
+        self._ordered = None
+
+    def _entries_ordered(self) -> list[_Entry]:
+        if self._ordered is None:
+            res : list[_Entry] = []
+            _entries(self._root, res)
+            res.sort(key = lambda e: e.seq)
+            self._ordered = res
+        return self._ordered
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self.keys())
+
+    def keys(self) -> list[K]:
+        return [e.key for e in self._entries_ordered()]
+
+    def values(self) -> list[V]:
+        return [e.value for e in self._entries_ordered()]
+
+    def items(self) -> list[tuple[K, V]]:
+        return [(e.key, e.value) for e in self._entries_ordered()]
+
+    def __eq__(self, other : Any) -> bool:
+        if isinstance(other, PMap) and self._root is other._root:
+            return True
+        if not isinstance(other, (PMap, dict)) or len(self) != len(other):
+            return False
+        missing = object()
+        return all(other.get(key, missing) == value for key, value in self.items())
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return "PMap({" + ", ".join(f"{key!r}: {value!r}" for key, value in self.items()) + "})"
+
+    def __getstate__(self) -> tuple[list[tuple[K, V]]]:
+        # the trie is built again after unpickling, because hashes differ among processes
+        return (self.items(),)
+
+    def __setstate__(self, state : tuple[list[tuple[K, V]]]) -> None:
+        self.__init__(state[0])
@@ -20,7 +20,7 @@ from .qexpr import prepare_env
 
 
 from .qval import QVar
-from .qval import QOpt, IQOpt
+from .qval import QOpt, QProj, QKron, IQOpt
 from .qval import QSOpt, IQSOpt
 from .qval import predefined
 
@@ -5,22 +5,45 @@ qplcomp.linalgPP
 This package is the plus version of `np.linalg`. It contains more algorithms of linear algebra not included in `np.linalg`.
 
 '''
-from .mmethods import close_equal
+from .general import close_equal
+from .general import close_zero
+from .general import fingerprint
 
 from .mmethods import column_simplest
 from .mmethods import row_space
 from .mmethods import column_space
 from .mmethods import right_null_space
 from .mmethods import support
+from .mmethods import support_basis
 from .mmethods import eigen1space
+from .mmethods import eigen1space_basis
 
-from .mmethods import is_Hermitian
-from .mmethods import is_unitary
-from .mmethods import is_effect
-from .mmethods import is_pdo
-from .mmethods import is_spd
-from .mmethods import is_projector
+from .mmethods import basis_complement
+from .mmethods import basis_join
+from .mmethods import basis_meet
+from .mmethods import basis_meet_orth
+from .mmethods import basis_contained
+from .mmethods import basis_orthogonal
 
-from .mmethods import Loewner_le
+from .verify import is_Hermitian
+from .verify import is_unitary
+from .verify import is_effect
+from .verify import is_pdo
+from .verify import is_spd
+from .verify import is_projector
 
-from .somethods import is_qo
\ No newline at end of file
+from .verify import Loewner_le
+from .verify import Loewner_nonneg
+from .verify import projector_le
+
+from .tmethods import t_apply_left
+from .tmethods import t_apply_right
+from .tmethods import t_add_local
+from .tmethods import t_reset
+
+from .somethods import is_qo
+from .somethods import kraus_compress
+from .somethods import kraus_to_liouville
+from .somethods import liouville_to_kraus
+from .somethods import kraus_apply_batch
+from .somethods import kraus_extend
\ No newline at end of file
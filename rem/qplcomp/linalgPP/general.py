@@ -1,3 +1,5 @@
+import hashlib
+
 import numpy as np
 
 def elementwise_norm(m : np.ndarray) -> np.ndarray:
@@ -21,3 +23,18 @@ def close_equal(a : np.ndarray, b : np.ndarray, precision : float) -> bool:
 
     diff : float = np.max(elementwise_norm(a - b))  # type: ignore
     return diff < precision
+
+def fingerprint(a : np.ndarray, precision : float) -> bytes:
+    '''
+    Calculate a digest of the tensor a, quantized on the grid of spacing `precision / 2` for the real and imaginary parts.
+
+    Tensors with the same digest (and the same shape) are equal according to `close_equal`. Tensors which are equal may still have different digests if they lie across the grid lines.
+    '''
+    q = precision / 2
+    a = np.asarray(a)
+    grid = np.stack((np.rint(a.real / q), np.rint(a.imag / q))).astype(np.int64)
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(a.shape).encode())
+    h.update(np.ascontiguousarray(grid).tobytes())
+    return h.digest()
@@ -1,9 +1,7 @@
 
 import numpy as np
 
-from .general import close_zero, close_equal
-
-from .vmethods import v_normalized, v_complex_dot
+from .general import close_zero
 
 def column_simplest(A : np.ndarray, precision : float) -> np.ndarray:
     '''
@@ -53,7 +51,7 @@ def column_space(A : np.ndarray, precision : float) -> np.ndarray:
     Calculate a set of orthonormal basis of the column space of A.
     This is also the right non-zero space of A, because the right zero space is orthogonal to the column space.
 
-    It is implemented by Schmidt decomposition.
+    It is implemented by a (thin) singular value decomposition, which is rank-revealing and vectorized. The left singular vectors with singular values larger than `precision` form the basis.
 
     Note: the linear dependent vectors are ruled out (with given precision).
 
@@ -67,27 +65,15 @@ def column_space(A : np.ndarray, precision : float) -> np.ndarray:
 
     # get the space dimension
     dim = A.shape[0]
-    ortho = np.array([]).reshape((dim, 0))
-
-    # Schmidt decomposition algorithm
-    for i in range(A.shape[1]):
-        # check whether it is already the whole space
-        if ortho.shape[1] == dim:
-            break
+    if A.shape[1] == 0:
+        return np.zeros((dim, 0), dtype=A.dtype)
 
-        veci = A[:,i]
+    U, S, _ = np.linalg.svd(A, full_matrices=False)
 
-        # subtract the projector within the existing space
-        for j in range(ortho.shape[1]):
-            proj_val = v_complex_dot(veci, ortho[:,j])
-            veci = veci - proj_val * ortho[:,j]
+    # the singular values are sorted in descending order
+    rank = np.count_nonzero(S > precision)
 
-        # check whether the result is zero
-        if not close_zero(veci, precision):
-            veci_normalized = v_normalized(veci)
-            ortho = np.hstack((ortho, veci_normalized.reshape((dim, 1))))
-    
-    return ortho
+    return U[:, :rank]
 
 
 def row_space(A : np.ndarray, precision: float) -> np.ndarray:
@@ -117,186 +103,183 @@ def right_null_space(A : np.ndarray, precision : float) -> np.ndarray:
 
     Returns: np.ndarray, a matrix with columns being the orthonormal basis.
     '''
-    U, S, V = np.linalg.svd(A)
+    # the full decomposition is only necessary for wide matrices, otherwise the thin V is already square
+    U, S, V = np.linalg.svd(A, full_matrices = A.shape[0] < A.shape[1])
 
-    # find the rank
-    rank = len(S)
-    for i in range(len(S)):
-        if S[i] < precision:
-            rank = i
-            break
+    # find the rank (the singular values are sorted in descending order)
+    rank = np.count_nonzero(S >= precision)
 
     return V[rank:].transpose().conj()
 
-def support(A : np.ndarray, precision: float) -> np.ndarray:
-    '''
-    Calculate the support of A.
-    Parameters: 
-        - `self` : `np.ndarray`, matrix, should be Hermitian.
-        - `precision` : `float`.
-    Returns: `np.ndarray`, a projector matrix.
-    '''
 
-    eigval, eigvec = np.linalg.eigh(A)
+#######################################################################
+#
+# Subspace Methods on Orthonormal Bases.
+#
+# The subspaces are represented by `d x r` matrices with orthonormal columns. All the methods below cost O(d r^2).
+#
+#######################################################################
 
-    res = np.zeros_like(A)
-    for i in range(len(eigval)):
-        if np.abs(eigval[i]) > precision:
-            res += eigvec[:, [i]] @ eigvec[:, [i]].conj().transpose()
+def basis_complement(A : np.ndarray) -> np.ndarray:
+    '''
+    Calculate an orthonormal basis of the orthogonal complement of the subspace spanned by `A`.
 
-    return res    
+    Parameters:
+        - A : np.ndarray, a matrix with orthonormal columns.
 
-def eigen1space(A : np.ndarray, precision: float) -> np.ndarray:
+    Returns: np.ndarray, a matrix with columns being the orthonormal basis.
     '''
-    Calculate the eigenspace of `A` with eigenvalue `1`.
-    Parameters: 
-        - `self` : `np.ndarray`, matrix, should be Hermitian.
-        - `precision` : `float`.
-    Returns: `np.ndarray`, a projector matrix.
+    dim, rank = A.shape
+    if rank == 0:
+        return np.eye(dim, dtype=A.dtype)
+
+    Q, _ = np.linalg.qr(A, mode='complete')
+    return Q[:, rank:]
+
+def basis_join(A : np.ndarray, B : np.ndarray, precision : float) -> np.ndarray:
     '''
+    Calculate an orthonormal basis of the disjunction (the span) of the subspaces spanned by `A` and `B`.
 
-    eigval, eigvec = np.linalg.eigh(A)
+    The components of `B` outside the space of `A` are orthonormalized and appended to `A`. They are ruled out if the corresponding principal angles have sines smaller than `precision`.
 
-    res = np.zeros_like(A)
-    for i in range(len(eigval)):
-        if np.abs(eigval[i] - 1.) < precision:
-            res += eigvec[:, [i]] @ eigvec[:, [i]].conj().transpose()
+    Parameters:
+        - A, B : np.ndarray, matrices with orthonormal columns.
+        - precision : float.
 
-    return res    
+    Returns: np.ndarray, a matrix with columns being the orthonormal basis.
+    '''
+    if B.shape[1] == 0:
+        return A
+    if A.shape[1] == 0:
+        return B
 
+    R = column_space(B - A @ (A.conj().transpose() @ B), precision)
+    if R.shape[1] == 0:
+        return A
 
-#######################################################################
-#
-# Property Verification Methods.
-#
-#######################################################################
+    # reorthogonalization against A, to preserve the orthonormality
+    R = R - A @ (A.conj().transpose() @ R)
+    R, _ = np.linalg.qr(R)
+
+    return np.hstack((A, R))
 
-def is_unitary(A : np.ndarray, precision : float) -> bool:
+def basis_meet(A : np.ndarray, B : np.ndarray, precision : float) -> np.ndarray:
     '''
-    Check whether matrix A is unitary.
+    Calculate an orthonormal basis of the conjunction (the intersection) of the subspaces spanned by `A` and `B`.
+
+    The vector `B @ x` is in the space of `A` if and only if its component outside `A`, `(I - A A^dagger) B @ x`, is zero. Therefore the intersection is `B` applied on the right-null space of this component matrix.
 
     Parameters:
-        - A : np.ndarray, a square matrix.
+        - A, B : np.ndarray, matrices with orthonormal columns.
         - precision : float.
-    Returns: bool, whether A is unitary.
-    '''
 
-    # check the equality of U^dagger @ U and I
-    if not close_equal(A @ A.transpose().conj(), np.eye(A.shape[0]), precision):
-        return False
-    
-    return True
+    Returns: np.ndarray, a matrix with columns being the orthonormal basis.
+    '''
+    if A.shape[1] == 0:
+        return A
+    if B.shape[1] == 0:
+        return B
 
+    N = right_null_space(B - A @ (A.conj().transpose() @ B), precision)
+    return B @ N
 
-def is_Hermitian(A : np.ndarray, precision : float) -> bool:
+def basis_meet_orth(A : np.ndarray, B : np.ndarray, precision : float) -> np.ndarray:
     '''
-    Check whether matrix A is Hermitian.
+    Calculate an orthonormal basis of the subspace of `A` which is orthogonal to `B`, namely the conjunction of `A` and the complement of `B`.
 
     Parameters:
-        - A : np.ndarray, a square matrix.
+        - A, B : np.ndarray, matrices with orthonormal columns.
         - precision : float.
-    Returns: bool, whether A is Hermitian.
+
+    Returns: np.ndarray, a matrix with columns being the orthonormal basis.
     '''
+    if A.shape[1] == 0 or B.shape[1] == 0:
+        return A
 
-    # check the equality of U^dagger @ U and I
-    if not close_equal(A, A.transpose().conj(), precision):
-        return False
-    
-    return True
+    N = right_null_space(B.conj().transpose() @ A, precision)
+    return A @ N
 
-def is_pdo(A : np.ndarray, precision : float) -> bool:
-    '''
-    Check whether matrix `A` can be considered as a partial density operator. That is, `A` is semipositive definite and `tr(A) <= 1`.
+def basis_contained(A : np.ndarray, B : np.ndarray, precision : float) -> bool:
     '''
+    Check whether the subspace spanned by `A` is contained in that spanned by `B`.
 
-    # check whether A is spd
-    if not is_spd(A, precision):
-        return False
-    
-    # check whether tr(A) <= 1
-    if np.trace(A) > 1 + precision:
+    Parameters:
+        - A, B : np.ndarray, matrices with orthonormal columns.
+        - precision : float.
+
+    Returns: bool, whether span(A) is a subspace of span(B).
+    '''
+    if A.shape[1] == 0:
+        return True
+    if B.shape[1] < A.shape[1]:
         return False
     
-    return True
-
+    return close_zero(A - B @ (B.conj().transpose() @ A), precision)
 
-def is_spd(A : np.ndarray, precision : float):
+def basis_orthogonal(A : np.ndarray, B : np.ndarray, precision : float) -> bool:
     '''
-    Check whether operator A is semi-positive definite.
+    Check whether the subspaces spanned by `A` and `B` are orthogonal.
 
     Parameters:
-        - A : np.ndarray, a square matrix.
+        - A, B : np.ndarray, matrices with orthonormal columns.
         - precision : float.
-    Returns: bool, whether A is semi-positive definite.
+
+    Returns: bool, whether span(A) and span(B) are orthogonal.
     '''
-    if not is_Hermitian(A, precision):
+    if A.shape[1] == 0 or B.shape[1] == 0:
+        return True
+    if A.shape[1] + B.shape[1] > A.shape[0]:
         return False
 
-    e_vals = np.linalg.eigvals(A)
+    return close_zero(B.conj().transpose() @ A, precision)
 
-    if np.any(e_vals < 0 - precision):
-        return False
-    else:
-        return True
 
-def Loewner_le(A : np.ndarray, B : np.ndarray, precision : float):
+def support_basis(A : np.ndarray, precision: float) -> np.ndarray:
+    '''
+    Calculate an orthonormal basis of the support of A.
+    Parameters: 
+        - `self` : `np.ndarray`, matrix, should be Hermitian.
+        - `precision` : `float`.
+    Returns: `np.ndarray`, a matrix with columns being the orthonormal basis. Its column number is the rank of the support.
     '''
-    Decide the loewner order of two Hermitian matrices A and B.
 
-    Note: it will not check whether A or B is Hermitian.
+    eigval, eigvec = np.linalg.eigh(A)
 
-    Parameters:
-        - A, B : np.ndarray, two square matrices.
-        - precision : float.
-    Returns: bool, whether A <= B in Loewner order.
+    return eigvec[:, np.abs(eigval) > precision]
 
+def support(A : np.ndarray, precision: float) -> np.ndarray:
+    '''
+    Calculate the support of A.
+    Parameters: 
+        - `self` : `np.ndarray`, matrix, should be Hermitian.
+        - `precision` : `float`.
+    Returns: `np.ndarray`, a projector matrix.
     '''
 
-    e_vals = np.linalg.eigvals(B - A)
+    V = support_basis(A, precision)
+    return V @ V.conj().transpose()
 
-    if np.any(e_vals < 0 - precision):
-        return False
-    else:
-        return True
-
-def is_effect(A : np.ndarray, precision : float) -> bool:
+def eigen1space_basis(A : np.ndarray, precision: float) -> np.ndarray:
     '''
-    Check whether matrix A represents a quantum effect. That is, A is Hermitian and 0 <= A <= I.
-
-    Parameters:
-        - A : np.ndarray, a square matrix.
-        - precision : float.
-    Returns: bool, whether A represents a quantum effect.
+    Calculate an orthonormal basis of the eigenspace of `A` with eigenvalue `1`.
+    Parameters: 
+        - `self` : `np.ndarray`, matrix, should be Hermitian.
+        - `precision` : `float`.
+    Returns: `np.ndarray`, a matrix with columns being the orthonormal basis. Its column number is the dimension of the eigenspace.
     '''
 
-    # check the A is Hermitian
-    if not is_Hermitian(A, precision):
-        return False
-
-    # check 0 <= matrix <= I
-    e_vals = np.linalg.eigvals(A)
-    if np.any(e_vals < 0 - precision) or np.any(e_vals > 1 + precision):
-        return False
-        
-    return True
+    eigval, eigvec = np.linalg.eigh(A)
 
+    return eigvec[:, np.abs(eigval - 1.) < precision]
 
-def is_projector(A : np.ndarray, precision : float) -> bool:
+def eigen1space(A : np.ndarray, precision: float) -> np.ndarray:
     '''
-    Check whether matrix A is a projector. That is, A is Hermitian and A^2 = A.
-
-    Parameters:
-        - A : np.ndarray, a square matrix.
-        - precision : float.
-    Returns: bool, whether A is a projector.
+    Calculate the eigenspace of `A` with eigenvalue `1`.
+    Parameters: 
+        - `self` : `np.ndarray`, matrix, should be Hermitian.
+        - `precision` : `float`.
+    Returns: `np.ndarray`, a projector matrix.
     '''
 
-    # check the A is Hermitian
-    if not is_Hermitian(A, precision):
-        return False
-
-    # check whether A^2 = A
-    if not close_equal(A @ A, A, precision):
-        return False
-        
-    return True
\ No newline at end of file
+    V = eigen1space_basis(A, precision)
+    return V @ V.conj().transpose()
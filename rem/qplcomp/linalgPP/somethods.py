@@ -2,16 +2,172 @@
 The methods for superoperators.
 '''
 
-from .mmethods import Loewner_le, is_spd
+from __future__ import annotations
+from typing import Sequence
+
+from .verify import Loewner_le
 
 import numpy as np
 
-def is_qo(kraus : list[np.ndarray], precision : float) -> bool:
-    sum_res = np.sum([m @ m.conj().transpose for m in kraus], axis = 0)
 
-    if Loewner_le(sum_res, np.zeros_like(sum_res), precision)\
-    or Loewner_le(np.eye(len(sum_res)), sum_res, precision):
-        return False
-    
-    return True
+# the local Liouville tensor is formed only if it has at most this many entries (or it is not larger than the stack of operators)
+LIOUVILLE_LOCAL_MAX_SIZE = 2**20
+
+def is_qo(kraus : np.ndarray, precision : float) -> bool:
+    '''
+    Decide whether the Kraus operators `E_i` form a quantum operation, namely `sum_i E_i^dagger E_i <= I`.
+
+    Parameters:
+        - kraus : np.ndarray, the Kraus operators stacked in the shape `(r, d, d)`.
+        - precision : float.
+    '''
+    kraus = np.asarray(kraus)
+    sum_res = np.einsum('rji,rjk->ik', kraus.conj(), kraus)
+
+    return bool(Loewner_le(sum_res, np.eye(len(sum_res)), precision))
+
+
+
+def kraus_compress(kraus : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Return the fewest Kraus operators which represent the same superoperator as `kraus`, whose number is the rank of the Choi matrix.
+
+    The Choi matrix is `J = A^T conj(A)`, where `A` is the matrix with rows `vec(E_i)`. For `r` operators of dimension `d`:
+        - if `r <= d^2`, the singular value decomposition of `A` gives the eigendecomposition of `J` in O(r^2 d^2);
+        - otherwise, `J` is formed and decomposed directly in O(r d^4 + d^6).
+    The components with eigenvalues (squared singular values) below `precision^2`, or below the rounding errors of the eigendecomposition of `J`, are dropped.
+
+    Parameters:
+        - kraus : np.ndarray, the Kraus operators stacked in the shape `(r, d, d)`.
+        - precision : float, the singular values and entries below it are dropped.
+
+    Returns: np.ndarray, at most `d^2` Kraus operators in the shape `(r', d, d)`, or a zero operator if the superoperator is zero.
+    '''
+    kraus = np.asarray(kraus)
+    r, d, _ = kraus.shape
+    if r <= 1:
+        return kraus
+
+    A = kraus.reshape(r, d*d)
+
+    if r <= d*d:
+        _, S, Vh = np.linalg.svd(A, full_matrices = False)
+        keep = S > precision
+        res = S[keep, None] * Vh[keep]
+
+    else:
+        J = A.T @ A.conj()
+        w, V = np.linalg.eigh((J + J.conj().T) / 2)
+        # the eigenvalues are only accurate up to the rounding errors relative to the largest one
+        keep = w > max(precision**2, len(w) * np.finfo(w.dtype).eps * np.abs(w).max())
+        res = (V[:, keep] * np.sqrt(w[keep])).T
+
+    if not keep.any():
+        return np.zeros((1, d, d), dtype = A.dtype)
+
+    # clear the rounding errors of the decomposition, so that the exact zeros stay
+    res[np.abs(res) < precision] = 0.
+
+    return res.reshape(-1, d, d)
+
+
+def kraus_to_liouville(kraus : np.ndarray) -> np.ndarray:
+    '''
+    Return the Liouville (transfer) matrix `sum_i E_i ⊗ conj(E_i)` of the superoperator with Kraus operators stacked in `kraus`, which maps `vec(rho)` to `vec(sum_i E_i rho E_i^dagger)` for the row-major `vec`.
+    '''
+    kraus = np.asarray(kraus)
+    r, d, _ = kraus.shape
+    return np.einsum('rij,rkl->ikjl', kraus, kraus.conj()).reshape(d*d, d*d)
+
+def liouville_to_kraus(L : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Return the fewest Kraus operators (stacked) of the superoperator with Liouville matrix `L`, by the eigendecomposition of its Choi matrix. The eigenvalues below `precision` are dropped.
+    '''
+    d = int(round(np.sqrt(L.shape[0])))
+
+    # the Choi matrix sum_i vec(E_i) vec(E_i)^dagger is a reshuffle of L
+    J = L.reshape(d, d, d, d).transpose(0, 2, 1, 3).reshape(d*d, d*d)
+    J = (J + J.conj().T) / 2
+
+    w, V = np.linalg.eigh(J)
+    keep = w > precision
+
+    if not keep.any():
+        return np.zeros((1, d, d), dtype = L.dtype)
+
+    res = (V[:, keep] * np.sqrt(w[keep])).T
+
+    # clear the rounding errors of the decomposition, so that the exact zeros stay
+    res[np.abs(res) < precision] = 0.
+
+    return res.reshape(-1, d, d)
+
+
+def kraus_extend(kraus : np.ndarray, pos : Sequence[int], n : int) -> np.ndarray:
+    '''
+    Return the extensions `E_i ⊗ I` of the `k`-qubit Kraus operators to `n` qubits, where the operators act on the qubits `pos`.
+
+    Parameters:
+        - kraus : np.ndarray, the Kraus operators in the shape `(r, 2^k, 2^k)`.
+        - pos : Sequence[int], the `k` positions of the qubits of `E_i` in the `n` qubits.
+        - n : int, the qubit number of the extension.
+
+    Returns: np.ndarray, the extensions in the shape `(r, 2^n, 2^n)`.
+    '''
+    r = kraus.shape[0]
+    k = len(pos)
+
+    ext = np.einsum('rij,xy->rixjy', kraus, np.eye(2**(n-k), dtype = kraus.dtype))
+
+    # the axes are in the order of `pos` followed by the other qubits, and are rearranged
+    order = list(pos) + [i for i in range(n) if i not in pos]
+    inv = list(np.argsort(order))
+    ext = ext.reshape((r,) + (2,) * (2*n)).transpose([0] + [1 + i for i in inv] + [1 + n + i for i in inv])
+
+    return ext.reshape(r, 2**n, 2**n)
+
+
+def kraus_apply_batch(kraus : np.ndarray, rhos : np.ndarray, pos : Sequence[int]) -> np.ndarray:
+    '''
+    Calculate `sum_i (E_i ⊗ I) rho (E_i ⊗ I)^dagger` for every `rho` in the stack, where the `k`-qubit Kraus operators `E_i` act on the qubits `pos` of the `n`-qubit operators.
+
+    The Kraus operators are contracted with the target axes of the stack one by one, so that the cost is O(b r 2^(2n+k)) for `b` operators and `r` Kraus operators. The extensions `E_i ⊗ I` are never formed, and the intermediates are of the size of the stack rather than `r` times it. If it costs less, the local Liouville tensor `sum_i E_i ⊗ conj(E_i)` is formed in O(r 2^(4k)) and contracted instead, in O(b 2^(2n+2k)). It is only formed with at most `max(LIOUVILLE_LOCAL_MAX_SIZE, b 2^(2n))` entries.
+
+    Parameters:
+        - kraus : np.ndarray, the Kraus operators in the shape `(r, 2^k, 2^k)`.
+        - rhos : np.ndarray, the operators in the shape `(b, 2^n, 2^n)`.
+        - pos : Sequence[int], the `k` positions of the operators which the qubits of `E_i` correspond to.
+
+    Returns: np.ndarray, the results in the shape `(b, 2^n, 2^n)`.
+    '''
+    b, d, _ = rhos.shape
+    n = d.bit_length() - 1
+    k = len(pos)
+
+    # the qubits at `pos` are moved ahead
+    order = list(pos) + [i for i in range(n) if i not in pos]
+    perm = [0] + [1 + i for i in order] + [1 + n + i for i in order]
+    X = rhos.reshape((b,) + (2,) * (2*n)).transpose(perm).reshape(b, 2**k, 2**(n-k), 2**k, 2**(n-k))
+
+    r = kraus.shape[0]
+    D, R = 2**k, 2**(n-k)
+    # the flops are O(D^3 (D r + D b R^2)) for the Liouville tensor, and O(D^3 (2 b r R^2)) for the Kraus operators
+    # the Liouville tensor is applied in one large matrix product, and is preferred up to twice the flops
+    if D * (r + b * R * R) < 4 * b * r * R * R and D**4 <= max(LIOUVILLE_LOCAL_MAX_SIZE, X.size):
+        # the local Liouville tensor sum_r E_r ⊗ conj(E_r) is formed and applied
+        L = np.tensordot(kraus, kraus.conj(), ([0], [0]))
+        X = np.tensordot(X, L, ([1, 3], [1, 3])).transpose(0, 3, 1, 4, 2)
+
+    else:
+        # the Kraus operators are applied one by one and accumulated, so that the intermediates are of the size of the stack
+        res = np.zeros(X.shape, dtype = np.result_type(kraus, X))
+        X = X.reshape(b, D, R * D * R)
+        for E in kraus:
+            # E_r X, with the columns (x, l, y)
+            Y = np.matmul(E, X).reshape(b * D * R, D, R).transpose(0, 2, 1)
+            # (E_r X) E_r^dagger, on the axis l
+            res += (Y @ E.conj().T).transpose(0, 2, 1).reshape(b, D, R, D, R)
+        X = res
 
+    X = X.reshape((b,) + (2,) * (2*n)).transpose(np.argsort(perm))
+    return X.reshape(b, d, d)
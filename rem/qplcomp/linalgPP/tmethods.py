@@ -0,0 +1,116 @@
+'''
+The methods for operators in tensor representation.
+
+An operator on `n` qubits is represented by a tensor of shape `(2,)*2n`. The indices `0, ..., n-1` are the rows (outputs) and the indices `n, ..., 2n-1` are the columns (inputs), following the convention of `QOpt`.
+
+The methods below act a `k`-qubit operator on some qubits of an `n`-qubit operator directly, with O(2^(2n) * 2^k) cost, instead of first extending it to `n` qubits and calculating with the dense `2^n x 2^n` matrices in O(2^(3n)).
+'''
+
+from __future__ import annotations
+from typing import Sequence
+
+import numpy as np
+
+
+def t_apply_left(A : np.ndarray, T : np.ndarray, pos : Sequence[int]) -> np.ndarray:
+    '''
+    Calculate `(A ⊗ I) @ T`, where the `k`-qubit operator `A` acts on the qubits `pos` of the `n`-qubit operator `T`.
+
+    Parameters:
+        - A : np.ndarray, the tensor representation of a `k`-qubit operator.
+        - T : np.ndarray, the tensor representation of an `n`-qubit operator.
+        - pos : Sequence[int], the `k` positions in `T` which the qubits of `A` correspond to.
+
+    Returns: np.ndarray, the tensor representation of the `n`-qubit result.
+    '''
+    k = len(pos)
+
+    res = np.tensordot(A, T, (list(range(k, 2*k)), list(pos)))
+
+    # the output indices of A come first, and are moved to the positions
+    return np.moveaxis(res, list(range(k)), list(pos))
+
+def t_apply_right(T : np.ndarray, A : np.ndarray, pos : Sequence[int]) -> np.ndarray:
+    '''
+    Calculate `T @ (A ⊗ I)`, where the `k`-qubit operator `A` acts on the qubits `pos` of the `n`-qubit operator `T`.
+
+    Parameters:
+        - T : np.ndarray, the tensor representation of an `n`-qubit operator.
+        - A : np.ndarray, the tensor representation of a `k`-qubit operator.
+        - pos : Sequence[int], the `k` positions in `T` which the qubits of `A` correspond to.
+
+    Returns: np.ndarray, the tensor representation of the `n`-qubit result.
+    '''
+    k = len(pos)
+    n = len(T.shape) // 2
+    col_pos = [n + p for p in pos]
+
+    res = np.tensordot(T, A, (col_pos, list(range(k))))
+
+    # the input indices of A come last, and are moved to the positions
+    return np.moveaxis(res, list(range(2*n - k, 2*n)), col_pos)
+
+def t_add_local(T : np.ndarray, A : np.ndarray, pos : Sequence[int]) -> np.ndarray:
+    '''
+    Calculate `T + A ⊗ I`, where the `k`-qubit operator `A` is on the qubits `pos` of the `n`-qubit operator `T`.
+
+    Only the entries of `T` on the diagonal of the other qubits are updated, and the extension `A ⊗ I` is never formed.
+
+    Parameters:
+        - T : np.ndarray, the tensor representation of an `n`-qubit operator.
+        - A : np.ndarray, the tensor representation of a `k`-qubit operator.
+        - pos : Sequence[int], the `k` positions in `T` which the qubits of `A` correspond to.
+
+    Returns: np.ndarray, the tensor representation of the `n`-qubit result.
+    '''
+    k = len(pos)
+    n = len(T.shape) // 2
+    rest = [i for i in range(n) if i not in pos]
+    m = len(rest)
+
+    # the sliced indices of A are arranged in the increasing order of positions
+    order = sorted(range(k), key = lambda i: pos[i])
+    A_sorted = A.transpose(order + [k + i for i in order])
+
+    res = T.astype(np.result_type(T, A), copy=True)
+
+    idx : list = [slice(None)] * (2*n)
+    if m > 0:
+        # enumerate the diagonal of the other qubits by broadcasted index arrays
+        bits = (np.arange(2**m)[:, None] >> np.arange(m - 1, -1, -1)) & 1
+        for j, i in enumerate(rest):
+            idx[i] = idx[n + i] = bits[:, j]
+        res[tuple(idx)] += A_sorted
+
+    else:
+        res += A_sorted
+
+    return res
+
+def t_reset(T : np.ndarray, pos : Sequence[int]) -> np.ndarray:
+    '''
+    Calculate `tr_pos(T) ⊗ |0><0|_pos`, namely the reset of the qubits `pos` of the `n`-qubit operator `T` to `|0>`.
+
+    The partial trace is summed on the diagonal of the qubits `pos`, and written into the block of `|0><0|_pos`, in O(2^(2n)). The Kraus operators of the reset are not applied.
+
+    Parameters:
+        - T : np.ndarray, the tensor representation of an `n`-qubit operator.
+        - pos : Sequence[int], the positions of the qubits to reset.
+
+    Returns: np.ndarray, the tensor representation of the `n`-qubit result.
+    '''
+    k = len(pos)
+    n = len(T.shape) // 2
+
+    # the partial trace, on the other indices in order
+    S = np.moveaxis(T, list(pos) + [n + p for p in pos], list(range(2*k)))
+    traced = np.trace(S.reshape((2**k, 2**k) + S.shape[2*k:]), axis1 = 0, axis2 = 1)
+
+    res = np.zeros_like(T)
+
+    idx : list = [slice(None)] * (2*n)
+    for p in pos:
+        idx[p] = idx[n + p] = 0
+    res[tuple(idx)] = traced
+
+    return res
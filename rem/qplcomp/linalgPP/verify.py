@@ -0,0 +1,272 @@
+'''
+The property verification methods.
+
+All the methods here accept either a single square matrix of shape `(d, d)`, or a stack of matrices of shape `(..., d, d)`. For a single matrix the result is a `bool`. For a stack the result is a boolean array of shape `(...)`, and the whole stack is verified by batched NumPy calls.
+
+The Hermitian property is checked first with O(d^2) cost. The remaining checks are then specialized for Hermitian matrices: the semi-positivity is decided by a Cholesky decomposition when possible, with `eigvalsh` as the fallback, and some cheap necessary conditions reject the candidates before any O(d^3) products are formed. Only the candidates surviving the previous steps are passed to the next one.
+'''
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def _to_stack(A : np.ndarray) -> tuple[np.ndarray, tuple[int, ...]]:
+    '''
+    Reshape the input into a `(k, d, d)` stack, and return it with the batch shape.
+    '''
+    A = np.asarray(A)
+    batch_shape = A.shape[:-2]
+    return A.reshape((-1,) + A.shape[-2:]), batch_shape
+
+def _from_mask(mask : np.ndarray, batch_shape : tuple[int, ...]) -> bool | np.ndarray:
+    '''
+    Reshape the verification results of a stack back to the batch shape. It returns a `bool` for a single matrix.
+    '''
+    if batch_shape == ():
+        return bool(mask[0])
+    return mask.reshape(batch_shape)
+
+def _refine(mask : np.ndarray, S : np.ndarray, check) -> np.ndarray:
+    '''
+    Apply the stack check `check` only on the matrices of `S` which are still `True` in `mask`, and update `mask` inplace.
+    '''
+    idx = np.flatnonzero(mask)
+    if len(idx) == 0:
+        return mask
+    if len(idx) == len(mask):
+        mask &= check(S)
+    else:
+        mask[idx] = check(S[idx])
+    return mask
+
+def _max_abs(S : np.ndarray) -> np.ndarray:
+    '''
+    The maximum norm of each matrix in the stack.
+    '''
+    return np.max(np.abs(S), axis=(-2, -1))
+
+def _diag(S : np.ndarray) -> np.ndarray:
+    return np.diagonal(S, axis1=-2, axis2=-1)
+
+
+def _hermitian_mask(S : np.ndarray, precision : float) -> np.ndarray:
+    return _max_abs(S - S.conj().swapaxes(-2, -1)) < precision
+
+def _psd_mask(S : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Decide `S >= -precision * I` for a stack of Hermitian matrices.
+
+    The Cholesky decomposition of `S + precision * I` succeeds exactly when it is positive definite. It is tried on the whole stack at once, and the eigenvalues are only calculated if it fails.
+    '''
+    try:
+        np.linalg.cholesky(S + precision * np.eye(S.shape[-1]))
+        return np.ones(len(S), dtype=bool)
+    except np.linalg.LinAlgError:
+        pass
+
+    return np.all(np.linalg.eigvalsh(S) >= -precision, axis=-1)
+
+def _effect_mask(S : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Decide `-precision * I <= S <= (1 + precision) * I` for a stack of Hermitian matrices.
+    '''
+    eye = np.eye(S.shape[-1])
+    try:
+        np.linalg.cholesky(S + precision * eye)
+        np.linalg.cholesky((1 + precision) * eye - S)
+        return np.ones(len(S), dtype=bool)
+    except np.linalg.LinAlgError:
+        pass
+
+    e_vals = np.linalg.eigvalsh(S)
+    return (e_vals[:, 0] >= -precision) & (e_vals[:, -1] <= 1 + precision)
+
+def _unitary_mask(S : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Decide `S @ S^dagger = I` for a stack of matrices, without forming the identity.
+    '''
+    G = S @ S.conj().swapaxes(-2, -1)
+    d = S.shape[-1]
+    G[:, np.arange(d), np.arange(d)] -= 1
+    return _max_abs(G) < precision
+
+def _idempotent_mask(S : np.ndarray, precision : float) -> np.ndarray:
+    return _max_abs(S @ S - S) < precision
+
+
+#######################################################################
+#
+# Property Verification Methods.
+#
+#######################################################################
+
+def is_Hermitian(A : np.ndarray, precision : float) -> bool | np.ndarray:
+    '''
+    Check whether matrix A is Hermitian.
+
+    Parameters:
+        - A : np.ndarray, a square matrix, or a stack of square matrices.
+        - precision : float.
+    Returns: bool | np.ndarray, whether A is Hermitian.
+    '''
+    S, batch_shape = _to_stack(A)
+    return _from_mask(_hermitian_mask(S, precision), batch_shape)
+
+
+def is_unitary(A : np.ndarray, precision : float) -> bool | np.ndarray:
+    '''
+    Check whether matrix A is unitary.
+
+    The rows of a unitary matrix are unit vectors, which is checked with O(d^2) cost before the product `A @ A^dagger` is formed.
+
+    Parameters:
+        - A : np.ndarray, a square matrix, or a stack of square matrices.
+        - precision : float.
+    Returns: bool | np.ndarray, whether A is unitary.
+    '''
+    S, batch_shape = _to_stack(A)
+
+    # the norms of rows are the diagonal of A @ A^dagger
+    row_norms = np.sum(S.real**2 + S.imag**2, axis=-1)
+    mask = np.all(np.abs(row_norms - 1) < precision, axis=-1)
+
+    mask = _refine(mask, S, lambda T: _unitary_mask(T, precision))
+
+    return _from_mask(mask, batch_shape)
+
+
+def is_spd(A : np.ndarray, precision : float) -> bool | np.ndarray:
+    '''
+    Check whether operator A is semi-positive definite.
+
+    Parameters:
+        - A : np.ndarray, a square matrix, or a stack of square matrices.
+        - precision : float.
+    Returns: bool | np.ndarray, whether A is semi-positive definite.
+    '''
+    S, batch_shape = _to_stack(A)
+
+    mask = _hermitian_mask(S, precision)
+
+    # the diagonal entries are necessarily nonnegative
+    mask &= np.all(_diag(S).real >= -precision, axis=-1)
+
+    mask = _refine(mask, S, lambda T: _psd_mask(T, precision))
+
+    return _from_mask(mask, batch_shape)
+
+
+def is_pdo(A : np.ndarray, precision : float) -> bool | np.ndarray:
+    '''
+    Check whether matrix `A` can be considered as a partial density operator. That is, `A` is semipositive definite and `tr(A) <= 1`.
+
+    Parameters:
+        - A : np.ndarray, a square matrix, or a stack of square matrices.
+        - precision : float.
+    Returns: bool | np.ndarray, whether A is a partial density operator.
+    '''
+    S, batch_shape = _to_stack(A)
+
+    mask = _hermitian_mask(S, precision)
+    mask &= np.all(_diag(S).real >= -precision, axis=-1)
+
+    # check whether tr(A) <= 1
+    mask &= np.trace(S, axis1=-2, axis2=-1).real <= 1 + precision
+
+    mask = _refine(mask, S, lambda T: _psd_mask(T, precision))
+
+    return _from_mask(mask, batch_shape)
+
+
+def is_effect(A : np.ndarray, precision : float) -> bool | np.ndarray:
+    '''
+    Check whether matrix A represents a quantum effect. That is, A is Hermitian and 0 <= A <= I.
+
+    Parameters:
+        - A : np.ndarray, a square matrix, or a stack of square matrices.
+        - precision : float.
+    Returns: bool | np.ndarray, whether A represents a quantum effect.
+    '''
+    S, batch_shape = _to_stack(A)
+
+    mask = _hermitian_mask(S, precision)
+
+    # the diagonal entries are necessarily in [0, 1]
+    diag = _diag(S).real
+    mask &= np.all((diag >= -precision) & (diag <= 1 + precision), axis=-1)
+
+    mask = _refine(mask, S, lambda T: _effect_mask(T, precision))
+
+    return _from_mask(mask, batch_shape)
+
+
+def is_projector(A : np.ndarray, precision : float) -> bool | np.ndarray:
+    '''
+    Check whether matrix A is a projector. That is, A is Hermitian and A^2 = A.
+
+    `A^2 = A` implies `tr(A^2) = tr(A)`, where `tr(A^2)` is the sum of `A * A^T` and is checked with O(d^2) cost before the product `A @ A` is formed.
+
+    Parameters:
+        - A : np.ndarray, a square matrix, or a stack of square matrices.
+        - precision : float.
+    Returns: bool | np.ndarray, whether A is a projector.
+    '''
+    S, batch_shape = _to_stack(A)
+
+    mask = _hermitian_mask(S, precision)
+
+    # the necessary condition: tr(A^2) = tr(A)
+    tr_square = np.sum(S * S.swapaxes(-2, -1), axis=(-2, -1))
+    mask &= np.abs(tr_square - np.trace(S, axis1=-2, axis2=-1)) < precision * S.shape[-1]
+
+    mask = _refine(mask, S, lambda T: _idempotent_mask(T, precision))
+
+    return _from_mask(mask, batch_shape)
+
+
+def Loewner_le(A : np.ndarray, B : np.ndarray, precision : float) -> bool | np.ndarray:
+    '''
+    Decide the loewner order of two Hermitian matrices A and B.
+
+    `B - A + precision * I` is first tried with a Cholesky decomposition, which succeeds exactly when it is positive definite. Only if it fails, the eigenvalues of the Hermitian matrix `B - A` are calculated to confirm the result.
+
+    Note: it will not check whether A or B is Hermitian.
+
+    Parameters:
+        - A, B : np.ndarray, two square matrices, or two stacks of square matrices (broadcasted against each other).
+        - precision : float.
+    Returns: bool | np.ndarray, whether A <= B in Loewner order.
+    '''
+    return Loewner_nonneg(np.asarray(B) - np.asarray(A), precision)
+
+
+def Loewner_nonneg(D : np.ndarray, precision : float) -> bool | np.ndarray:
+    '''
+    Decide whether the Hermitian matrix D is nonnegative in Loewner order, namely `0 <= D`. It is the test `Loewner_le` conducts on `B - A`, for the callers which have calculated the difference themselves.
+
+    Note: it will not check whether D is Hermitian.
+
+    Parameters:
+        - D : np.ndarray, a square matrix, or a stack of square matrices.
+        - precision : float.
+    Returns: bool | np.ndarray, whether 0 <= D in Loewner order.
+    '''
+    S, batch_shape = _to_stack(D)
+    return _from_mask(_psd_mask(S, precision), batch_shape)
+
+
+def projector_le(P : np.ndarray, Q : np.ndarray, precision : float) -> bool | np.ndarray:
+    '''
+    Decide the loewner order of two projectors P and Q, which is the inclusion of the subspaces. That is, `P <= Q` if and only if `Q @ P = P`.
+
+    Note: it will not check whether P or Q is a projector.
+
+    Parameters:
+        - P, Q : np.ndarray, two projectors, or two stacks of projectors (broadcasted against each other).
+        - precision : float.
+    Returns: bool | np.ndarray, whether P <= Q in Loewner order.
+    '''
+    P, Q = np.asarray(P), np.asarray(Q)
+    S, batch_shape = _to_stack(Q @ P - P)
+    return _from_mask(_max_abs(S) < precision, batch_shape)
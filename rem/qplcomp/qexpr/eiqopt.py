@@ -57,13 +57,12 @@ class EIQOpt(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.iqopt.qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt", self.iqopt))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOpt):
-            return self.iqopt == other.iqopt
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.iqopt,)
+
+    def _calc_hash(self, key : tuple) -> int:
+        # the operator is hashed by its qubits and the fingerprint of its value, which do not materialize it (see `QOpt.fingerprint`)
+        return hash((type(self).__name__, self.iqopt.qvar.tuple, self.iqopt.qval.fingerprint))
     
 class EIQOptPair(EIQOptAbstract):
     '''
@@ -94,13 +93,8 @@ class EIQOptPair(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.qvar.qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt-pair", self.qopt, self.qvar))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptPair):
-            return self.qopt == other.qopt and self.qvar == other.qvar
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.qopt, self.qvar)
     
     
 class EIQOptAdd(EIQOptAbstract):
@@ -131,13 +125,8 @@ class EIQOptAdd(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.ioptA.all_qvar + self.ioptB.all_qvar
 
-    def __hash__(self) -> int:
-        return hash(("iqopt-add", self.ioptA, self.ioptB))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptAdd):
-            return self.ioptA == other.ioptA and self.ioptB == other.ioptB
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.ioptA, self.ioptB)
 
 
 class EIQOptNeg(EIQOptAbstract):
@@ -167,13 +156,8 @@ class EIQOptNeg(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.iopt.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt-neg", self.iopt))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptNeg):
-            return self.iopt == other.iopt
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.iopt,)
 
 
 
@@ -206,13 +190,8 @@ class EIQOptSub(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.ioptA.all_qvar + self.ioptB.all_qvar
 
-    def __hash__(self) -> int:
-        return hash(("iqopt-sub", self.ioptA, self.ioptB))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptSub):
-            return self.ioptA == other.ioptA and self.ioptB == other.ioptB
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.ioptA, self.ioptB)
 
 class EIQOptScale(EIQOptAbstract):
     '''
@@ -243,13 +222,8 @@ class EIQOptScale(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.iopt.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt-scale", self.c, self.iopt))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptScale):
-            return self.c == other.c and self.iopt == other.iopt
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.c, self.iopt)
 
 class EIQOptMul(EIQOptAbstract):
     '''
@@ -279,13 +253,8 @@ class EIQOptMul(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.ioptA.all_qvar + self.ioptB.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt-mul", self.ioptA, self.ioptB))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptMul):
-            return self.ioptA == other.ioptA and self.ioptB == other.ioptB
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.ioptA, self.ioptB)
 
 class EIQOptDagger(EIQOptAbstract):
     '''
@@ -315,13 +284,8 @@ class EIQOptDagger(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.iopt.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt-dagger", self.iopt))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptDagger):
-            return self.iopt == other.iopt
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.iopt,)
 
 class EIQOptTensor(EIQOptAbstract):
     '''
@@ -353,13 +317,8 @@ class EIQOptTensor(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.ioptA.all_qvar + self.ioptB.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt-tensor", self.ioptA, self.ioptB))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptTensor):
-            return self.ioptA == other.ioptA and self.ioptB == other.ioptB
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.ioptA, self.ioptB)
 
 class EIQOptDisjunct(EIQOptAbstract):
     '''
@@ -390,13 +349,8 @@ class EIQOptDisjunct(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.ioptA.all_qvar + self.ioptB.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt-disjunct", self.ioptA, self.ioptB))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptDisjunct):
-            return self.ioptA == other.ioptA and self.ioptB == other.ioptB
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.ioptA, self.ioptB)
     
 class EIQOptConjunct(EIQOptAbstract):
     '''
@@ -428,13 +382,8 @@ class EIQOptConjunct(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.ioptA.all_qvar + self.ioptB.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt-conjunct", self.ioptA, self.ioptB))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptConjunct):
-            return self.ioptA == other.ioptA and self.ioptB == other.ioptB
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.ioptA, self.ioptB)
 
 class EIQOptComplement(EIQOptAbstract):
     '''
@@ -463,13 +412,8 @@ class EIQOptComplement(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.iopt.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt-complement", self.iopt))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptComplement):
-            return self.iopt == other.iopt
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.iopt,)
 
 class EIQOptSasakiImply(EIQOptAbstract):
     '''
@@ -501,13 +445,8 @@ class EIQOptSasakiImply(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.ioptA.all_qvar + self.ioptB.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt-sasaki-imply", self.ioptA, self.ioptB))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptSasakiImply):
-            return self.ioptA == other.ioptA and self.ioptB == other.ioptB
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.ioptA, self.ioptB)
 
 class EIQOptSasakiConjunct(EIQOptAbstract):
     '''
@@ -539,10 +478,5 @@ class EIQOptSasakiConjunct(EIQOptAbstract):
     def all_qvar(self) -> QVar:
         return self.ioptA.all_qvar + self.ioptB.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("iqopt-sasaki-conjunct", self.ioptA, self.ioptB))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EIQOptSasakiConjunct):
-            return self.ioptA == other.ioptA and self.ioptB == other.ioptB
-        return False
\ No newline at end of file
+    def _struct_key(self) -> tuple:
+        return (self.ioptA, self.ioptB)
\ No newline at end of file
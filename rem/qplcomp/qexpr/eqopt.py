@@ -49,6 +49,13 @@ class EQOpt(EQOptAbstract):
     
     def __str__(self) -> str:
         return str(self.qopt)
+
+    def _struct_key(self) -> tuple:
+        return (self.qopt,)
+
+    def _calc_hash(self, key : tuple) -> int:
+        # the operator is hashed by its fingerprint, which does not materialize it (see `QOpt.fingerprint`)
+        return hash((type(self).__name__, self.qopt.fingerprint))
     
 
 
@@ -73,6 +80,9 @@ class EQOptKetProj(EQOptAbstract):
     def __str__(self) -> str:
         return f"[{self.vec}]"
 
+    def _struct_key(self) -> tuple:
+        return (self.vec,)
+
 
 
 class EQOptAdd(EQOptAbstract):
@@ -102,11 +112,8 @@ class EQOptAdd(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.optA) + "+" + str(self.optB) + ")"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-add", self.optA, self.optB))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptAdd) and self.optA == other.optA and self.optB == other.optB
+    def _struct_key(self) -> tuple:
+        return (self.optA, self.optB)
     
 
 class EQOptNeg(EQOptAbstract):
@@ -132,11 +139,8 @@ class EQOptNeg(EQOptAbstract):
     def __str__(self) -> str:
         return "(-" + str(self.opt) + ")"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-neg", self.opt))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptNeg) and self.opt == other.opt
+    def _struct_key(self) -> tuple:
+        return (self.opt,)
 
 
 
@@ -167,11 +171,8 @@ class EQOptSub(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.optA) + "-" + str(self.optB) + ")"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-sub", self.optA, self.optB))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptSub) and self.optA == other.optA and self.optB == other.optB
+    def _struct_key(self) -> tuple:
+        return (self.optA, self.optB)
 
 class EQOptMul(EQOptAbstract):
     '''
@@ -200,11 +201,8 @@ class EQOptMul(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.optA) + " " + str(self.optB) + ")"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-mul", self.optA, self.optB))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptMul) and self.optA == other.optA and self.optB == other.optB
+    def _struct_key(self) -> tuple:
+        return (self.optA, self.optB)
 
 class EQOptScale(EQOptAbstract):
     '''
@@ -231,11 +229,8 @@ class EQOptScale(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.c) + " " + str(self.opt) + ")"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-scale", self.c, self.opt))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptScale) and self.c == other.c and self.opt == other.opt
+    def _struct_key(self) -> tuple:
+        return (self.c, self.opt)
     
 
 class EQOptDagger(EQOptAbstract):
@@ -261,11 +256,8 @@ class EQOptDagger(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.opt) + "†" + ")"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-dagger", self.opt))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptDagger) and self.opt == other.opt
+    def _struct_key(self) -> tuple:
+        return (self.opt,)
 
 
 class EQOptTensor(EQOptAbstract):
@@ -293,11 +285,8 @@ class EQOptTensor(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.optA) + " ⊗ " + str(self.optB) + ")"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-tensor", self.optA, self.optB))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptTensor) and self.optA == other.optA and self.optB == other.optB
+    def _struct_key(self) -> tuple:
+        return (self.optA, self.optB)
 
 
 
@@ -329,11 +318,8 @@ class EQOptDisjunct(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.optA) + " ∨ " + str(self.optB) + ")"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-disjunct", self.optA, self.optB))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptDisjunct) and self.optA == other.optA and self.optB == other.optB
+    def _struct_key(self) -> tuple:
+        return (self.optA, self.optB)
     
 
 
@@ -365,11 +351,8 @@ class EQOptConjunct(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.optA) + " ∧ " + str(self.optB) + ")"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-conjunct", self.optA, self.optB))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptConjunct) and self.optA == other.optA and self.optB == other.optB
+    def _struct_key(self) -> tuple:
+        return (self.optA, self.optB)
     
 class EQOptComplement(EQOptAbstract):
     '''
@@ -394,11 +377,8 @@ class EQOptComplement(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.opt) + "^⊥)"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-complement", self.opt))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptComplement) and self.opt == other.opt
+    def _struct_key(self) -> tuple:
+        return (self.opt,)
     
 
 
@@ -431,11 +411,8 @@ class EQOptSasakiImply(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.optA) + " ⇝ " + str(self.optB) + ")"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-sasaki-imply", self.optA, self.optB))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptSasakiImply) and self.optA == other.optA and self.optB == other.optB
+    def _struct_key(self) -> tuple:
+        return (self.optA, self.optB)
     
 
 class EQOptSasakiConjunct(EQOptAbstract):
@@ -466,11 +443,8 @@ class EQOptSasakiConjunct(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.optA) + " ⋒ " + str(self.optB) + ")"
     
-    def __hash__(self) -> int:
-        return hash(("qopt-sasaki-conjunct", self.optA, self.optB))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQOptSasakiConjunct) and self.optA == other.optA and self.optB == other.optB
+    def _struct_key(self) -> tuple:
+        return (self.optA, self.optB)
 
 
 class EQSOptApply(EQOptAbstract):
@@ -501,9 +475,6 @@ class EQSOptApply(EQOptAbstract):
     def __str__(self) -> str:
         return "(" + str(self.so) + "(" + str(self.opt) + "))"
     
-    def __hash__(self) -> int:
-        return hash(("qsopt-apply", self.so, self.opt))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, EQSOptApply) and self.so == other.so and self.opt == other.opt
+    def _struct_key(self) -> tuple:
+        return (self.so, self.opt)
 
@@ -47,6 +47,9 @@ class EQSOpt(EQSOptAbstract):
     def __str__(self) -> str:
         return str(self.qso)
 
+    def _struct_key(self) -> tuple:
+        return (self.qso,)
+
 
 
 class EQSOptAdd(EQSOptAbstract):
@@ -72,3 +75,6 @@ class EQSOptAdd(EQSOptAbstract):
     
     def __str__(self) -> str:
         return "(" + str(self.soA) + "+" + str(self.soB) + ")"
+
+    def _struct_key(self) -> tuple:
+        return (self.soA, self.soB)
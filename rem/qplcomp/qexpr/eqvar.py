@@ -36,10 +36,5 @@ class EQVar(TypedTerm):
     def __str__(self) -> str:
         return str(self.qvar)
     
-    def __hash__(self) -> int:
-        return hash(tuple(self.qvar._qvls))
-    
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, EQVar):
-            return self.qvar == other.qvar
-        return False
\ No newline at end of file
+    def _struct_key(self) -> tuple:
+        return (self.qvar.tuple,)
\ No newline at end of file
@@ -62,6 +62,9 @@ class EQVecBitString(EQVec):
     
     def __str__(self) -> str:
         return f"|{self.bitstr}>"
+
+    def _struct_key(self) -> tuple:
+        return (self.bitstr,)
         
     
 class EQVecAdd(EQVecAbstract):
@@ -93,6 +96,9 @@ class EQVecAdd(EQVecAbstract):
 
     def __str__(self) -> str:
         return str(self.vec1) + " + " + str(self.vec2)
+
+    def _struct_key(self) -> tuple:
+        return (self.vec1, self.vec2)
     
      
 
@@ -121,4 +127,7 @@ class EQVecScale(EQVecAbstract):
 
     def __str__(self) -> str:
         return str(self.c) + " " + str(self.vec)
+
+    def _struct_key(self) -> tuple:
+        return (self.c, self.vec)
    
\ No newline at end of file
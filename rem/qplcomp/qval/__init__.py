@@ -15,9 +15,12 @@ Finally, it provides a library `qvallib` with common quantum operators preserved
 
 from .qvar import QVar
 from .val import QVal, IQVal
+from .cache import LatticeCache, lattice_cache
 
 from .qvec import QVec
 from .qopt import QOpt, qproj_from_qvec
+from .qproj import QProj
+from .qkron import QKron
 from .qso import QSOpt
 
 from .iqopt import IQOpt
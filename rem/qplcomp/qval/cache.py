@@ -0,0 +1,194 @@
+'''
+The memoization cache for the lattice operations of quantum operators.
+
+During a refinement session the same projectors are conjuncted, disjuncted and complemented repeatedly (by the Sasaki operations, the refinement rules and the fixpoint iterations of `wlp`). The results of these operations are kept in a bounded LRU cache, keyed by the name of the operation and the content fingerprints of the operands (see `QOpt.fingerprint`).
+
+The operator results of the cached operations are given derived fingerprints, namely the digests of their keys, so that they can be operands of the following cached operations without hashing their contents.
+'''
+
+from __future__ import annotations
+from typing import Any, Callable
+from collections import OrderedDict
+
+import functools
+import hashlib
+
+import numpy as np
+
+
+class LatticeCache:
+    '''
+    A bounded LRU cache for the results of lattice operations.
+
+    The memory of the cached results is estimated by their (materialized) representations. The least recently used entries are evicted when the estimation exceeds `budget` bytes.
+    '''
+
+    # the estimated memory of an entry besides its result
+    ENTRY_OVERHEAD : int = 256
+
+    def __init__(self, budget : int = 256 * 2**20):
+        '''
+        Parameters:
+            - budget : int, the memory budget in bytes.
+        '''
+        self._entries : OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        self._budget : int = budget
+        self._nbytes : int = 0
+
+        # whether the cache is used
+        self.enabled : bool = True
+
+        # the keys of the cached operations in calculation
+        self._pending : set[tuple] = set()
+
+        self.hits : int = 0
+        self.misses : int = 0
+        self.evictions : int = 0
+        self._op_stats : dict[str, list[int]] = {}
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget : int) -> None:
+        '''
+        Set the memory budget in bytes, and evict the entries exceeding it.
+        '''
+        self._budget = budget
+        self._evict()
+
+    @property
+    def nbytes(self) -> int:
+        '''
+        The estimated memory of the cached results in bytes.
+        '''
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        '''
+        Remove all the entries. The statistics are kept.
+        '''
+        self._entries.clear()
+        self._nbytes = 0
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = self.evictions = 0
+        self._op_stats = {}
+
+    def stats(self) -> dict[str, Any]:
+        '''
+        Return the statistics of the cache: the total hits, misses and evictions, the hits and misses of each operation, the number of entries, the estimated memory and the budget.
+        '''
+        return {
+            'hits' : self.hits,
+            'misses' : self.misses,
+            'evictions' : self.evictions,
+            'ops' : {op : tuple(s) for op, s in self._op_stats.items()},
+            'entries' : len(self._entries),
+            'nbytes' : self._nbytes,
+            'budget' : self._budget,
+        }
+
+    def __str__(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total > 0 else 0.
+        return f"lattice cache: {self.hits} hits, {self.misses} misses ({rate:.1%}), {len(self._entries)} entries, {self._nbytes / 2**20:.1f}/{self._budget / 2**20:.1f} MiB"
+
+    @staticmethod
+    def _result_nbytes(res : Any) -> int:
+        '''
+        Estimate the memory of a result, by the representations it holds.
+        '''
+        nbytes = LatticeCache.ENTRY_OVERHEAD
+        for attr in ('_basis', '_matrix_repr'):
+            data = getattr(res, attr, None)
+            if isinstance(data, np.ndarray):
+                nbytes += data.nbytes
+        return nbytes
+
+    def _evict(self) -> None:
+        while self._nbytes > self._budget and len(self._entries) > 0:
+            _, (_, nbytes) = self._entries.popitem(last = False)
+            self._nbytes -= nbytes
+            self.evictions += 1
+
+    def call(self, op : str, method : Callable, operands : tuple, symmetric : bool = False) -> Any:
+        '''
+        Return `method(*operands)`, using the cached result of operation `op` on the operands if possible.
+
+        Parameters:
+            - op : str, the name of the operation.
+            - method : Callable, the calculation of the operation.
+            - operands : tuple, the `QOpt` operands.
+            - symmetric : bool, whether the operation is commutative. The order of operands is then ignored in the key.
+        '''
+        if not self.enabled:
+            return method(*operands)
+
+        fps = tuple(opt.fingerprint for opt in operands)
+
+        key = (op,) + (tuple(sorted(fps)) if symmetric else fps)
+
+        # the same operation called inside its own calculation (e.g. `QOpt.conjunct` calls `QProj.conjunct`)
+        if key in self._pending:
+            return method(*operands)
+
+        op_stats = self._op_stats.setdefault(op, [0, 0])
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            op_stats[0] += 1
+            return entry[0]
+
+        self.misses += 1
+        op_stats[1] += 1
+
+        self._pending.add(key)
+        try:
+            res = method(*operands)
+        finally:
+            self._pending.discard(key)
+
+        if getattr(res, '_fingerprint', False) is None:
+            res._fingerprint = (fps[0][0], res.qnum, digest('derived', key))
+
+        nbytes = LatticeCache._result_nbytes(res)
+        if nbytes <= self._budget:
+            self._entries[key] = (res, nbytes)
+            self._nbytes += nbytes
+            self._evict()
+
+        return res
+
+
+def digest(*parts : Any) -> bytes:
+    '''
+    Return the digest of the representation of `parts`, which consist of strings, numbers, bytes and fingerprints.
+    '''
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).digest()
+
+
+# the cache shared by all the quantum operators
+lattice_cache = LatticeCache()
+
+
+def lattice_cached(op : str, symmetric : bool = False) -> Callable:
+    '''
+    The decorator to memoize a lattice operation method of `QOpt` in `lattice_cache`.
+
+    Parameters:
+        - op : str, the name of the operation.
+        - symmetric : bool, whether the operation is commutative.
+    '''
+    def decorator(method : Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(*operands):
+            return lattice_cache.call(op, method, operands, symmetric)
+        return wrapper
+    return decorator
@@ -8,6 +8,8 @@ from ..error import QPLCompError
 
 from .val import IQVal, QVal
 from .qopt import QOpt
+from .qproj import QProj
+from .qkron import QKron
 from .qvar import QVar
 
 class IQOpt(IQVal):
@@ -25,6 +27,8 @@ class IQOpt(IQVal):
         # this property will pass to its calculation results in some circumstances
         self.rho_extend : bool = rho_extend
 
+        # the canonical hash, calculated on demand
+        self._hash : None | int = None
     
     @property
     def qval(self) -> QOpt:
@@ -43,6 +47,79 @@ class IQOpt(IQVal):
         
         
         return self_ext.qval == other_ext.qval
+
+    def __hash__(self) -> int:
+        '''
+        The hash is canonical under the cylinder extensions and the order of qubits, so that equal `IQOpt` instances have the same hash except in the rare cases of `QOpt.__hash__`. It is calculated once, on the representation quantized as in `QOpt.__hash__`.
+
+        The operators in `QKron` representation are hashed factor by factor (see `_canonical_factors`) and are not materialized. If more than one factor remains in the canonical form, the hash differs from the one of the materialized operator, and a lookup of one by the other misses.
+        '''
+        if self._hash is None:
+            if isinstance(self.qval, QKron):
+                factors = self._canonical_factors(QOpt.HASH_GRID)
+            else:
+                factors = [self._canonical(QOpt.HASH_GRID)]
+
+            parts = tuple((names, QOpt._hash_digest(T)) for names, T in factors)
+            self._hash = hash(parts[0] if len(parts) == 1 else parts)
+        return self._hash
+
+    def __getstate__(self) -> dict:
+        # the hash is calculated again after unpickling, because byte string hashes differ among processes
+        state = self.__dict__.copy()
+        state['_hash'] = None
+        return state
+
+    def _canonical(self, precision : float) -> tuple[tuple[str, ...], np.ndarray]:
+        '''
+        Return the canonical form of this indexed operator: the qubits are sorted by their names, and the qubits on which the operator acts as `cI` or `|0><0|` (the two kinds of cylinder extensions) up to `precision` are sliced out.
+
+        Returns: tuple[tuple[str, ...], np.ndarray], the remaining qubits and the tensor representation on them.
+        '''
+        names = self.qvar.tuple
+        n = len(names)
+        order = sorted(range(n), key = lambda i: names[i])
+        T = self.qval.t_repr.transpose(order + [n + i for i in order])
+
+        kept : list[str] = []
+        j = 0
+        for name in (names[i] for i in order):
+            m = T.ndim // 2
+            S = np.moveaxis(T, [j, m + j], [0, 1])
+
+            if linalgPP.close_zero(S[0, 1], precision) and linalgPP.close_zero(S[1, 0], precision) \
+                and (linalgPP.close_equal(S[0, 0], S[1, 1], precision) or linalgPP.close_zero(S[1, 1], precision)):
+                T = S[0, 0]
+            else:
+                kept.append(name)
+                j += 1
+
+        return tuple(kept), T
+
+    def _canonical_factors(self, precision : float) -> list[tuple[tuple[str, ...], np.ndarray]]:
+        '''
+        Return the canonical form of this indexed operator in `QKron` representation, factor by factor: every factor is put in the canonical form on its own qubits (see `_canonical`), the factors reduced to scalars (such as the identity and `|0><0|` factors of the cylinder extensions) are multiplied into the first remaining factor, and the remaining factors are sorted by their qubits. The cost is that of the factors.
+
+        Returns: list[tuple[tuple[str, ...], np.ndarray]], the qubits and the tensor representations of the remaining factors.
+        '''
+        assert isinstance(self.qval, QKron), "ASSERTION FAILED"
+
+        names = self.qvar.tuple
+        c = 1.
+        res : list[tuple[tuple[str, ...], np.ndarray]] = []
+        for opt, qubits in self.qval.factors:
+            kept, T = IQOpt(opt, QVar([names[i] for i in qubits]))._canonical(precision)
+            if len(kept) == 0:
+                c = c * T.item()
+            else:
+                res.append((kept, T))
+
+        if len(res) == 0:
+            return [((), np.array(c))]
+
+        res.sort(key = lambda f: f[0])
+        res[0] = (res[0][0], c * res[0][1])
+        return res
     
     @staticmethod
     def identity(is_rho : bool) -> IQOpt:
@@ -63,29 +140,39 @@ class IQOpt(IQVal):
         if not qvarT.contains(self.qvar):
             raise QPLCompError("The extension target qvar '" + str(qvarT) + "' does not contain the original qvar '" + str(self.qvar) + "'.")
         
+        # nothing to extend
+        if qvarT.tuple == self.qvar.tuple:
+            return IQOpt(self.qval, qvarT, self.rho_extend)
+
         dim_I = qvarT.qnum - self.qnum
+        pos = qvarT.to(self.qvar)
+        rest = [i for i in range(qvarT.qnum) if i not in pos]
 
-        # different approaches of extensions
-        if self.rho_extend:
-            opt_append = QOpt.ket0_opt(dim_I)
-        else:
-            opt_append = QOpt.eye_opt(dim_I)
-
-        temp_opt = self.qval.tensor(opt_append)
-
-        # rearrange the indices
-        count_ext = 0
-        r = []
-        for i in range(qvarT.qnum):
-            if qvarT[i] in self.qvar:
-                pos = self.qvar.index(qvarT[i])
-                r.append(pos)
+        # the projectors in basis representation are extended on the bases
+        if isinstance(self.qval, QProj):
+
+            # different approaches of extensions
+            if self.rho_extend:
+                opt_append = QOpt.ket0_opt(dim_I)
             else:
-                r.append(self.qnum + count_ext)
-                count_ext += 1
+                opt_append = QOpt.eye_opt(dim_I)
+
+            temp_opt = self.qval.tensor(opt_append)
+
+            # rearrange the indices
+            r = [0] * qvarT.qnum
+            for i, p in enumerate(pos + rest):
+                r[p] = i
+
+            opt = temp_opt.permute(r)
+            return IQOpt(opt, qvarT, self.rho_extend)
 
-        opt = temp_opt.permute(r)
-        return IQOpt(opt, qvarT, self.rho_extend)
+        # the extension is a lazy tensor product, where the identity is left implicit
+        factors : list = [(self.qval, pos)]
+        if self.rho_extend:
+            factors += [(QOpt.ket0_opt(1), (i,)) for i in rest]
+
+        return IQOpt(QKron(qvarT.qnum, factors), qvarT, self.rho_extend)
     
     def __add__(self, other : IQOpt) -> IQOpt:
         '''
@@ -145,6 +232,9 @@ class IQOpt(IQVal):
         '''
         For indexed quantum operators `self` and `other`, return the matrix multiplication result.
         Automatic cylinder extension is applied.
+
+        The extensions are lazy (see `QKron`), so that an operand on fewer qubits is applied locally on the corresponding indices of the other operand.
+
         - Parameters: `self`, `other` : `IQOpt`.
         - Returns: `IQOpt`.
         '''
@@ -343,27 +433,24 @@ class IQOpt(IQVal):
     def initwlp2(self, qvar : QVar) -> IQOpt:
         '''
         wlp.q:=0.P = \\lceil tr_q (P \\wedge P0[q]) \\rceil
-        '''
-        P0 = QOpt(np.array([[1., 0.], [0., 0.]]), None, True, True, True)
-
-        temp = self
-        for q in qvar:
-            IP0 = IQOpt(P0, QVar([q]))
-            temp = temp.conjunct(IP0).trace(QVar([q])).support()
 
-        return temp
+        All the variables of `qvar` are initialized at once, with `P0[q]` being the projector `|0...0><0...0|` on them.
+        '''
+        return self.conjunct(IQOpt._P0(qvar)).trace(qvar).support()
     
     def initwlp(self, qvar : QVar) -> IQOpt:
         '''
         wlp.q:=0.P = E1(tr_q (P P0[q]))
         E1 represents the eigenspace of eigenvalue 1.
-        '''
-        P0 = QOpt(np.array([[1., 0.], [0., 0.]]), None, True, True, True)
-
-        temp = self
-        for q in qvar:
-            IP0 = IQOpt(P0, QVar([q]))
-            temp = (temp @ IP0).trace(QVar([q])).eigen1space()
 
-        return temp
+        All the variables of `qvar` are initialized at once, with `P0[q]` being the projector `|0...0><0...0|` on them. The partial trace is a single contraction (see `QOpt.trace`).
+        '''
+        return (self @ IQOpt._P0(qvar)).trace(qvar).eigen1space()
 
+    @staticmethod
+    def _P0(qvar : QVar) -> IQOpt:
+        '''
+        Return the projector `|0...0><0...0|` on `qvar`, as the tensor product of the single-qubit ones.
+        '''
+        P0 = QOpt(np.array([[1., 0.], [0., 0.]]), None, True, True, True)
+        return IQOpt(QKron(qvar.qnum, [(P0, (i,)) for i in range(qvar.qnum)]), qvar)
@@ -27,6 +27,20 @@ class IQSOpt(IQVal):
     @property
     def qval(self) -> QSOpt:
         return self._qval
+
+    @staticmethod
+    def identity() -> IQSOpt:
+        '''
+        return the identity superoperator with zero qubits.
+        '''
+        return IQSOpt(QSOpt([QOpt(np.array([[1.]]))], True), QVar([]))
+
+    @staticmethod
+    def zero() -> IQSOpt:
+        '''
+        return the zero superoperator with zero qubits.
+        '''
+        return IQSOpt(QSOpt([QOpt(np.array([[0.]]))], True), QVar([]))
     
 
     
@@ -34,13 +48,13 @@ class IQSOpt(IQVal):
         if not qvarT.contains(self.qvar):
             raise QPLCompError("The extension target qvar '" + str(qvarT) + "' does not contain the original qvar '" + str(self.qvar) + "'.")
         
-        # extend every Kraus operator
+        # nothing to extend
+        if qvarT.tuple == self.qvar.tuple:
+            return IQSOpt(self._qval, qvarT)
 
-        new_Kraus = [IQOpt(E, self.qvar).extend(qvarT).qval for E in self._qval.Kraus]
-
-        new_QSO = QSOpt(new_Kraus)
-        if self._qval.qo:
-            new_QSO.assert_qo()
+        # the stack of Kraus operators is extended at once, and the extension keeps them the fewest
+        new_Kraus = linalgPP.kraus_extend(self._qval.stack, qvarT.to(self.qvar), qvarT.qnum)
+        new_QSO = QSOpt(new_Kraus, self._qval.qo, self._qval.compressed)
 
         return IQSOpt(new_QSO, qvarT)
     
@@ -62,11 +76,10 @@ class IQSOpt(IQVal):
         # the common qvar
         qvar_all = self.qvar + iopt.qvar
 
-        # cylinder extension
-        self_ext = self.extend(qvar_all)
+        # the superoperator acts on its qubits of the extended operator, and is not extended
         other_ext = iopt.extend(qvar_all)
 
-        return IQOpt(self_ext.qval.apply(other_ext.qval), qvar_all)
+        return IQOpt(self.qval.apply(other_ext.qval, qvar_all.to(self.qvar)), qvar_all)
     
     def __add__(self, other : IQSOpt) -> IQSOpt:
         '''
@@ -89,6 +102,41 @@ class IQSOpt(IQVal):
         return IQSOpt(self_ext.qval + other_ext.qval, qvar_all)
 
 
+    def __matmul__(self, other : IQSOpt) -> IQSOpt:
+        '''
+        For indexed quantum superoperators `self` and `other`, return the composition `self ∘ other`, which applies `other` first.
+        Automatic cylinder extension is applied.
+        - Parameters: `self`, `other` : `IQSOpt`.
+        - Returns: `IQSOpt`.
+        '''
+        assert isinstance(other, IQSOpt), "ASSERTION FAILED"
+
+        # the common qvar
+        qvar_all = self.qvar + other.qvar
+
+        # cylinder extension
+        self_ext = self.extend(qvar_all)
+        other_ext = other.extend(qvar_all)
+
+        return IQSOpt(self_ext.qval @ other_ext.qval, qvar_all)
+
+    def scale(self, c : float) -> IQSOpt:
+        '''
+        Calculate and return the scaling of `c * self`, for `c >= 0`.
+        '''
+        return IQSOpt(self.qval * c, self.qvar)
+
+    def __mul__(self, other : float) -> IQSOpt:
+        return self.scale(other)
+    def __rmul__(self, other : float) -> IQSOpt:
+        return self.scale(other)
+
+    def compress(self) -> IQSOpt:
+        '''
+        Return the equal indexed superoperator with the fewest Kraus operators.
+        '''
+        return IQSOpt(self.qval.compress(), self.qvar)
+
     def dagger(self) -> IQSOpt:
         '''
         Return the conjugate transpose of `self`.
@@ -0,0 +1,458 @@
+from __future__ import annotations
+from typing import Sequence
+
+from ..error import QPLCompError
+
+import numpy as np
+from .. import linalgPP
+
+from .val import QVal
+from .qopt import QOpt
+from .qproj import QProj
+from .cache import lattice_cached, digest
+
+Factors = list[tuple[QOpt, tuple[int, ...]]]
+
+class QKron(QOpt):
+    '''
+    The class to represent quantum operators as tensor products of factors. It is the lazy representation of `QOpt` instances with product structures, such as `P[q0 q1] ⊗ Q[t]` or the cylinder extensions.
+
+    A `QKron` instance keeps a list of `(factor, qubits)` pairs, where `factor` is a `QOpt` instance and `qubits` are the positions it acts on. The positions of different factors are disjoint. The identity acts on the positions not covered by any factor.
+
+    Multiplication, dagger, trace, permutation, scaling, equality, conjunction and Loewner order are calculated block by block. A block is a group of factors of the two operands connected by overlapping positions, and only the factors in the same block are fused. The matrix and tensor representations are only materialized on demand.
+
+    Note: inplace operations are not allowed. Therefore the QKron here are literal values.
+    '''
+    def __init__(self, qnum : int, factors : Sequence[tuple[QOpt, Sequence[int]]]):
+        '''
+        Construct a QKron instance with the given factors.
+
+        Parameters
+            - qnum : int, the qubit number of the operator.
+            - factors : Sequence[tuple[QOpt, Sequence[int]]], the factors and the positions they act on. The factors which are `QKron` instances are flattened.
+        '''
+        self._qnum = qnum
+        self._factors : Factors = []
+
+        covered : set[int] = set()
+        for opt, qubits in factors:
+            qubits = tuple(qubits)
+            if opt.qnum != len(qubits):
+                raise QPLCompError(f"The factor of {opt.qnum} qubits does not match the positions {qubits}.")
+
+            for i in qubits:
+                if i < 0 or i >= qnum or i in covered:
+                    raise QPLCompError(f"The positions {qubits} of the factor are not valid.")
+                covered.add(i)
+
+            if isinstance(opt, QKron):
+                self._factors += [(f, tuple(qubits[p] for p in pos)) for f, pos in opt._factors]
+            else:
+                self._factors.append((opt, qubits))
+
+        # the representations are materialized on demand
+        self._tensor_repr : np.ndarray | None = None    # type: ignore
+        self._matrix_repr : np.ndarray | None = None    # type: ignore
+
+        # the properties known for all factors hold for the product
+        opts = [opt for opt, _ in self._factors]
+        self._unitary : None | bool = True if all(opt._unitary == True for opt in opts) else None
+        self._effect : None | bool = True if all(opt._effect == True for opt in opts) else None
+        self._projector : None | bool = True if all(opt._projector == True for opt in opts) else None
+        # the identity is not a partial density operator
+        self._pdo : None | bool = True if len(covered) == qnum and all(opt._pdo == True for opt in opts) else None
+
+        self._fingerprint : None | tuple = None
+        self._hash : None | int = None
+
+    @staticmethod
+    def of(opt : QOpt) -> QKron:
+        '''
+        Return the `QKron` representation of `opt`, with `opt` itself as the only factor if it is not a `QKron` instance.
+        '''
+        if isinstance(opt, QKron):
+            return opt
+        return QKron(opt.qnum, [(opt, range(opt.qnum))])
+
+    @staticmethod
+    def _simplify(qnum : int, factors : Factors) -> QOpt:
+        '''
+        Return the product of the factors, and avoid the wrapping if there is only one factor on all positions in order.
+        '''
+        if len(factors) == 1 and factors[0][1] == tuple(range(qnum)):
+            return factors[0][0]
+        return QKron(qnum, factors)
+
+    @property
+    def factors(self) -> Factors:
+        return self._factors
+
+    @property
+    def m_repr(self) -> np.ndarray:
+        '''
+        Return the matrix representation of this operator. It is materialized at the first call.
+        '''
+        if self._matrix_repr is None:
+            self._matrix_repr = self.t_repr.reshape((2**self._qnum,)*2)
+        return self._matrix_repr
+
+    @property
+    def t_repr(self) -> np.ndarray:
+        '''
+        Return the tensor representation of this operator. It is materialized at the first call.
+        '''
+        if self._tensor_repr is None:
+            self._tensor_repr = QOpt._frozen(QKron._fuse(self._factors, range(self._qnum)))
+        return self._tensor_repr
+
+    def _digest(self) -> bytes:
+        '''
+        The digest of the factors and their positions, so that the operator is not materialized. A single factor on all positions in order shares the digest of the factor.
+        '''
+        if len(self._factors) == 1 and self._factors[0][1] == tuple(range(self._qnum)):
+            return self._factors[0][0].fingerprint[2]
+        return digest('kron', sorted((qubits, opt.fingerprint) for opt, qubits in self._factors))
+
+    @property
+    def is_unitary(self) -> bool:
+        if self._unitary is None and all(opt.is_unitary for opt, _ in self._factors):
+            self._unitary = True
+        return super().is_unitary
+
+    @property
+    def is_effect(self) -> bool:
+        if self._effect is None and all(opt.is_effect for opt, _ in self._factors):
+            self._effect = True
+        return super().is_effect
+
+    @property
+    def is_projector(self) -> bool:
+        if self._projector is None and all(opt.is_projector for opt, _ in self._factors):
+            self._projector = True
+        return super().is_projector
+
+    def _is_Hermitian(self) -> bool:
+        '''
+        Check whether this operator is Hermitian, factor by factor if possible.
+        '''
+        if self.hermitian_tag:
+            return True
+        if all(opt.hermitian_tag or linalgPP.is_Hermitian(opt.m_repr, QVal.prec) for opt, _ in self._factors):
+            return True
+        return linalgPP.is_Hermitian(self.m_repr, QVal.prec)
+
+    ################################################
+    # Factor Manipulation
+    ################################################
+
+    @staticmethod
+    def _fuse(factors : Sequence[tuple[QOpt, tuple[int, ...]]], qubits : Sequence[int]) -> np.ndarray:
+        '''
+        Return the tensor representation of the product of `factors` on the positions `qubits` (in this order). The identity acts on the positions of `qubits` not covered by the factors.
+        '''
+        def tensor(A : np.ndarray, B : np.ndarray) -> np.ndarray:
+            a, b = len(A.shape) // 2, len(B.shape) // 2
+            res = np.tensordot(A, B, ([], []))
+            return res.transpose(list(range(a)) + list(range(2*a, 2*a + b))\
+                                 + list(range(a, 2*a)) + list(range(2*a + b, 2*(a + b))))
+
+        qubits = list(qubits)
+
+        if len(factors) == 1:
+            res, order = factors[0][0].t_repr, list(factors[0][1])
+        else:
+            res, order = np.ones(()), []
+            for opt, pos in factors:
+                res = tensor(res, opt.t_repr)
+                order += list(pos)
+
+        rest = [i for i in qubits if i not in order]
+        if len(rest) > 0:
+            res = tensor(res, np.eye(2**len(rest)).reshape((2,)*len(rest)*2))
+            order += rest
+
+        perm = [order.index(i) for i in qubits]
+        if perm == list(range(len(qubits))):
+            return res
+        return res.transpose(perm + [len(qubits) + i for i in perm])
+
+    @staticmethod
+    def _blocks(fa : Factors, fb : Factors) -> list[tuple[Factors, Factors]]:
+        '''
+        Group the factors of two operators into blocks. Two factors are in the same block if they are connected by overlapping positions.
+
+        Returns: list[tuple[Factors, Factors]], the factors of both operators in each block.
+        '''
+        parent = list(range(len(fa) + len(fb)))
+        def find(i : int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        owner = {p : i for i, (_, pos) in enumerate(fa) for p in pos}
+        for j, (_, pos) in enumerate(fb):
+            for p in pos:
+                if p in owner:
+                    parent[find(len(fa) + j)] = find(owner[p])
+
+        blocks : dict[int, tuple[Factors, Factors]] = {}
+        for i, f in enumerate(fa):
+            blocks.setdefault(find(i), ([], []))[0].append(f)
+        for j, f in enumerate(fb):
+            blocks.setdefault(find(len(fa) + j), ([], []))[1].append(f)
+
+        return list(blocks.values())
+
+    @staticmethod
+    def _block_qubits(A : Factors, B : Factors) -> list[int]:
+        return sorted(set(p for _, pos in A + B for p in pos))
+
+    @staticmethod
+    def _scalar(c : complex | float) -> QOpt:
+        return QOpt(np.array([[c]]))
+
+    ################################################
+    # Methods of QKron
+    ################################################
+
+    def dagger(self) -> QKron:
+        return QKron(self._qnum, [(opt.dagger(), pos) for opt, pos in self._factors])
+
+    def scale(self, c : complex | float) -> QKron:
+        '''
+        Calculate and return the scaling of `c * self'. Only the first factor is scaled.
+        '''
+        factors = list(self._factors)
+        if len(factors) == 0:
+            factors.append((QKron._scalar(c), ()))
+        else:
+            factors[0] = (factors[0][0].scale(c), factors[0][1])
+        return QKron(self._qnum, factors)
+
+    def neg(self) -> QKron:
+        return self.scale(-1.)
+
+    def tensor(self, other : QOpt) -> QKron:
+        '''
+        Calculate and return the tensor product of operators self and other, by concatenating the factors.
+        '''
+        assert isinstance(other, QOpt), "ASSERTION FAILED"
+
+        return QKron(self._qnum + other.qnum,
+                     self._factors + [(other, range(self._qnum, self._qnum + other.qnum))])
+
+    def permute(self, perm : Sequence[int]) -> QKron:
+        '''
+        Permute the order of qubits, by relocating the factors.
+        '''
+        QOpt._check_permutation(perm, self.qnum)
+
+        new_pos = [0] * self._qnum
+        for i, p in enumerate(perm):
+            new_pos[p] = i
+
+        return QKron(self._qnum, [(opt, tuple(new_pos[p] for p in pos)) for opt, pos in self._factors])
+
+    def mul(self, other : QOpt) -> QOpt:
+        '''
+        Calculate and return the multiplication of self @ other.
+
+        The factors in different blocks are multiplied independently. In a block, the side with the largest factor is materialized, and the factors of the other side are applied locally on it (see `linalgPP.t_apply_left`).
+        '''
+        assert isinstance(other, QOpt), "ASSERTION FAILED"
+
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
+
+        factors : Factors = []
+        for A, B in QKron._blocks(self._factors, QKron.of(other)._factors):
+            if len(A) == 0 or len(B) == 0:
+                factors += A + B
+                continue
+
+            qubits = QKron._block_qubits(A, B)
+
+            if max(opt.qnum for opt, _ in A) > max(opt.qnum for opt, _ in B):
+                res = QKron._fuse(A, qubits)
+                for opt, pos in B:
+                    res = linalgPP.t_apply_right(res, opt.t_repr, [qubits.index(p) for p in pos])
+            else:
+                res = QKron._fuse(B, qubits)
+                for opt, pos in A:
+                    res = linalgPP.t_apply_left(opt.t_repr, res, [qubits.index(p) for p in pos])
+
+            res_opt = QOpt(res)
+            if all(opt._unitary == True for opt, _ in A + B):
+                res_opt.assert_unitary()
+            factors.append((res_opt, tuple(qubits)))
+
+        return QKron._simplify(self._qnum, factors)
+
+    def __add__(self, other : QOpt) -> QOpt:
+        '''
+        Calculate and return the addition result of self and other.
+
+        The operand with more positions covered is materialized, and the factors of the other operand are added on their positions (see `linalgPP.t_add_local`).
+        '''
+        assert isinstance(other, QOpt), "ASSERTION FAILED"
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
+
+        a, b = self, QKron.of(other)
+        qubits_a = QKron._block_qubits(a._factors, [])
+        qubits_b = QKron._block_qubits(b._factors, [])
+        if len(qubits_a) > len(qubits_b):
+            a, b, qubits_a = b, a, qubits_b
+
+        return QOpt(linalgPP.t_add_local(b.t_repr, QKron._fuse(a._factors, qubits_a), qubits_a))
+
+    def trace(self, qls : Sequence[int]) -> QOpt:
+        '''
+        Trace out the qubits indicated in `qls`, factor by factor.
+        '''
+        traced = set(qls)
+        kept = [i for i in range(self._qnum) if i not in traced]
+        new_pos = {p : i for i, p in enumerate(kept)}
+
+        c = 1.
+        factors : Factors = []
+        covered : set[int] = set()
+        for opt, pos in self._factors:
+            covered.update(pos)
+            local = [i for i, p in enumerate(pos) if p in traced]
+            remain = tuple(new_pos[p] for p in pos if p not in traced)
+
+            if len(local) == len(pos):
+                c *= np.trace(opt.m_repr)
+            elif len(local) > 0:
+                factors.append((opt.trace(local), remain))
+            else:
+                factors.append((opt, remain))
+
+        # the trace of the identity on the uncovered qubits
+        c *= 2**len(traced - covered)
+
+        res = QKron(len(kept), factors)
+        if c != 1.:
+            res = res.scale(c)
+
+        if self._pdo == True:
+            res._pdo = True
+
+        return res
+
+    def __eq__(self, other) -> bool:
+        '''
+        Decide the equality block by block.
+
+        Two products of nonzero blocks are equal only if the corresponding blocks are proportional, and the product of the ratios is `1`.
+        '''
+        if not isinstance(other, QOpt):
+            return False
+
+        if self.qnum != other.qnum:
+            return False
+
+        blocks = []
+        all_equal = True
+        for A, B in QKron._blocks(self._factors, QKron.of(other)._factors):
+            qubits = QKron._block_qubits(A, B)
+            X, Y = QKron._fuse(A, qubits), QKron._fuse(B, qubits)
+            blocks.append((X, Y))
+            all_equal = all_equal and linalgPP.close_equal(X, Y, QVal.prec)
+
+        if all_equal:
+            return True
+
+        norm_X = np.prod([np.max(np.abs(X)) for X, _ in blocks])
+        norm_Y = np.prod([np.max(np.abs(Y)) for _, Y in blocks])
+        if norm_X < QVal.prec or norm_Y < QVal.prec:
+            return max(norm_X, norm_Y) < QVal.prec
+
+        ratio = 1.
+        for X, Y in blocks:
+            c = np.vdot(Y, X) / np.vdot(Y, Y)
+            error = np.max(np.abs(X - c * Y)) * norm_X / np.max(np.abs(X))
+            if error >= QVal.prec:
+                return False
+            ratio *= c
+
+        return abs(ratio - 1.) * norm_Y < QVal.prec
+
+    def __hash__(self) -> int:
+        '''
+        The hash of the factors and their positions, calculated once, so that the operator is not materialized. The identity factors are left out and the factors are sorted by their positions. The factors are hashed as in `QOpt.__hash__`, and a single factor on all positions in order shares the hash of the factor.
+
+        Equal operators with different product structures (for example a `QKron` of two factors and its materialized `QOpt`) have different hashes, and a lookup of one by the other misses.
+        '''
+        if self._hash is None:
+            factors = sorted(((qubits, opt) for opt, qubits in self._factors
+                              if not linalgPP.close_equal(opt.m_repr, np.eye(2**opt.qnum), QOpt.HASH_GRID)),
+                             key = lambda f: f[0])
+
+            if len(factors) == 1 and factors[0][0] == tuple(range(self._qnum)):
+                self._hash = hash(factors[0][1])
+            else:
+                self._hash = hash(('kron', self._qnum, tuple((qubits, hash(opt)) for qubits, opt in factors)))
+        return self._hash
+
+    @lattice_cached('Loewner_le')
+    def Loewner_le(self, other : QOpt) -> bool:
+        '''
+        Decide whether the two operator self and other follow the Loewner order self <= other.
+
+        For projectors, `P1 ⊗ P2 <= Q1 ⊗ Q2` if and only if `P1 <= Q1` and `P2 <= Q2`, or `P1 ⊗ P2 = 0`, which is decided block by block. For other operators the difference is calculated as in `QKron.__add__`.
+        '''
+        assert isinstance(other, QOpt), "ASSERTION FAILED"
+
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
+
+        if self._projector == True and other._projector == True:
+            res = True
+            for A, B in QKron._blocks(self._factors, QKron.of(other)._factors):
+                qubits = QKron._block_qubits(A, B)
+                P = QOpt(QKron._fuse(A, qubits), is_projector=True)
+                if linalgPP.close_zero(P.t_repr, QVal.prec):
+                    return True
+                res = res and P <= QOpt(QKron._fuse(B, qubits), is_projector=True)
+            return res
+
+        other = QKron.of(other)
+        if not self._is_Hermitian() or not other._is_Hermitian():
+            raise QPLCompError("The operator is not Hermitian and cannot compare Loewner order.")
+
+        return linalgPP.Loewner_nonneg((other - self).m_repr, QVal.prec)
+
+    @lattice_cached('conjunct', symmetric=True)
+    def conjunct(self, other : QOpt) -> QOpt:
+        '''
+        Calculate and return the conjunction of subspaces represented by projectors self and other.
+
+        The conjunction of `P1 ⊗ P2` and `Q1 ⊗ Q2` is `(P1 & Q1) ⊗ (P2 & Q2)`. It is calculated factor by factor if the factors of both operands line up, namely every block consists of at most one factor from each side on the same positions. Otherwise it is calculated on the bases, see `QProj`.
+        '''
+        assert isinstance(other, QOpt), "ASSERTION FAILED"
+
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
+
+        if not self.is_projector or not other.is_projector:
+            raise QPLCompError("The two QOpt are not both projectors.")
+
+        blocks = QKron._blocks(self._factors, QKron.of(other)._factors)
+
+        for A, B in blocks:
+            if len(A) > 1 or len(B) > 1 or (len(A) == 1 and len(B) == 1 and set(A[0][1]) != set(B[0][1])):
+                return QProj.from_qopt(self).conjunct(other)
+
+        factors : Factors = []
+        for A, B in blocks:
+            if len(A) == 0 or len(B) == 0:
+                factors += A + B
+                continue
+
+            (P, pos), (Q, pos_Q) = A[0], B[0]
+            factors.append((P & Q.permute([pos_Q.index(p) for p in pos]), pos))
+
+        return QKron(self._qnum, factors)
@@ -8,13 +8,20 @@ import numpy as np
 from .. import linalgPP
 
 from .val import QVal
+from .cache import lattice_cached
 
 class QOpt(QVal):
     '''
     The class to represent quantum operators. They are matrices without quantum variable indices.
 
-    Note: inplace operations are not allowed. Therefore the QOpt here are literal values.
+    Note: inplace operations are not allowed. Therefore the QOpt here are literal values. The representations are read-only views of the data, which should not be modified after construction.
+
+    The values are hashable, but the equality is up to the precision `QVal.prec` and the hash is not: equal values have different hashes in rare cases (see `QOpt.__hash__`). The `fingerprint` is quantized on a grid as well, so a lookup keyed by it can also miss.
     '''
+
+    # the spacing of the grid which the hash is quantized on, fixed so that the hash does not change with `QVal.prec`
+    HASH_GRID : float = 1e-5
+
     def __init__(self, data : np.ndarray,
                  is_unitary : None | bool = None,
                  is_effect : None | bool = None,
@@ -54,6 +61,8 @@ class QOpt(QVal):
         # the qubit number
         self._qnum : int
 
+        data = QOpt._frozen(data)
+
         # if the parameter data is matrix representation
         if len(data.shape) == 2:
 
@@ -93,6 +102,18 @@ class QOpt(QVal):
         self._pdo : None | bool = is_pdo
         self._projector : None | bool = is_projector
 
+        # the content fingerprint and the hash, calculated on demand
+        self._fingerprint : None | tuple = None
+        self._hash : None | int = None
+
+    @staticmethod
+    def _frozen(data : np.ndarray) -> np.ndarray:
+        '''
+        Return a read-only view of `data`.
+        '''
+        data = np.asarray(data).view()
+        data.flags.writeable = False
+        return data
 
     @property
     def t_repr(self) -> np.ndarray:
@@ -120,9 +141,52 @@ class QOpt(QVal):
         
         return linalgPP.close_equal(self.m_repr, other.m_repr, QVal.prec)
 
+    def __hash__(self) -> int:
+        '''
+        The hash of the matrix representation quantized on the grid of spacing `HASH_GRID`, calculated once.
+
+        The equality up to `QVal.prec` is not transitive, so no hash agrees with it exactly. The grid is much coarser than `QVal.prec`, and two equal values are quantized differently only if some entry lies within `QVal.prec` of a grid line. Then a lookup of the value in a dictionary or set misses, and it is a cache miss or a duplicate entry, but two values which are not equal are never confused, because the lookups confirm the keys by `__eq__`. The `fingerprint` has the same limitation on its finer grid.
+        '''
+        if self._hash is None:
+            self._hash = hash((self.qnum, QOpt._hash_digest(self._content())))
+        return self._hash
+
+    def __getstate__(self) -> dict:
+        # the hash is calculated again after unpickling, because byte string hashes differ among processes
+        state = self.__dict__.copy()
+        state['_hash'] = None
+        return state
+
+    @staticmethod
+    def _hash_digest(M : np.ndarray) -> bytes:
+        return linalgPP.fingerprint(M, QOpt.HASH_GRID)
+
     @property
     def qnum(self) -> int:
         return self._qnum
+
+    @property
+    def fingerprint(self) -> tuple:
+        '''
+        The fingerprint of this operator, in the form `(precision, qnum, digest)`. Operators with the same fingerprint are equal up to the precision `QVal.prec` (the projectors in basis representation are fingerprinted by random probes, and are confused with a negligible probability, see `QProj._digest`), but equal operators with entries across a grid line have different fingerprints. It is used as the key of the lattice operation cache (see `LatticeCache`).
+
+        It is calculated once for the current precision.
+        '''
+        if self._fingerprint is None or self._fingerprint[0] != QVal.prec:
+            self._fingerprint = (QVal.prec, self.qnum, self._digest())
+        return self._fingerprint
+
+    def _content(self) -> np.ndarray:
+        '''
+        The matrix which the fingerprint and the hash are calculated on.
+        '''
+        return self.m_repr
+
+    def _digest(self) -> bytes:
+        '''
+        The digest of the quantized matrix representation.
+        '''
+        return linalgPP.fingerprint(self._content(), QVal.prec)
     
     @property
     def unitary_tag(self) -> None | bool:
@@ -158,6 +222,13 @@ class QOpt(QVal):
     def assert_pdo(self) -> None:
         self._pdo = True
 
+    @property
+    def hermitian_tag(self) -> bool:
+        '''
+        Whether this operator is known to be Hermitian from the verified properties.
+        '''
+        return self._effect == True or self._pdo == True or self._projector == True
+
     @property
     def projector_tag(self) -> None | bool:
         return self._projector
@@ -178,15 +249,8 @@ class QOpt(QVal):
         Parameters: qubitn : int, the qubit number.
         Returns: QOpt, the identity QOpt.
         '''
-        m_repr = np.eye(2**qubitn)
-        res = QOpt(m_repr)
-
-        res._unitary = True
-        res._effect = True
-        res._pdo = None
-        res._projector = True
-
-        return res
+        # the identity is the complement of the zero space
+        return QProj(np.zeros((2**qubitn, 0)), complemented=True, is_unitary=True)
 
     @staticmethod
     def ket0_opt(qubitn : int) -> QOpt:
@@ -196,14 +260,10 @@ class QOpt(QVal):
         Parameters: qubitn : int, the qubit number.
         Returns: QOpt, the ket0 QOpt.
         '''
-        m_repr = np.zeros((2**qubitn, 2**qubitn))
-        m_repr[0][0] = 1.
-        res = QOpt(m_repr)
-
-        res._unitary = False
-        res._effect = True
+        basis = np.zeros((2**qubitn, 1))
+        basis[0][0] = 1.
+        res = QProj(basis, is_unitary=False)
         res._pdo = True
-        res._projector = True
 
         return res
 
@@ -216,13 +276,8 @@ class QOpt(QVal):
         Parameters: qubitn : int, the qubit number.
         Returns: QOpt, the zero QOpt.
         '''
-        m_repr = np.zeros((2**qubitn, 2**qubitn))
-        res = QOpt(m_repr)
-
-        res._unitary = False
-        res._effect = True
+        res = QProj(np.zeros((2**qubitn, 0)), is_unitary=False)
         res._pdo = True
-        res._projector = True
 
         return res
     
@@ -244,6 +299,9 @@ class QOpt(QVal):
         if self.qnum != other.qnum:
             raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
         
+        if isinstance(other, QKron):
+            return QKron.of(self) + other
+
         return QOpt(self.t_repr + other.t_repr)
         
     def neg(self) -> QOpt:
@@ -304,6 +362,9 @@ class QOpt(QVal):
         if self.qnum != other.qnum:
             raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
         
+        if isinstance(other, QKron):
+            return QKron.of(self).mul(other)
+
         res = QOpt(self.m_repr @ other.m_repr)
         
         if self._unitary == True and other._unitary == True:
@@ -343,43 +404,21 @@ class QOpt(QVal):
     def tensor(self, other : QOpt) -> QOpt:
         '''
         Calculate and return the tensor product of operators self and other.
+
+        The result is a `QKron` instance keeping self and other as factors, which is only materialized on demand.
         '''
 
         assert isinstance(other, QOpt), "ASSERTION FAILED"
 
-        new_t_repr = np.tensordot(self.t_repr, other.t_repr, ([], []))
-
-        # adjust the index sequence
-        r = list(range(0, self.qnum))\
-            + list(range(self.qnum*2, self.qnum*2 + other.qnum))\
-            + list(range(self.qnum, self.qnum*2))\
-            + list(range(self.qnum*2 + other.qnum, (self.qnum + other.qnum)*2))
-        
-        new_t_repr = new_t_repr.transpose(r)
-
-        res = QOpt(new_t_repr)
-
-        if self._unitary == True and other._unitary == True:
-            res._unitary = True
-
-        if self._effect == True and other._effect == True:
-            res._effect = True
-
-        if self._pdo == True and other._pdo == True:
-            res._pdo = True
-
-        if self._projector == True and other._projector == True:
-            res._projector = True
-
-        return res
+        return QKron(self.qnum + other.qnum,
+                     [(self, range(self.qnum)), (other, range(self.qnum, self.qnum + other.qnum))])
     
-    def permute(self, perm : Sequence[int]) -> QOpt:
+    @staticmethod
+    def _check_permutation(perm : Sequence[int], qnum : int) -> None:
         '''
-        Permute the order of qubits.
+        Check the validity of the permutation on `qnum` qubits.
         '''
-
-        # check the validity of the permutation
-        if len(perm) != self.qnum:
+        if len(perm) != qnum:
             raise QPLCompError(f"The permutation {perm} provided is not valid.")
         appearance = [False] * len(perm)
         for item in perm:
@@ -389,7 +428,14 @@ class QOpt(QVal):
         for pos in appearance:
             if not pos:
                 raise QPLCompError(f"The permutation {perm} provided is not valid.")
-        
+
+    def permute(self, perm : Sequence[int]) -> QOpt:
+        '''
+        Permute the order of qubits.
+        '''
+
+        QOpt._check_permutation(perm, self.qnum)
+
 
         t_repr_perm = list(perm) + [i + self.qnum for i in perm]
         new_t_repr = self.t_repr.transpose(t_repr_perm)
@@ -402,6 +448,7 @@ class QOpt(QVal):
     
 
     
+    @lattice_cached('Loewner_le')
     def Loewner_le(self, other : QOpt) -> bool:
         '''
         Decide whether the two operator self and other follow the Loewner order self <= other. The comparison between eigenvalues are conducted with respected to the given precision.
@@ -415,10 +462,19 @@ class QOpt(QVal):
         if self.qnum != other.qnum:
             raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
         
+        if isinstance(other, QKron):
+            return QKron.of(self).Loewner_le(other)
+
+        # the cheapest sound test is chosen according to the known properties
+        if self._projector == True and other._projector == True:
+            if isinstance(other, QProj):
+                return other._contains(self)
+            return linalgPP.projector_le(self.m_repr, other.m_repr, QVal.prec)
+
         # TODO #3
-        if not linalgPP.is_Hermitian(self.m_repr, QVal.prec):
+        if not self.hermitian_tag and not linalgPP.is_Hermitian(self.m_repr, QVal.prec):
             raise QPLCompError("The operator is not Hermitian and cannot compare Loewner order.")
-        if not linalgPP.is_Hermitian(other.m_repr, QVal.prec):
+        if not other.hermitian_tag and not linalgPP.is_Hermitian(other.m_repr, QVal.prec):
             raise QPLCompError("The operator is not Hermitian and cannot compare Loewner order.")
         
         return linalgPP.Loewner_le(self.m_repr, other.m_repr, self.prec)
@@ -426,6 +482,7 @@ class QOpt(QVal):
     def __le__(self, other : QOpt) -> bool:
         return self.Loewner_le(other)
 
+    @lattice_cached('disjunct', symmetric=True)
     def disjunct(self, other : QOpt) -> QOpt:
         '''
         Calculate and return the disjunction of subspaces represented by projectors self and other.
@@ -435,6 +492,8 @@ class QOpt(QVal):
         Errors: 
             - ValueError when self and other differ in their qubit numbers.
             - ValueError when self or other is not a projector.
+
+        Note: the calculation is carried out on the orthonormal bases of the subspaces. See `QProj`.
         '''
         assert isinstance(other, QOpt), "ASSERTION FAILED"
 
@@ -444,25 +503,12 @@ class QOpt(QVal):
         if not self.is_projector or not other.is_projector:
             raise QPLCompError("The two QOpt are not both projectors.")
         
-        # only preserve the 1-eigenvalue vectors
-        stacked = np.hstack(
-            (linalgPP.row_space(self.m_repr, QVal.prec), 
-             linalgPP.row_space(other.m_repr, QVal.prec)))
-        
-        new_m_repr : np.ndarray
-        # check whether it is zero projector
-        if stacked.shape[1] == 0:
-            new_m_repr = (np.zeros_like(self.m_repr))
-        else:
-            # orthonormalization
-            ortho = linalgPP.column_space(stacked, QVal.prec)
-            new_m_repr = ortho @ ortho.transpose().conj()
-
-        return QOpt(new_m_repr, is_unitary=None, is_effect=True, is_projector=True)
+        return QProj.from_qopt(self).disjunct(other)
     
     def __or__(self, other : QOpt) -> QOpt:
         return self.disjunct(other)
     
+    @lattice_cached('conjunct', symmetric=True)
     def conjunct(self, other : QOpt) -> QOpt:
         '''
         Calculate and return the conjunction of subspaces represented by projectors self and other.
@@ -476,20 +522,17 @@ class QOpt(QVal):
         ================================================================
         About the algorithm: 
 
-        Step 1. Calculate the space of P and Q, get the matrices of orthonormal basis spaceP an spaceQ.
-        
-        Step 2. The vectors x in the conjunction satisfies both
+        Step 1. Calculate the orthonormal bases spaceP and spaceQ of P and Q.
         
-                exists a, spaceP @ a = x,
-                exists b, spaceQ @ b = x.
+        Step 2. The vector spaceQ @ b is in the conjunction if and only if its component outside P is zero:
 
-            Therefore we need to find the spaces of a and b satisfying 
+                (I - spaceP @ spaceP^dagger) @ spaceQ @ b = 0.
 
-                spaceP @ a = spaceQ @ b.
+            Therefore we need to find the right-null space of the matrix (I - spaceP @ spaceP^dagger) @ spaceQ.
 
-            Therefore we need to find the right-null space of the stacked matrix [spaceP | spaceQ].
+        Step 3. Transform the null space to the conjunction space by applying spaceQ.
 
-        Step 3. Take out the corresponding space of a from the null space, and transform it to the conjunction space by applying spaceP.    
+        See `linalgPP.basis_meet` and `QProj`.
         ================================================================
         '''
         assert isinstance(other, QOpt), "ASSERTION FAILED"
@@ -500,35 +543,15 @@ class QOpt(QVal):
         if not self.is_projector or not other.is_projector:
             raise QPLCompError("The two QOpt are not both projectors.")
         
-        spaceP = linalgPP.column_space(self.m_repr, QVal.prec)
-        spaceQ = linalgPP.column_space(other.m_repr, QVal.prec)
-
-        dimP = spaceP.shape[1]
-
-        # only preserve the 1-eigenvalue vectors
-        stacked = np.hstack((spaceP, spaceQ))
-
-        # calculate the right zero space of the stacked matrix [spaceP | spaceQ]
-        rnspace = linalgPP.right_null_space(stacked, QVal.prec)
+        if isinstance(other, QKron):
+            return QKron.of(self).conjunct(other)
 
-
-        new_m_repr : np.ndarray
-        # check whether it is zero projector
-        if rnspace.shape[1] == 0:
-            new_m_repr = np.zeros_like(self.m_repr)
-        else:
-            # get a set of vectors for the conjunction space
-            conjunct_space = spaceP @ rnspace[:dimP]
-
-            # orthonormalization
-            ortho = linalgPP.column_space(conjunct_space, QVal.prec)
-            new_m_repr = ortho @ ortho.transpose().conj()
-
-        return QOpt(new_m_repr, is_unitary=None, is_effect=True, is_projector=True)
+        return QProj.from_qopt(self).conjunct(other)
 
     def __and__(self, other : QOpt) -> QOpt:
         return self.conjunct(other)
     
+    @lattice_cached('complement')
     def complement(self) -> QOpt:
         '''
         Calculate and return the orthogonal complement of the subspace represented by `self`.
@@ -542,7 +565,11 @@ class QOpt(QVal):
         if not self.is_projector:
             raise QPLCompError("The QOpt instance is not a projector.")
         
-        return QOpt.eye_opt(self.qnum) - self
+        res = QOpt.eye_opt(self.qnum) - self
+        res._effect = True
+        res._projector = True
+
+        return res
     
     def __invert__(self) -> QOpt:
         return self.complement()
@@ -567,27 +594,22 @@ class QOpt(QVal):
         '''
         return self & (~ other)
     
+    @lattice_cached('support')
     def support(self) -> QOpt:
         '''
         Return the support of `self`.
         Parameters: `self` : `QOpt`, should be Hermitian (not checked here).
-        Returns: `QOpt`, a projector.
+        Returns: `QOpt`, a projector. It is a `QProj` instance carrying the basis and rank of the support, so that subsequent lattice operations need not decompose it again.
         '''
-        return QOpt(linalgPP.support(self.m_repr, QVal.prec),
-                   is_unitary=None,
-                   is_effect=True,
-                   is_pdo=None,
-                   is_projector=True)
+        return QProj(linalgPP.support_basis(self.m_repr, QVal.prec))
 
+    @lattice_cached('eigen1space')
     def eigen1space(self) -> QOpt:
         '''
         Return the eigenspace of `self` with eigenvalue 1. 
+        The result is a `QProj` instance carrying the basis and rank of the eigenspace.
         '''
-        return QOpt(linalgPP.eigen1space(self.m_repr, QVal.prec),
-                    is_unitary=None,
-                   is_effect=True,
-                   is_pdo=None,
-                   is_projector=True)
+        return QProj(linalgPP.eigen1space_basis(self.m_repr, QVal.prec))
 
 
 
@@ -595,16 +617,17 @@ class QOpt(QVal):
     def trace(self, qls : Sequence[int]) -> QOpt:
         '''
         Trace out the qubits indicated in `qls`.
-        '''
 
-        sorted_qls = sorted(qls, reverse=True)
+        All the qubits are traced out in a single contraction, where the row and column indices of a traced qubit share the same label.
+        '''
 
-        temp = self.t_repr
+        traced = set(qls)
+        n = self.qnum
 
-        for i in sorted_qls:
-            temp = temp.trace(axis1=i, axis2=i + len(temp.shape)//2)
+        in_labels = list(range(n)) + [i if i in traced else n + i for i in range(n)]
+        out_labels = [i for i in range(n) if i not in traced] + [n + i for i in range(n) if i not in traced]
 
-        res = QOpt(temp)
+        res = QOpt(np.asarray(np.einsum(self.t_repr, in_labels, out_labels)))
 
         if self._pdo == True:
             res._pdo = True
@@ -634,6 +657,8 @@ class QOpt(QVal):
         return self & ((~ self) | other)
 
 
+from .qproj import QProj
+from .qkron import QKron
 from .qvec import QVec
 
 def qproj_from_qvec(qvec : QVec) -> QOpt:
@@ -641,6 +666,10 @@ def qproj_from_qvec(qvec : QVec) -> QOpt:
     ```
     |v> -> |v><v|
     ```
+
+    The projector of a normalized vector is the rank-1 `QProj` instance with basis `v`, so that the pure states keep their vectors.
     '''
     v = qvec.v_repr.reshape((2**qvec.qnum, 1))
+    if abs(np.linalg.norm(v) - 1) < QVal.prec:
+        return QProj(v)
     return QOpt(v @ v.conjugate().transpose())
\ No newline at end of file
@@ -0,0 +1,392 @@
+from __future__ import annotations
+from typing import Sequence
+
+from ..error import QPLCompError
+
+import numpy as np
+from .. import linalgPP
+
+from .val import QVal
+from .qopt import QOpt
+from .cache import lattice_cached, digest
+
+class QProj(QOpt):
+    '''
+    The class to represent projectors by orthonormal bases. It is the low-rank representation of projective `QOpt` instances.
+
+    A `QProj` instance keeps a `d x r` matrix `basis` with orthonormal columns:
+        - if `complemented` is `False`, it represents the projector `basis @ basis^dagger`;
+        - if `complemented` is `True`, it represents the projector `I - basis @ basis^dagger`, namely the orthogonal complement.
+
+    The lattice operations (conjunction, disjunction, complement, and the Sasaki operations built on them), Loewner order and equality are calculated directly on the bases in O(d r^2). The matrix and tensor representations are only materialized on demand.
+
+    Note: inplace operations are not allowed. Therefore the QProj here are literal values.
+    '''
+
+    # the number of columns of the probes for the fingerprints (see `_digest`)
+    PROBE_COLUMNS : int = 8
+    _probes : dict[int, np.ndarray] = {}
+
+    def __init__(self, basis : np.ndarray,
+                 complemented : bool = False,
+                 is_unitary : None | bool = None):
+        '''
+        Construct a QProj instance with the given orthonormal basis.
+
+        Parameters
+            - basis : np.ndarray, a `d x r` matrix with orthonormal columns, where `d` is some power of 2. The orthonormality is not checked here.
+            - complemented : bool, whether the projector is onto the orthogonal complement of the basis.
+            - is_unitary : None | bool, the known unitary property. (Only the identity is a unitary projector.)
+        '''
+
+        if len(basis.shape) != 2:
+            raise QPLCompError(f"Incorrect basis shape: {basis.shape} should be a matrix.")
+
+        dim = basis.shape[0]
+        self._qnum = round(np.log2(dim))
+        if (2**self._qnum != dim):
+            raise QPLCompError(f"Incorrect basis dimension: {dim} should be some power of 2.")
+
+        self._basis : np.ndarray = QOpt._frozen(basis)
+        self._complemented : bool = complemented
+
+        # the representations are materialized on demand
+        self._tensor_repr : np.ndarray | None = None    # type: ignore
+        self._matrix_repr : np.ndarray | None = None    # type: ignore
+
+        # the orthonormal basis of the range, when the projector is complemented
+        self._range_basis : np.ndarray | None = None
+
+        self._unitary : None | bool = is_unitary
+        self._effect : None | bool = True
+        self._pdo : None | bool = None
+        self._projector : None | bool = True
+
+        self._fingerprint : None | tuple = None
+        self._hash : None | int = None
+
+    @staticmethod
+    def from_qopt(opt : QOpt) -> QProj:
+        '''
+        Return the `QProj` representation of the projective `QOpt` instance `opt`.
+
+        Parameters: opt : QOpt, a projector.
+        Returns: QProj, the same projector represented by its basis.
+        Errors:
+            - ValueError when opt is not a projector.
+        '''
+        if isinstance(opt, QProj):
+            return opt
+
+        return QProj._from_matrix(opt)
+
+    @staticmethod
+    @lattice_cached('basis')
+    def _from_matrix(opt : QOpt) -> QProj:
+        '''
+        Calculate the basis of the projector `opt` which is not a `QProj` instance. The result shares the fingerprint of `opt`.
+        '''
+        if not opt.is_projector:
+            raise QPLCompError("The QOpt instance is not a projector.")
+
+        res = QProj(linalgPP.column_space(opt.m_repr, QVal.prec), is_unitary=opt.unitary_tag)
+        res._fingerprint = opt._fingerprint
+        return res
+
+
+    @property
+    def m_repr(self) -> np.ndarray:
+        '''
+        Return the matrix representation of this projector. It is materialized at the first call.
+        '''
+        if self._matrix_repr is None:
+            self._matrix_repr = QOpt._frozen(self._matrix())
+        return self._matrix_repr
+
+    def _matrix(self) -> np.ndarray:
+        V = self._basis
+        if self._complemented:
+            return np.eye(self.dim, dtype=V.dtype) - V @ V.conj().transpose()
+        else:
+            return V @ V.conj().transpose()
+
+    def _content(self) -> np.ndarray:
+        '''
+        The matrix representation for the hash, which is not kept if not materialized yet.
+        '''
+        return self._matrix_repr if self._matrix_repr is not None else self._matrix()
+
+    @staticmethod
+    def _probe(dim : int) -> np.ndarray:
+        '''
+        Return the fixed random `dim x PROBE_COLUMNS` matrix which the fingerprints of the projectors are calculated on. It is generated from a seed, so that it is the same in all processes.
+        '''
+        R = QProj._probes.get(dim)
+        if R is None:
+            rng = np.random.default_rng(dim)
+            R = rng.normal(size = (dim, QProj.PROBE_COLUMNS)) + 1j * rng.normal(size = (dim, QProj.PROBE_COLUMNS))
+            R = QProj._probes[dim] = QOpt._frozen(R)
+        return R
+
+    def _digest(self) -> bytes:
+        '''
+        The digest of the rank and the quantized product `P @ R` of this projector with the probe `R` (see `_probe`), calculated on the basis with O(d r k) cost, so that the projector is not materialized.
+
+        Two different projectors have the same product only if their difference almost annihilates the probe, which happens with a negligible probability because the probe is random. Equal projectors with entries of the products across a grid line have different digests, as in `QOpt.fingerprint`.
+        '''
+        R = QProj._probe(self.dim)
+        V = self._basis
+        PR = V @ (V.conj().transpose() @ R)
+        if self._complemented:
+            PR = R - PR
+        return digest('proj', self.rank, linalgPP.fingerprint(PR, QVal.prec))
+
+    @property
+    def t_repr(self) -> np.ndarray:
+        '''
+        Return the tensor representation of this projector. It is materialized at the first call.
+        '''
+        if self._tensor_repr is None:
+            self._tensor_repr = self.m_repr.reshape((2,)*self._qnum*2)
+        return self._tensor_repr
+
+    @property
+    def dim(self) -> int:
+        return self._basis.shape[0]
+
+    @property
+    def complemented(self) -> bool:
+        return self._complemented
+
+    @property
+    def stored_basis(self) -> np.ndarray:
+        '''
+        Return the stored basis. It spans the range if `complemented` is False, and spans the orthogonal complement of the range otherwise.
+        '''
+        return self._basis
+
+    @property
+    def basis(self) -> np.ndarray:
+        '''
+        Return an orthonormal basis of the range of this projector.
+        '''
+        if not self._complemented:
+            return self._basis
+
+        if self._range_basis is None:
+            self._range_basis = linalgPP.basis_complement(self._basis)
+        return self._range_basis
+
+    @property
+    def rank(self) -> int:
+        '''
+        Return the rank of this projector, namely the dimension of the subspace.
+        '''
+        if self._complemented:
+            return self.dim - self._basis.shape[1]
+        else:
+            return self._basis.shape[1]
+
+
+    ################################################
+    # Methods of QProj
+    ################################################
+
+    def dagger(self) -> QProj:
+        '''
+        Projectors are Hermitian.
+        '''
+        return self
+
+    def tensor(self, other : QOpt) -> QOpt:
+        '''
+        Calculate and return the tensor product of operators self and other.
+
+        The basis representation is preserved if both operators are `QProj` instances, and either they are both not complemented, or one of them is the identity.
+        '''
+
+        assert isinstance(other, QOpt), "ASSERTION FAILED"
+
+        if isinstance(other, QProj):
+            unitary = True if self._unitary == True and other._unitary == True else None
+
+            # the identity is the complement of the zero space
+            self_eye = self._complemented and self._basis.shape[1] == 0
+            other_eye = other._complemented and other._basis.shape[1] == 0
+
+            if not self._complemented and not other._complemented:
+                return QProj(np.kron(self._basis, other._basis))
+
+            elif other_eye:
+                return QProj(np.kron(self._basis, np.eye(other.dim)), self._complemented, unitary)
+
+            elif self_eye:
+                return QProj(np.kron(np.eye(self.dim), other._basis), other._complemented, unitary)
+
+        return super().tensor(other)
+
+    def permute(self, perm : Sequence[int]) -> QProj:
+        '''
+        Permute the order of qubits.
+        '''
+        QOpt._check_permutation(perm, self.qnum)
+
+        rank = self._basis.shape[1]
+        new_basis = self._basis.reshape((2,)*self.qnum + (rank,)).transpose(list(perm) + [self.qnum])
+
+        return QProj(new_basis.reshape((self.dim, rank)), self._complemented, self._unitary)
+
+    @lattice_cached('Loewner_le')
+    def Loewner_le(self, other : QOpt) -> bool:
+        '''
+        Decide whether the two operator self and other follow the Loewner order self <= other.
+
+        If `other` is also a projector, the order is the inclusion of the subspaces. It is decided on the bases if `other` is a `QProj` instance, and by checking `other @ self = self` with O(d^2 r) cost otherwise. For other operators the general method of `QOpt` is applied.
+        '''
+        assert isinstance(other, QOpt), "ASSERTION FAILED"
+
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
+
+        if not isinstance(other, QProj):
+            if other._projector != True:
+                return super().Loewner_le(other)
+
+            V = self._basis
+            if self._complemented:
+                # (Q - I)(I - V V^dagger) = 0
+                M = other.m_repr - np.eye(self.dim)
+                return linalgPP.close_equal((M @ V) @ V.conj().transpose(), M, QVal.prec)
+            else:
+                return V.shape[1] == 0 or linalgPP.close_equal(other.m_repr @ V, V, QVal.prec)
+
+        if self.rank > other.rank:
+            return False
+
+        A, B = self._basis, other._basis
+
+        if not self._complemented and not other._complemented:
+            return linalgPP.basis_contained(A, B, QVal.prec)
+
+        elif not self._complemented and other._complemented:
+            return linalgPP.basis_orthogonal(A, B, QVal.prec)
+
+        elif self._complemented and not other._complemented:
+            # A^perp <= B iff the part of B orthogonal to A is the whole A^perp
+            return linalgPP.basis_meet_orth(B, A, QVal.prec).shape[1] == self.rank
+
+        else:
+            return linalgPP.basis_contained(B, A, QVal.prec)
+
+    def _contains(self, P : QOpt) -> bool:
+        '''
+        Decide whether the projector `P` is below `self` in Loewner order, with O(d^2 r) cost.
+        '''
+        if isinstance(P, QProj):
+            return P.Loewner_le(self)
+
+        W = self._basis
+        if W.shape[1] == 0:
+            return self._complemented or linalgPP.close_zero(P.m_repr, QVal.prec)
+
+        if self._complemented:
+            return linalgPP.close_zero(W.conj().transpose() @ P.m_repr, QVal.prec)
+        else:
+            return linalgPP.close_equal(W @ (W.conj().transpose() @ P.m_repr), P.m_repr, QVal.prec)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, QOpt):
+            return False
+
+        if self.qnum != other.qnum:
+            return False
+
+        if not isinstance(other, QProj):
+            return super().__eq__(other)
+
+        return self.rank == other.rank and self.Loewner_le(other)
+
+    __hash__ = QOpt.__hash__
+
+    @lattice_cached('disjunct', symmetric=True)
+    def disjunct(self, other : QOpt) -> QProj:
+        '''
+        Calculate and return the disjunction of subspaces represented by projectors self and other.
+
+        Parameters: self, other : QOpt, projectors with the same number of qubits.
+        Returns: QProj, a projector, representing the subspace of disjunction.
+        Errors:
+            - ValueError when self and other differ in their qubit numbers.
+            - ValueError when self or other is not a projector.
+        '''
+        assert isinstance(other, QOpt), "ASSERTION FAILED"
+
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
+
+        if not other.is_projector:
+            raise QPLCompError("The two QOpt are not both projectors.")
+
+        other = QProj.from_qopt(other)
+        A, B = self._basis, other._basis
+
+        if not self._complemented and not other._complemented:
+            return QProj(linalgPP.basis_join(A, B, QVal.prec))
+
+        # De Morgan's laws
+        elif self._complemented and other._complemented:
+            return QProj(linalgPP.basis_meet(A, B, QVal.prec), True)
+
+        elif not self._complemented and other._complemented:
+            return QProj(linalgPP.basis_meet_orth(B, A, QVal.prec), True)
+
+        else:
+            return QProj(linalgPP.basis_meet_orth(A, B, QVal.prec), True)
+
+    @lattice_cached('conjunct', symmetric=True)
+    def conjunct(self, other : QOpt) -> QProj:
+        '''
+        Calculate and return the conjunction of subspaces represented by projectors self and other.
+
+        Parameters: self, other : QOpt, projectors with the same number of qubits.
+        Returns: QProj, a projector, representing the subspace of conjunction.
+        Errors:
+            - ValueError when self and other differ in their qubit numbers.
+            - ValueError when self or other is not a projector.
+        '''
+        assert isinstance(other, QOpt), "ASSERTION FAILED"
+
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
+
+        if not other.is_projector:
+            raise QPLCompError("The two QOpt are not both projectors.")
+
+        other = QProj.from_qopt(other)
+        A, B = self._basis, other._basis
+
+        if not self._complemented and not other._complemented:
+            return QProj(linalgPP.basis_meet(A, B, QVal.prec))
+
+        # De Morgan's laws
+        elif self._complemented and other._complemented:
+            return QProj(linalgPP.basis_join(A, B, QVal.prec), True)
+
+        elif not self._complemented and other._complemented:
+            return QProj(linalgPP.basis_meet_orth(A, B, QVal.prec))
+
+        else:
+            return QProj(linalgPP.basis_meet_orth(B, A, QVal.prec))
+
+    @lattice_cached('complement')
+    def complement(self) -> QProj:
+        '''
+        Calculate and return the orthogonal complement of the subspace represented by `self`. It only switches the representation and costs O(1).
+        '''
+        return QProj(self._basis, not self._complemented)
+
+    def support(self) -> QProj:
+        return self
+
+    def eigen1space(self) -> QProj:
+        return self
@@ -22,16 +22,20 @@ def Kraus_str(ls : list[QOpt]) -> str:
 class QSOpt(QVal):
     '''
     The class to represent quantum super operators.
+
+    The Kraus operators are stored stacked in one array of shape `(r, d, d)`, so that the application, composition and compression are calculated on the whole stack. The `QOpt` instances of the Kraus operators are only created on demand.
     '''
 
-    def __init__(self, data, is_qo : None | bool = None):
+    def __init__(self, data, is_qo : None | bool = None, compressed : bool = False):
         '''
         Construct a QSOpt instance with the given data.
 
         Parameters:
             - `data`:
                 - `list[QOpt]`, the Kraus operators `E_i`. Note that the E_i should be of the same qubit number.
-            - `is_qo`: `None | bool`, whether this superoperator is quantum operation. In otherwords, whether the Kraus operators `E_i` satisfy `0 <= sum E_i E_i^dagger <= I`.
+                - `np.ndarray`, the matrices of the Kraus operators stacked in the shape `(r, d, d)`.
+            - `is_qo`: `None | bool`, whether this superoperator is quantum operation. In otherwords, whether the Kraus operators `E_i` satisfy `0 <= sum E_i^dagger E_i <= I`.
+            - `compressed`: `bool`, whether the Kraus operators are known to be the fewest (see `QSOpt.compress`).
         '''
         self._qnum : int
 
@@ -47,23 +51,73 @@ class QSOpt(QVal):
             for E in data:
                 if E.qnum != self._qnum:
                     raise QPLCompError("The Kraus operators should be of the same number of qubits.")
-                
-            self._Krausls = data.copy()
-            
+
+            stack = np.stack([E.m_repr for E in data])
+            self._Krausls : list[QOpt] | None = data.copy()
+
+        # data is the stack of Kraus operators
+        elif isinstance(data, np.ndarray):
+            if data.ndim != 3 or data.shape[0] == 0 or data.shape[1] != data.shape[2]:
+                raise QPLCompError(f"Incorrect shape of the Kraus operators: {data.shape} should be (r, d, d) with r > 0.")
+
+            self._qnum = round(np.log2(data.shape[1]))
+            if 2**self._qnum != data.shape[1]:
+                raise QPLCompError(f"Incorrect matrix dimension: {data.shape[1]} should be some power of 2.")
+
+            stack = data
+            self._Krausls = None
+
         else:
             raise Exception()
+
+        self._stack : np.ndarray = QOpt._frozen(stack)
         
         self._qo : None | bool = is_qo
+        self._compressed : bool = compressed
+
+        # the Liouville representation, calculated on demand
+        self._liouville : None | np.ndarray = None
+
+    @staticmethod
+    def from_liouville(L : np.ndarray, is_qo : None | bool = None) -> QSOpt:
+        '''
+        Construct the QSOpt instance with the Liouville matrix `L` (see `QSOpt.liouville`), in the Kraus representation of the fewest operators.
+        '''
+        res = QSOpt(linalgPP.liouville_to_kraus(L, QVal.prec), is_qo, True)
+        res._liouville = L
+        return res
         
     @property
     def Kraus(self) -> list[QOpt]:
         '''
         Return the list of corresponding Kraus operators.
         '''
+        if self._Krausls is None:
+            self._Krausls = [QOpt(E) for E in self._stack]
         return self._Krausls
+
+    @property
+    def stack(self) -> np.ndarray:
+        '''
+        Return the matrices of the Kraus operators, stacked in the shape `(r, d, d)`.
+        '''
+        return self._stack
+
+    @property
+    def compressed(self) -> bool:
+        return self._compressed
     
+    @property
+    def liouville(self) -> np.ndarray:
+        '''
+        Return the Liouville (transfer) matrix, which maps the row-major vectorization `vec(rho)` to `vec(self(rho))`.
+        '''
+        if self._liouville is None:
+            self._liouville = linalgPP.kraus_to_liouville(self._stack)
+        return self._liouville
+
     def __str__(self) -> str:
-        return Kraus_str(self._Krausls)
+        return Kraus_str(self.Kraus)
 
     
     @property
@@ -76,7 +130,7 @@ class QSOpt(QVal):
     @property
     def is_qo(self) -> bool:
         if self._qo is None:
-            self._qo = linalgPP.is_qo([E.m_repr for E in self._Krausls], self.prec)
+            self._qo = linalgPP.is_qo(self._stack, self.prec)
         return self._qo
     def assert_qo(self) -> None:
         self._qo = True
@@ -86,24 +140,29 @@ class QSOpt(QVal):
     # Methods between QSOpt and QOpt
     ################################################
 
-    def apply(self, opt : QOpt) -> QOpt:
+    def apply(self, opt : QOpt, pos : Sequence[int] | None = None) -> QOpt:
         '''
         Calculate the application result of superoperator `self` on the operator `opt`, and return the result.
 
+        The Kraus operators are applied in one contraction `sum_i E_i opt E_i^dagger` over the stack (see `linalgPP.kraus_apply_batch`). If `pos` is given, the superoperator acts on these qubits of `opt`, and the extensions `E_i ⊗ I` are never formed.
+
         - Parameters:
             - `self` : `QSOpt`, the superoperator.
             - `opt` : `QOpt`, the operator.
+            - `pos` : `Sequence[int] | None`, the positions in `opt` which the qubits of `self` correspond to. All the qubits of `opt` in order by default.
         - Returns: `QOpt`, the result.
         '''
         assert isinstance(opt, QOpt), "ASSERTION FAILED"
 
-        if self.qnum != opt.qnum:
-            raise QPLCompError("The QSOpt instance cannot apply on the QOpt instance. The QSOpt instance is of " + str(self.qnum) + " qubits, but the QOpt instance is of "+ str(opt.qnum) + "qubits.")
+        if pos is None:
+            if self.qnum != opt.qnum:
+                raise QPLCompError("The QSOpt instance cannot apply on the QOpt instance. The QSOpt instance is of " + str(self.qnum) + " qubits, but the QOpt instance is of "+ str(opt.qnum) + "qubits.")
+            pos = range(self.qnum)
 
-        res = QOpt.zero_opt(self.qnum)
+        elif len(pos) != self.qnum:
+            raise QPLCompError(f"The QSOpt instance of {self.qnum} qubits cannot apply on the positions {pos}.")
 
-        for E in self._Krausls:
-            res = res + E @ opt @ E.dagger()
+        res = QOpt(linalgPP.kraus_apply_batch(self._stack, opt.m_repr[None], list(pos))[0])
 
         # quantum operator on effect -> effect
         if self._qo == True and opt.effect_tag == True:
@@ -122,16 +181,66 @@ class QSOpt(QVal):
         
     def __add__(self, other : QSOpt) -> QSOpt:
         '''
-        Calculate and return the addition result of `self` and `other`.
+        Calculate and return the addition result of `self` and `other`. The Kraus operators are compressed if there are more than `d^2` of them (see `QSOpt.compress`).
         - Parameters: `self`, `other` : `QSOpt`.
         - Returns: `QSOpt`.
         '''
-        assert isinstance(other, QOpt), "ASSERTION FAILED"
+        assert isinstance(other, QSOpt), "ASSERTION FAILED"
 
         if self.qnum != other.qnum:
             raise QPLCompError(f"Inconsistent qubit numbers: {self.qnum} and {other.qnum}. The two QSOpt should have the same number of qubit numbers.")
         
-        return QSOpt(self.Kraus + other.Kraus)
+        res = QSOpt(np.concatenate([self._stack, other._stack]))
+        if len(res._stack) > 4**self.qnum:
+            return res.compress()
+        return res
+
+    def compose(self, other : QSOpt) -> QSOpt:
+        '''
+        Calculate and return the composition `self ∘ other`, which applies `other` first. The Kraus operators of the result are compressed (see `QSOpt.compress`).
+        - Parameters: `self`, `other` : `QSOpt`.
+        - Returns: `QSOpt`.
+        '''
+        assert isinstance(other, QSOpt), "ASSERTION FAILED"
+
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit numbers: {self.qnum} and {other.qnum}. The two QSOpt should have the same number of qubit numbers.")
+
+        d = 2**self.qnum
+        Kraus = np.einsum('aij,bjk->abik', self._stack, other._stack).reshape(-1, d, d)
+
+        is_qo = True if self._qo and other._qo else None
+        return QSOpt(linalgPP.kraus_compress(Kraus, QVal.prec), is_qo, True)
+
+    def __matmul__(self, other : QSOpt) -> QSOpt:
+        return self.compose(other)
+
+    def compress(self) -> QSOpt:
+        '''
+        Return the equal superoperator with the fewest Kraus operators, whose number is the rank of the Choi matrix (see `linalgPP.kraus_compress`).
+        '''
+        if self._compressed:
+            return self
+
+        res = QSOpt(linalgPP.kraus_compress(self._stack, QVal.prec), self._qo, True)
+        res._liouville = self._liouville
+        return res
+
+    def scale(self, c : float) -> QSOpt:
+        '''
+        Calculate and return the scaling `c * self`, for `c >= 0`.
+        - Parameters: `self` : `QSOpt`, `c` : `float`.
+        - Returns: `QSOpt`.
+        '''
+        if c < 0:
+            raise QPLCompError(f"The superoperator cannot be scaled by the negative number {c}.")
+
+        return QSOpt(self._stack * np.sqrt(c), True if self._qo and c <= 1 else None, self._compressed and c > 0)
+
+    def __mul__(self, other : float) -> QSOpt:
+        return self.scale(other)
+    def __rmul__(self, other : float) -> QSOpt:
+        return self.scale(other)
 
 
     def dagger(self) -> QSOpt:
@@ -142,5 +251,4 @@ class QSOpt(QVal):
         Returns: QSOpt, the result.
         '''
 
-        new_Kraus = [item.dagger() for item in self.Kraus]
-        return QSOpt(new_Kraus)
\ No newline at end of file
+        return QSOpt(self._stack.conj().transpose(0, 2, 1), None, self._compressed)
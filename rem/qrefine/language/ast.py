@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Type
+from typing import Type, Callable
 
 from ...qplcomp import IQOpt, QVar, IQOpt
 from ...mTLC.env import TypedTerm, Var, Types
@@ -24,24 +24,84 @@ class QProgAst(TypedTerm):
     def eval(self, env: Env) -> QProgAst:
         pass
 
+    @property
+    def subprogs(self) -> tuple[QProgAst, ...]:
+        '''
+        Return the direct subprograms, in the order of their appearance.
+        '''
+        return ()
+
+    def rebuild(self, subprogs : tuple[QProgAst, ...]) -> QProgAst:
+        '''
+        Return the program of the same structure with the direct subprograms replaced by `subprogs` (see `QProgAst.subprogs`).
+        '''
+        return self
+
     def definite(self, env: Env) -> bool:
         '''
         Whether this program is definite. In other words, whether there is no prescription statements in this program.
         '''
-        raise NotImplementedError()
+        return len(self.get_prescription()) == 0
 
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        '''
+        Return the lines of the string representation, where the subprograms are given as the pairs of the subprogram and its prefix (see `QProgAst.prefix_str`).
+        '''
+        raise NotImplementedError()
     
     def prefix_str(self, prefix = "") -> str:
-        raise NotImplementedError()
+        '''
+        Return the string representation with every line prefixed by `prefix`.
+
+        The subprograms are expanded on an explicit stack, and the lines are joined once, so that long and deep programs are printed in linear time.
+        '''
+        lines : list[str] = []
+        stack : list[str | tuple[TypedTerm, str]] = [(self, prefix)]
+        while len(stack) > 0:
+            item = stack.pop()
+            if isinstance(item, str):
+                lines.append(item)
+                continue
+
+            prog, prog_prefix = item
+            if isinstance(prog, QProgAst):
+                stack.extend(reversed(prog._str_parts(prog_prefix)))
+            else:
+                lines.append(prog_prefix + str(prog))
+
+        return "\n".join(lines)
 
     def __str__(self) -> str:
         return self.prefix_str()
     
     def get_prescription(self) -> list[AstPres]:
         '''
-        Return the unsolved prescriptions.
+        Return the unsolved prescriptions, in the order of their appearance.
         '''
-        raise NotImplementedError()
+        res : list[AstPres] = []
+        stack : list[TypedTerm] = [self]
+        while len(stack) > 0:
+            prog = stack.pop()
+            if isinstance(prog, AstPres) and prog.SRefined is None:
+                res.append(prog)
+            elif isinstance(prog, QProgAst):
+                stack.extend(reversed(prog.subprogs))
+        return res
+
+    def replace_pres(self, pres : AstPres, refined : AstPres) -> QProgAst:
+        '''
+        Return the program with the prescription `pres` (identified by identity) replaced by `refined`.
+
+        The programs are not modified. Only the nodes on the paths to `pres` are rebuilt, and the other subprograms are shared with this program. If `pres` does not occur, this program itself is returned.
+        '''
+        def replace(prog : QProgAst, subprogs : tuple[QProgAst, ...]) -> QProgAst:
+            if prog is pres:
+                return refined
+            if all(S is S_old for S, S_old in zip(subprogs, prog.subprogs)):
+                return prog
+            return prog.rebuild(subprogs)
+
+        return transform(self, replace)
     
     @property
     def all_qvar(self) -> QVar:
@@ -49,6 +109,36 @@ class QProgAst(TypedTerm):
     
     
 
+def transform(prog : QProgAst, f : Callable[[QProgAst, tuple[QProgAst, ...]], QProgAst]) -> QProgAst:
+    '''
+    Transform the program `prog` bottom-up, where `f(S, subprogs)` returns the result for the program `S` whose direct subprograms are transformed into `subprogs`.
+
+    The programs are traversed on an explicit stack, so that long and deep programs do not exhaust the recursion. The terms which are not programs (e.g. variables) are kept.
+    '''
+    results : list[QProgAst] = []
+    stack : list[tuple[QProgAst, bool]] = [(prog, False)]
+    while len(stack) > 0:
+        S, visited = stack.pop()
+        if not isinstance(S, QProgAst):
+            results.append(S)
+            continue
+
+        subprogs = S.subprogs
+        if visited or len(subprogs) == 0:
+            if len(subprogs) == 0:
+                results.append(f(S, ()))
+            else:
+                res = f(S, tuple(results[-len(subprogs):]))
+                del results[-len(subprogs):]
+                results.append(res)
+            continue
+
+        stack.append((S, True))
+        stack.extend((S_sub, False) for S_sub in reversed(subprogs))
+
+    return results[0]
+
+
 #####################################################################
 # different program structures
 
@@ -58,25 +148,16 @@ class AstAbort(QProgAst):
 
     def eval(self, env: Env) -> QProgAst:
         return self
-
-    def definite(self, env: Env) -> bool:
-        return True
-    
-    def prefix_str(self, prefix="") -> str:
-        return prefix + "abort"
     
-    def get_prescription(self) -> list[AstPres]:
-        return []
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        return [prefix + "abort"]
 
     @property
     def all_qvar(self) -> QVar:
         return QVar([])
     
-    def __hash__(self) -> int:
-        return hash("abort")
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, AstAbort)
+    def _struct_key(self) -> tuple:
+        return ()
 
 class AstSkip(QProgAst):
     def __init__(self):
@@ -84,25 +165,16 @@ class AstSkip(QProgAst):
 
     def eval(self, env: Env) -> QProgAst:
         return self
-
-    def definite(self, env: Env) -> bool:
-        return True
     
-    def prefix_str(self, prefix="") -> str:
-        return prefix + "skip"
-
-    def get_prescription(self) -> list[AstPres]:
-        return []
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        return [prefix + "skip"]
     
     @property
     def all_qvar(self) -> QVar:
         return QVar([])
     
-    def __hash__(self) -> int:
-        return hash("skip")
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, AstSkip)
+    def _struct_key(self) -> tuple:
+        return ()
 
 
 class AstInit(QProgAst):
@@ -112,25 +184,16 @@ class AstInit(QProgAst):
 
     def eval(self, env: Env) -> QProgAst:
         return self
-
-    def definite(self, env: Env) -> bool:
-        return True
     
-    def prefix_str(self, prefix="") -> str:
-        return prefix + str(self.eqvar) + ":=0"
-
-    def get_prescription(self) -> list[AstPres]:
-        return []
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        return [prefix + str(self.eqvar) + ":=0"]
     
     @property
     def all_qvar(self) -> QVar:
         return self.eqvar.qvar
     
-    def __hash__(self) -> int:
-        return hash(("init", self.eqvar))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, AstInit) and self.eqvar == other.eqvar
+    def _struct_key(self) -> tuple:
+        return (self.eqvar,)
 
     
 
@@ -148,25 +211,16 @@ class AstUnitary(QProgAst):
             raise ValueError("The operator '" + str(self.U) + "' for unitary statement is not unitary.")
         
         return self
-
-    def definite(self, env: Env) -> bool:
-        return True
     
-    def prefix_str(self, prefix="") -> str:
-        return prefix + str(self.U) + ";"
-
-    def get_prescription(self) -> list[AstPres]:
-        return []
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        return [prefix + str(self.U) + ";"]
 
     @property
     def all_qvar(self) -> QVar:
         return self.U.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("unitary", self.U))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, AstUnitary) and self.U == other.U
+    def _struct_key(self) -> tuple:
+        return (self.U,)
 
     
 class AstAssert(QProgAst):
@@ -182,31 +236,28 @@ class AstAssert(QProgAst):
             raise ValueError("The operator '" + str(self.P) + "' for assertion statement is not projective.")
         
         return self
-
-    def definite(self, env: Env) -> bool:
-        return True
     
-    def prefix_str(self, prefix="") -> str:
-        return prefix + "assert " + str(self.P)
-
-    def get_prescription(self) -> list[AstPres]:
-        return []
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        return [prefix + "assert " + str(self.P)]
 
     @property
     def all_qvar(self) -> QVar:
         return self.P.all_qvar
 
-    def __hash__(self) -> int:
-        return hash(("assert", self.P))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, AstAssert) and self.P == other.P
+    def _struct_key(self) -> tuple:
+        return (self.P,)
     
 
 class AstPres(QProgAst):
+
+    # the prescriptions are not shared, because the goals of refinements are identified by identity
+    _interned = False
+
     def __init__(self, P : EIQOptAbstract, Q : EIQOptAbstract, SRefined: QProgAst|None = None):
         '''
         This `SRefined` attribute can refer to the subsequent refined programs for this program. If `None`, then the current program is used.
+
+        The prescriptions are not modified after the construction. A refinement builds a new prescription with `SRefined`, see `QProgAst.replace_pres`.
         '''
         super().__init__()
         self.SRefined : QProgAst | None = SRefined
@@ -223,77 +274,78 @@ class AstPres(QProgAst):
         
         return self
 
-    def definite(self, env: Env) -> bool:
+    @property
+    def subprogs(self) -> tuple[QProgAst, ...]:
         if self.SRefined is None:
-            return False
-        else:
-            return self.SRefined.definite(env)
+            return ()
+        return (self.SRefined,)
+
+    def rebuild(self, subprogs : tuple[QProgAst, ...]) -> QProgAst:
+        if len(subprogs) == 0:
+            return self
+        return AstPres(self.P, self.Q, subprogs[0])
         
     def pres_str(self) -> str:
         return "< " + str(self.P) + ", " + str(self.Q) + " >"
     
-    def prefix_str(self, prefix="") -> str:
-        res = prefix + self.pres_str()
-        if self.SRefined is None:
-            return res
-        else:
-            res += "\n" + prefix + INDENT + "<= (\n"
-            res += self.SRefined.prefix_str(prefix + INDENT) + "\n"
-            res += prefix + ")"
-            return res
-
-    def get_prescription(self) -> list[AstPres]:
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        res : list[str | tuple[TypedTerm, str]] = [prefix + self.pres_str()]
         if self.SRefined is not None:
-            return self.SRefined.get_prescription()
-        else:
-            return [self]
+            res += [prefix + INDENT + "<= (", (self.SRefined, prefix + INDENT), prefix + ")"]
+        return res
     
     @property
     def all_qvar(self) -> QVar:
         return self.P.all_qvar + self.Q.all_qvar
 
-    def __hash__(self) -> int:
-        return hash(("pres", self.P, self.Q))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, AstPres) and self.P == other.P and self.Q == other.Q
+    def _struct_key(self) -> tuple:
+        # the prescriptions with different refinements are different programs
+        return (self.P, self.Q, self.SRefined)
 
 
 class AstSeq(QProgAst):
-    def __init__(self, S0 : QProgAst, S1 : QProgAst):
+    def __init__(self, *stmts : QProgAst):
+        '''
+        The sequential composition of the statements `stmts`, in the order of execution.
+
+        The composition is n-ary: the nested sequential compositions are flattened, so that `AstSeq(AstSeq(S0, S1), S2)` and `AstSeq(S0, AstSeq(S1, S2))` are both `AstSeq(S0, S1, S2)`.
+        '''
         super().__init__()
 
-        # restructure the sequential composition, so that it is always associated to the right
-        if isinstance(S0, AstSeq):
-            S0, S1 = S0.S0, AstSeq(S0.S1, S1)
+        flat : list[QProgAst] = []
+        for S in stmts:
+            if isinstance(S, AstSeq):
+                flat.extend(S.stmts)
+            else:
+                flat.append(S)
 
-        self.S0 = S0
-        self.S1 = S1
+        if len(flat) == 0:
+            raise ValueError("The sequential composition should have at least one statement.")
+
+        self.stmts : tuple[QProgAst, ...] = tuple(flat)
 
     def eval(self, env: Env) -> QProgAst:
-        return AstSeq(
-            self.S0.eval(env),
-            self.S1.eval(env)
-        )
+        return AstSeq(*(S.eval(env) for S in self.stmts))
 
-    def definite(self, env) -> bool:
-        return self.S0.definite(env) and self.S1.definite(env)
-    
-    def prefix_str(self, prefix="") -> str:
-        return self.S0.prefix_str(prefix) + "\n" + self.S1.prefix_str(prefix)
+    @property
+    def subprogs(self) -> tuple[QProgAst, ...]:
+        return self.stmts
+
+    def rebuild(self, subprogs : tuple[QProgAst, ...]) -> QProgAst:
+        return AstSeq(*subprogs)
     
-    def get_prescription(self) -> list[AstPres]:
-        return self.S0.get_prescription() + self.S1.get_prescription()
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        return [(S, prefix) for S in self.stmts]
     
     @property
     def all_qvar(self) -> QVar:
-        return self.S0.all_qvar + self.S1.all_qvar
-    
-    def __hash__(self) -> int:
-        return hash(("seq", self.S0, self.S1))
+        res = QVar([])
+        for S in self.stmts:
+            res = res + S.all_qvar
+        return res
     
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, AstSeq) and self.S0 == other.S0 and self.S1 == other.S1
+    def _struct_key(self) -> tuple:
+        return self.stmts
 
 class AstProb(QProgAst):
     def __init__(self, S0 : QProgAst, S1 : QProgAst, p : float):
@@ -313,29 +365,25 @@ class AstProb(QProgAst):
             self.p
         )
 
+    @property
+    def subprogs(self) -> tuple[QProgAst, ...]:
+        return (self.S0, self.S1)
 
-    def definite(self, env: Env) -> bool:
-        return self.S0.definite(env) and self.S1.definite(env)
+    def rebuild(self, subprogs : tuple[QProgAst, ...]) -> QProgAst:
+        return AstProb(subprogs[0], subprogs[1], self.p)
     
-    def prefix_str(self, prefix="") -> str:
-        res = prefix + "{\n" + self.S0.prefix_str(prefix + INDENT) + "\n"
-        res += prefix + "[⊕ " + str(self.p) +"]\n"
-        res += self.S1.prefix_str(prefix + INDENT) + "\n"
-        res += prefix + "}"
-        return res
-        
-    def get_prescription(self) -> list[AstPres]:
-        return self.S0.get_prescription() + self.S1.get_prescription()
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        return [
+            prefix + "{", (self.S0, prefix + INDENT),
+            prefix + "[⊕ " + str(self.p) +"]", (self.S1, prefix + INDENT),
+            prefix + "}"]
 
     @property
     def all_qvar(self) -> QVar:
         return self.S0.all_qvar + self.S1.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("prob", self.S0, self.S1, self.p))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, AstProb) and self.S0 == other.S0 and self.S1 == other.S1 and self.p == other.p
+    def _struct_key(self) -> tuple:
+        return (self.S0, self.S1, self.p)
 
 
 class AstIf(QProgAst):
@@ -356,30 +404,25 @@ class AstIf(QProgAst):
             self.S1.eval(env),
             self.S0.eval(env))
 
+    @property
+    def subprogs(self) -> tuple[QProgAst, ...]:
+        return (self.S1, self.S0)
 
-    def definite(self, env: Env) -> bool:
-        return self.S1.definite(env) and self.S0.definite(env)
-    
-    def prefix_str(self, prefix="") -> str:
-        res = prefix + "if " + str(self.P) + " then\n"
-        res += self.S1.prefix_str(prefix + INDENT) + "\n"
-        res += prefix + "else\n"
-        res += self.S0.prefix_str(prefix + INDENT) + "\n"
-        res += prefix + "end"
-        return res
-
-    def get_prescription(self) -> list[AstPres]:
-        return self.S1.get_prescription() + self.S0.get_prescription()
+    def rebuild(self, subprogs : tuple[QProgAst, ...]) -> QProgAst:
+        return AstIf(self.P, subprogs[0], subprogs[1])
+    
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        return [
+            prefix + "if " + str(self.P) + " then", (self.S1, prefix + INDENT),
+            prefix + "else", (self.S0, prefix + INDENT),
+            prefix + "end"]
     
     @property
     def all_qvar(self) -> QVar:
         return self.P.all_qvar + self.S1.all_qvar + self.S0.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("if", self.P, self.S1, self.S0))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, AstIf) and self.P == other.P and self.S1 == other.S1 and self.S0 == other.S0
+    def _struct_key(self) -> tuple:
+        return (self.P, self.S1, self.S0)
 
     
 class AstWhile(QProgAst):
@@ -399,25 +442,21 @@ class AstWhile(QProgAst):
             self.S.eval(env)
         )
 
-    
-    def definite(self, env: Env) -> bool:
-        return self.S.definite(env)
-    
-    def prefix_str(self, prefix="") -> str:
-        res = prefix + "while " + str(self.P) + " do\n"
-        res += self.S.prefix_str(prefix + INDENT) + "\n"
-        res += prefix + "end"
-        return res
+    @property
+    def subprogs(self) -> tuple[QProgAst, ...]:
+        return (self.S,)
 
-    def get_prescription(self) -> list[AstPres]:
-        return self.S.get_prescription()
+    def rebuild(self, subprogs : tuple[QProgAst, ...]) -> QProgAst:
+        return AstWhile(self.P, subprogs[0])
+    
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        return [
+            prefix + "while " + str(self.P) + " do", (self.S, prefix + INDENT),
+            prefix + "end"]
     
     @property
     def all_qvar(self) -> QVar:
         return self.P.all_qvar + self.S.all_qvar
     
-    def __hash__(self) -> int:
-        return hash(("while", self.P, self.S))
-    
-    def __eq__(self, other : object) -> bool:
-        return isinstance(other, AstWhile) and self.P == other.P and self.S == other.S
+    def _struct_key(self) -> tuple:
+        return (self.P, self.S)
@@ -9,8 +9,10 @@ from .semantics.assertion import wlp
 # the refinement rules                                      #
 #############################################################
 
+# The rules check the refinement of prescription `pres`, and return the refined program. The prescription is not modified.
 
-def wlp_check(pres: AstPres, SRefined: TypedTerm, env: Env) -> None:
+
+def wlp_check(pres: AstPres, SRefined: TypedTerm, env: Env) -> QProgAst:
     '''
         == Refinement Rule ==
         ```
@@ -34,9 +36,9 @@ def wlp_check(pres: AstPres, SRefined: TypedTerm, env: Env) -> None:
         msg += "S = \n" + SRefined.prefix_str("\t") + "\n"
         raise ValueError(msg)
     
-    pres.SRefined = SRefined
+    return SRefined
 
-def weaken_pre(pres: AstPres, R: EIQOptAbstract, env: Env) -> None:
+def weaken_pre(pres: AstPres, R: EIQOptAbstract, env: Env) -> QProgAst:
     '''
     == Refinement Rule ==
     ```
@@ -52,11 +54,11 @@ def weaken_pre(pres: AstPres, R: EIQOptAbstract, env: Env) -> None:
         msg += "R = \n\t" + str(R) + "\n"
         raise ValueError(msg)
     
-    pres.SRefined = AstPres(R, pres.Q)
+    return AstPres(R, pres.Q)
 
 
 
-def strengthen_post(pres: AstPres, R: EIQOptAbstract, env: Env) -> None:
+def strengthen_post(pres: AstPres, R: EIQOptAbstract, env: Env) -> QProgAst:
     '''
     == Refinement Rule ==
     ```
@@ -72,11 +74,11 @@ def strengthen_post(pres: AstPres, R: EIQOptAbstract, env: Env) -> None:
         msg += "Q = \n\t" + str(pres.Q) + "\n"
         raise ValueError(msg)
     
-    pres.SRefined = AstPres(pres.P, R)
+    return AstPres(pres.P, R)
 
 
 
-def rule_seq_break(pres: AstPres, middle: EIQOptAbstract, env: Env) -> None:
+def rule_seq_break(pres: AstPres, middle: EIQOptAbstract, env: Env) -> QProgAst:
     '''
     == Refinement Rule == 
     ```
@@ -86,12 +88,12 @@ def rule_seq_break(pres: AstPres, middle: EIQOptAbstract, env: Env) -> None:
     '''
     middle.type_checking(IQOptType())
 
-    pres.SRefined = AstSeq(
+    return AstSeq(
         AstPres(pres.P, middle),
         AstPres(middle, pres.Q)
     )
 
-def rule_if(pres: AstPres, R : EIQOptAbstract, env: Env) -> None:
+def rule_if(pres: AstPres, R : EIQOptAbstract, env: Env) -> QProgAst:
     '''
     == Refinement Rule == 
     ```
@@ -109,9 +111,9 @@ def rule_if(pres: AstPres, R : EIQOptAbstract, env: Env) -> None:
         EIQOptSasakiConjunct(EIQOptComplement(R), pres.P),
         pres.Q
     )
-    pres.SRefined = AstIf(R, S1, S0)
+    return AstIf(R, S1, S0)
 
-def rule_while(pres: AstPres, R : EIQOptAbstract, Inv : EIQOptAbstract, env: Env) -> None:
+def rule_while(pres: AstPres, R : EIQOptAbstract, Inv : EIQOptAbstract, env: Env) -> QProgAst:
     '''
     == Refinement Rule == 
     ```
@@ -139,7 +141,7 @@ def rule_while(pres: AstPres, R : EIQOptAbstract, Inv : EIQOptAbstract, env: Env
         msg += "Q = \n\t" + str(pres.Q) + "\n"
         raise ValueError(msg)
 
-    pres.SRefined = AstWhile(
+    return AstWhile(
         R, 
         AstPres(
             EIQOptSasakiConjunct(R, Inv),
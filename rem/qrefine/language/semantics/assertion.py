@@ -1,8 +1,110 @@
 from ..ast import *
 
+from collections import OrderedDict
+
+from .superop import superop
+from .optimize import fused_stmts
+from .loop import loop_wlp, loop_wlp_superop
+
+
+# the weakest liberal preconditions of the loops whose bodies have no prescriptions and no loops are calculated on the superoperators of the bodies (see `loop_wlp_superop`) up to this number of qubits, and 0 disables it
+# above it, compiling the body costs more than iterating the fixpoint (see benchmarks/bench_loop_wlp.py)
+LOOP_WLP_SUPEROP_MAX_QNUM = 5
+
+
+class WlpCache:
+    '''
+    The bounded LRU memo of the weakest liberal preconditions, shared by the proof frames through the evaluation cache of the environment (see `EvalCache.memo`).
+
+    The entries are keyed by the (hash-consed) program, the fingerprint of the postcondition and the version of the environment (see `Env.version`), which determines the definitions the program refers to. Therefore the entries stay valid when the frames are popped, and the steps replayed after `step_backward` reuse them.
+    '''
+
+    def __init__(self, size : int = 4096):
+        '''
+        Parameters:
+            - size : int, the maximum number of entries.
+        '''
+        self._entries : OrderedDict[tuple, IQOpt] = OrderedDict()
+        self._size : int = size
+
+        self.hits : int = 0
+        self.misses : int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(prog : QProgAst, post : IQOpt, env : Env) -> tuple:
+        return (prog, post.qvar.tuple, post.rho_extend, post.qval.fingerprint, env.version)
+
+    def get(self, key : tuple) -> IQOpt | None:
+        res = self._entries.get(key)
+        if res is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return res
+
+    def put(self, key : tuple, val : IQOpt) -> None:
+        self._entries[key] = val
+        if len(self._entries) > self._size:
+            self._entries.popitem(last = False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __str__(self) -> str:
+        return f"wlp cache: {self.hits} hits, {self.misses} calculated, {len(self._entries)} entries"
+
+
+def wlp_cache(env : Env) -> WlpCache:
+    '''
+    Return the wlp memo of the environment.
+    '''
+    return env.eval_cache.memo('wlp', WlpCache)
+
+
+def loop_body_compilable(prog : TypedTerm, env : Env) -> bool:
+    '''
+    Decide whether the program `prog` has no prescriptions and no loops, so that its weakest liberal precondition is the one of its superoperator, and the superoperator is compiled without solving loops.
+    '''
+    prog = prog.eval(env)
+
+    if isinstance(prog, (AstAbort, AstSkip, AstInit, AstUnitary, AstAssert)):
+        return True
+
+    elif isinstance(prog, (AstSeq, AstProb, AstIf)):
+        return all(loop_body_compilable(S, env) for S in prog.subprogs)
+
+    return False
+
+
 def wlp(prog: QProgAst, post: IQOpt, env: Env) -> IQOpt:
     '''
     Compute the weakest liberal precondition.
+
+    The results of the subprograms are memoized in the environment (see `WlpCache`).
+    '''
+    # the trivial programs are not memoized
+    if isinstance(prog, (AstAbort, AstSkip)):
+        return wlp_calc(prog, post, env)
+
+    cache = wlp_cache(env)
+    key = WlpCache.key(prog, post, env)
+
+    res = cache.get(key)
+    if res is None:
+        res = wlp_calc(prog, post, env)
+        cache.put(key, res)
+
+    return res
+
+
+def wlp_calc(prog: QProgAst, post: IQOpt, env: Env) -> IQOpt:
+    '''
+    Calculate the weakest liberal precondition of `prog`, with the subprograms calculated by `wlp`.
     '''
 
     if isinstance(prog, AstAbort):
@@ -30,7 +132,10 @@ def wlp(prog: QProgAst, post: IQOpt, env: Env) -> IQOpt:
             return IQOpt.zero(False)
         
     elif isinstance(prog, AstSeq):
-        return wlp(prog.S0, wlp(prog.S1, post, env), env)
+        # the statements (with the unitaries fused) are calculated backwards, and every one of them is memoized
+        for S in reversed(fused_stmts(prog, env)):
+            post = wlp(S, post, env)
+        return post
     
     elif isinstance(prog, AstProb):
         return wlp(prog.S0, post, env) & wlp(prog.S1, post, env)
@@ -41,24 +146,18 @@ def wlp(prog: QProgAst, post: IQOpt, env: Env) -> IQOpt:
               (~ P).Sasaki_imply(wlp(prog.S0, post, env))
     
     elif isinstance(prog, AstWhile):
-        '''
-        This will terminate because the lattice has finite height.
-        '''
-        flag = True
-        Rn = IQOpt.identity(False)
-        Rn_1 = IQOpt.identity(False)
-
         P = prog.P.eval(env).iqopt
 
-        # this is guaranteed to terminate
-        while flag:
-            Rn = Rn_1
-            Rn_1 = P.Sasaki_imply(wlp(prog.S, Rn, env)) & (~ P).Sasaki_imply(post)
+        # the loops on few qubits with simple bodies are calculated on the superoperators of the bodies
+        # the qubits are counted before the body is compiled, so that the bodies on many qubits are not compiled in vain
+        if P.qnum <= LOOP_WLP_SUPEROP_MAX_QNUM\
+            and (prog.S.eval(env).all_qvar + P.qvar + post.qvar).qnum <= LOOP_WLP_SUPEROP_MAX_QNUM\
+            and loop_body_compilable(prog.S, env):
+            return loop_wlp_superop(P, superop(prog.S, env), post)
 
-            flag = not Rn == Rn_1
+        # this will terminate because the lattice has finite height
+        return loop_wlp(P, lambda R: wlp(prog.S, R, env), post)
 
-        return Rn    
-    
 
     else:
         raise ValueError(f"Unsupported type: {prog}")
@@ -15,32 +15,34 @@ class QProgExtract(QProgAst):
 
     def __str__(self) -> str:
         return f"Extract {self.prog}"
+
+    def _str_parts(self, prefix : str) -> list[str | tuple[TypedTerm, str]]:
+        return [prefix + str(self)]
+
+    def _struct_key(self) -> tuple:
+        return (self.prog,)
     
     @property
     def all_qvar(self) -> QVar:
         return QVar([])
         
 def extract(prog: QProgAst) -> QProgAst:
-    if isinstance(prog, (AstAbort, AstSkip, AstInit, AstUnitary, AstAssert)):
-        return prog
-    
-    elif isinstance(prog, AstPres):
-        if prog.SRefined is not None:
-            return extract(prog.SRefined)
+    '''
+    Return the program with the refined prescriptions replaced by their refinements.
+
+    The program is traversed on an explicit stack (see `transform`).
+    '''
+    def extract_node(S : QProgAst, subprogs : tuple[QProgAst, ...]) -> QProgAst:
+        if isinstance(S, AstPres):
+            if S.SRefined is not None:
+                return subprogs[0]
+            else:
+                return S
+
+        elif isinstance(S, (AstAbort, AstSkip, AstInit, AstUnitary, AstAssert, AstSeq, AstProb, AstIf, AstWhile)):
+            return S.rebuild(subprogs)
+
         else:
-            return prog
-        
-    elif isinstance(prog, AstSeq):
-        return AstSeq(extract(prog.S0), extract(prog.S1))
+            raise ValueError(f"Invalid program to extract: {S}")
 
-    elif isinstance(prog, AstProb):
-        return AstProb(extract(prog.S0), extract(prog.S1), prog.p)
-    
-    elif isinstance(prog, AstIf):
-        return AstIf(prog.P, extract(prog.S1), extract(prog.S0))
-    
-    elif isinstance(prog, AstWhile):
-        return AstWhile(prog.P, extract(prog.S))
-    
-    else:
-        raise ValueError(f"Invalid program to extract: {prog}")
\ No newline at end of file
+    return transform(prog, extract_node)
@@ -0,0 +1,263 @@
+'''
+The semantics of loops.
+
+The semantics of `while P do S end` is the sum of `break ∘ iter^k` for all `k`, where `break = P^⊥ · P^⊥` and `iter = S ∘ (P · P)`. It is calculated in one of the following ways, with the time and memory bounded:
+
+- `solve`: for the loops on at most `LIOUVILLE_MAX_QNUM` qubits, the Liouville matrix `X` of the loop is solved from `X (I - M_iter) = M_break` directly.
+- `doubling`: the partial sums are calculated on the Kraus representations, where the number of summed unfoldings is doubled in every step, until the superoperator of the remaining unfoldings vanishes.
+- `iterate`: the loop is unfolded on the input state, until the trace (norm) of the state remaining in the loop is below `LOOP_TOL`.
+
+The weakest liberal precondition of a loop is the greatest fixpoint of `X -> (P ⇝ wlp(S, X)) ∧ (P^⊥ ⇝ Q)`. It is calculated in one of the following ways:
+
+- `wlp-iterate`: the fixpoint is iterated from the identity (see `loop_wlp`).
+- `wlp-superop`: the fixpoint is calculated from the superoperator of the loop body as a Krylov space (see `loop_wlp_superop`).
+
+Every calculation is reported in `loop_reports` with its method, iteration count, residual and time.
+'''
+
+from __future__ import annotations
+from typing import Callable
+from collections import deque
+
+import time
+
+import numpy as np
+
+from ....qplcomp import IQOpt, QSOpt, IQSOpt, QProj, linalgPP
+from ....qplcomp.qval import QVal
+
+from ...error import ValueError
+
+
+# the closed form is used for the loops on at most this number of qubits, whose Liouville matrices have 16^n entries (16 MiB for 5 qubits)
+LIOUVILLE_MAX_QNUM = 5
+
+# above this number of qubits, the closed form is only used for the iterations with several Kraus operators, since the doubling is cheaper for the pure ones
+LIOUVILLE_PURE_MAX_QNUM = 3
+
+# the maximum number of doublings, i.e., at most `2**LOOP_MAX_DOUBLING` unfoldings are summed
+LOOP_MAX_DOUBLING = 40
+
+# the maximum number of unfoldings on the states
+LOOP_MAX_ITER = 100000
+
+# the tolerance of the trace norm of the state remaining in the loop
+LOOP_TOL = QVal.prec
+
+# the unfolding stops when the state remaining in the loop recurs within this number of unfoldings
+LOOP_MAX_PERIOD = 8
+
+
+class LoopCompileError(ValueError):
+    '''
+    The error for the loops whose superoperators do not converge within `2**LOOP_MAX_DOUBLING` unfoldings.
+    '''
+    pass
+
+
+class LoopReport:
+    '''
+    The report of the calculation of a loop.
+    '''
+    def __init__(self, method : str, qnum : int, iterations : int, residual : float, time : float = 0.):
+        '''
+        Parameters:
+            - method : str, `'solve'`, `'doubling'`, `'iterate'`, `'wlp-iterate'` or `'wlp-superop'`.
+            - qnum : int, the number of qubits of the calculation.
+            - iterations : int, the number of doublings, unfoldings or fixpoint iterations.
+            - residual : float, the residual of the linear system for `solve`, the norm of the remaining part for `doubling` and `iterate`, and zero for the fixpoints.
+            - time : float, the time of the calculation in seconds.
+        '''
+        self.method = method
+        self.qnum = qnum
+        self.iterations = iterations
+        self.residual = residual
+        self.time = time
+
+    @property
+    def time_per_iteration(self) -> float:
+        return self.time / max(self.iterations, 1)
+
+    def __str__(self) -> str:
+        return f"loop ({self.method}, {self.qnum} qubits): {self.iterations} iterations, residual {self.residual:.3e}, {self.time * 1000:.3f} ms ({self.time_per_iteration * 1000:.3f} ms per iteration)"
+
+
+# the reports of the recent loop calculations
+loop_reports : deque[LoopReport] = deque(maxlen = 100)
+
+
+def _proj_so(P : IQOpt) -> IQSOpt:
+    return IQSOpt(QSOpt([P.qval], True), P.qvar)
+
+def _norm(so : IQSOpt) -> float:
+    '''
+    Return `|| sum E^dagger E ||`, the largest trace of the output on normalized states.
+    '''
+    K = so.qval.stack
+    M = np.einsum('rji,rjk->ik', K.conj(), K)
+    return float(np.linalg.norm(M, 2))
+
+
+def loop_superop(P : IQOpt, S : IQSOpt) -> IQSOpt:
+    '''
+    Calculate the superoperator of `while P do S end`, where `S` is the superoperator of the loop body.
+
+    Raises: `LoopCompileError` if the unfoldings do not converge.
+    '''
+    start = time.perf_counter()
+
+    P_comp = ~ P
+    S_break = _proj_so(P_comp)
+    S_iter = S @ _proj_so(P)
+
+    qvar = S_iter.qvar + S_break.qvar
+    S_break = S_break.extend(qvar)
+    S_iter = S_iter.extend(qvar)
+
+    if qvar.qnum <= LIOUVILLE_PURE_MAX_QNUM or (qvar.qnum <= LIOUVILLE_MAX_QNUM and len(S_iter.qval.stack) > 1):
+        M_break = S_break.qval.liouville
+        A = np.eye(len(M_break)) - S_iter.qval.liouville
+
+        try:
+            # the system is singular if some states never leave the loop, and the solution is then invalid
+            # it is detected by a random right-hand side appended, whose solution estimates the norm of the inverse
+            probe = np.random.default_rng(0).normal(size = len(A))
+            Y = np.linalg.solve(A.T, np.column_stack([M_break.T, probe]))
+            X = Y[:, :-1].T
+            inv_norm = float(np.linalg.norm(Y[:, -1]) / np.linalg.norm(probe))
+            residual = float(np.abs(X @ A - M_break).max())
+
+            res = QSOpt.from_liouville(X, True)
+
+            if np.isfinite(residual) and residual < np.sqrt(QVal.prec) and inv_norm < 1 / np.sqrt(QVal.prec) and _norm(IQSOpt(res, qvar)) <= 1 + np.sqrt(QVal.prec):
+                loop_reports.append(LoopReport('solve', qvar.qnum, 0, residual, time.perf_counter() - start))
+                return IQSOpt(res, qvar)
+
+        except np.linalg.LinAlgError:
+            pass
+
+    # the sum of `break ∘ iter^k` for k < m, where m is doubled in every step: the sum for 2m is `res + res ∘ iter^m`
+    res = S_break
+    S_power = S_iter
+    for i in range(LOOP_MAX_DOUBLING):
+        residual = _norm(S_power)
+        if residual < LOOP_TOL:
+            loop_reports.append(LoopReport('doubling', qvar.qnum, i, residual, time.perf_counter() - start))
+            return res
+
+        res = (res + res @ S_power).compress()
+        S_power = S_power @ S_power
+
+    loop_reports.append(LoopReport('doubling', qvar.qnum, LOOP_MAX_DOUBLING, residual, time.perf_counter() - start))
+    raise LoopCompileError(f"The superoperator of the loop does not converge within {2**LOOP_MAX_DOUBLING} iterations (residual {residual:.3e}).")
+
+
+def loop_iterate(P : IQOpt, body : Callable[[IQOpt], IQOpt], rho : IQOpt) -> IQOpt:
+    '''
+    Calculate the output of `while P do S end` on the state `rho` by unfolding, where `body` calculates the output of `S`.
+
+    The unfolding stops when the trace of the state remaining in the loop is below `LOOP_TOL`, or the remaining state recurs (relatively to its trace) within `LOOP_MAX_PERIOD` unfoldings. The unfolding is deterministic and does not increase the trace, so a recurring state keeps its trace, never leaves the loop, and contributes nothing to the output.
+
+    Raises: `ValueError` if the unfolding does not stop within `LOOP_MAX_ITER` iterations.
+    '''
+    start = time.perf_counter()
+
+    P_comp = ~ P
+
+    res = IQOpt.zero(is_rho=True)
+
+    # the last remaining states and their traces
+    history : deque[tuple[IQOpt, float]] = deque(maxlen = LOOP_MAX_PERIOD)
+
+    for i in range(1, LOOP_MAX_ITER + 1):
+        res = res + P_comp @ rho @ P_comp
+        history.append((rho, float(np.trace(rho.qval.m_repr).real)))
+        rho = body(P @ rho @ P)
+        residual = float(np.trace(rho.qval.m_repr).real)
+
+        # the states are only compared if the trace has not decreased since them
+        if residual < LOOP_TOL or any(
+                last_residual - residual <= LOOP_TOL * residual
+                and np.abs((rho - last_rho).qval.m_repr).max() <= LOOP_TOL * residual
+                for last_rho, last_residual in history):
+            loop_reports.append(LoopReport('iterate', rho.qnum, i, residual, time.perf_counter() - start))
+            return IQOpt(res.qval, res.qvar, True)
+
+    loop_reports.append(LoopReport('iterate', rho.qnum, LOOP_MAX_ITER, residual, time.perf_counter() - start))  # type: ignore
+    raise ValueError(f"The loop does not terminate within {LOOP_MAX_ITER} iterations (remaining trace {residual:.3e}).")
+
+
+def _rank_ratio(R : IQOpt) -> float:
+    '''
+    Return `rank(R) / 2^n` of the projector `R` on `n` qubits, which is invariant under the cylinder extensions.
+    '''
+    if isinstance(R.qval, QProj):
+        rank = R.qval.rank
+    else:
+        rank = round(float(np.trace(R.qval.m_repr).real))
+    return rank / 2**R.qnum
+
+
+def loop_wlp(P : IQOpt, body_wlp : Callable[[IQOpt], IQOpt], post : IQOpt) -> IQOpt:
+    '''
+    Calculate the weakest liberal precondition of `while P do S end` for the postcondition `post`, where `body_wlp` calculates the one of `S`.
+
+    It is the greatest fixpoint of `F(X) = (P ⇝ wlp(S, X)) ∧ (P^⊥ ⇝ post)`, iterated from the identity. The parts not depending on `X` (namely `P^⊥` and `P^⊥ ⇝ post`) are calculated once. Because `F` is monotone, the iterations form a descending chain of projectors, and two of them are equal if they have the same rank. Therefore the iteration stops at the first step which does not decrease the rank, and the chain is not compared by the dense operators. There are at most `2^n + 1` iterations for the loops on `n` qubits.
+
+    Raises: `ValueError` if the iteration does not stop within `LOOP_MAX_ITER` iterations.
+    '''
+    start = time.perf_counter()
+
+    P_comp = ~ P
+    R_break = P | (P_comp & post)
+
+    R = IQOpt.identity(False)
+    ratio = _rank_ratio(R)
+
+    for i in range(1, LOOP_MAX_ITER + 1):
+        R_next = (P_comp | (P & body_wlp(R))) & R_break
+        ratio_next = _rank_ratio(R_next)
+
+        if ratio_next >= ratio:
+            loop_reports.append(LoopReport('wlp-iterate', R_next.qnum, i, 0., time.perf_counter() - start))
+            return R
+
+        R, ratio = R_next, ratio_next
+
+    loop_reports.append(LoopReport('wlp-iterate', R.qnum, LOOP_MAX_ITER, 0., time.perf_counter() - start))
+    raise ValueError(f"The fixpoint of the loop is not reached within {LOOP_MAX_ITER} iterations.")
+
+
+def loop_wlp_superop(P : IQOpt, S : IQSOpt, post : IQOpt) -> IQOpt:
+    '''
+    Calculate the weakest liberal precondition of `while P do S end` for the postcondition `post` directly, where `S` is the superoperator of the loop body with the Kraus operators `E_i`.
+
+    A state satisfies the precondition if and only if its outputs after `k` unfoldings avoid `post^⊥` for all `k`, namely it is orthogonal to the smallest subspace `V` which contains the range of `P^⊥ post^⊥` and is closed under the maps `v -> P E_i^dagger v`. The subspace is calculated as a Krylov space on the orthonormal bases, where only the new basis vectors are mapped in every step. Therefore the loop needs not terminate, and there are at most `2^n` steps with `O(r 4^n)` operations per new vector, for `r` Kraus operators on `n` qubits. It coincides with the greatest fixpoint in `loop_wlp` for the bodies without prescriptions.
+    '''
+    start = time.perf_counter()
+
+    qvar = P.qvar + S.qvar + post.qvar
+    M_P = P.extend(qvar).qval.m_repr
+    M_post_comp = (~ post).extend(qvar).qval.m_repr
+    K = S.extend(qvar).qval.stack
+
+    # the adjoint maps `v -> P E_i^dagger v`, stacked in the shape (r d, d)
+    A = (M_P @ K.conj().transpose(0, 2, 1)).reshape(-1, K.shape[2])
+
+    V = linalgPP.column_space(M_post_comp - M_P @ M_post_comp, QVal.prec)
+    new = V
+    iterations = 0
+    while new.shape[1] > 0 and V.shape[1] < V.shape[0]:
+        iterations += 1
+        W = (A @ new).reshape(len(K), -1, new.shape[1]).transpose(1, 0, 2).reshape(V.shape[0], -1)
+        W = W - V @ (V.conj().T @ W)
+        new = linalgPP.column_space(W, QVal.prec)
+
+        # the new vectors are orthogonalized again, for the numerical stability
+        new = linalgPP.column_space(new - V @ (V.conj().T @ new), QVal.prec)
+        V = np.concatenate([V, new], axis = 1)
+
+    res = IQOpt(QProj(V, True), qvar)
+
+    loop_reports.append(LoopReport('wlp-superop', qvar.qnum, iterations, 0., time.perf_counter() - start))
+    return res
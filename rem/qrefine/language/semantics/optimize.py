@@ -0,0 +1,146 @@
+'''
+The gate fusion of programs.
+
+The adjacent unitary statements of a sequential composition are fused into blocks, where every block is one unitary statement on at most `FUSE_MAX_QNUM` qubits. Before the fusion, the adjacent pairs `U; U^dagger` on the same quantum variable are cancelled. Therefore the weakest liberal preconditions and the forward calculations apply one block instead of every gate, and the operators on the whole register are built once per block.
+
+The fused statements of the sequential compositions are cached in the environment (see `fused_stmts`), so that the block matrices are calculated once, and the blocks are the same terms for the memos keyed by the programs (e.g. `WlpCache`).
+'''
+
+from .. import *
+import numpy as np
+from ....qplcomp import QOpt, IQOpt
+from ....qplcomp.qval import QVal
+
+from ...error import ValueError
+
+
+# the maximum number of qubits of a fused block, whose matrix has 4^n entries (256 for 4 qubits)
+FUSE_MAX_QNUM = 4
+
+
+def _is_identity(U : IQOpt) -> bool:
+    M = U.qval.m_repr
+    return bool(np.allclose(M, np.eye(len(M)), rtol = 0., atol = QVal.prec))
+
+
+def _gates(stmts : tuple[QProgAst, ...], env : Env) -> list[tuple[QProgAst, IQOpt | None]]:
+    '''
+    Return the statements paired with their operators, which are evaluated once for every distinct (hash-consed) unitary statement, and `None` for the others.
+
+    Raises: `ValueError` if some unitary statement is not unitary, as in `AstUnitary.eval`.
+    '''
+    ops : dict[QProgAst, IQOpt] = {}
+    res : list[tuple[QProgAst, IQOpt | None]] = []
+    for S in stmts:
+        if not isinstance(S, AstUnitary):
+            res.append((S, None))
+            continue
+
+        U = ops.get(S)
+        if U is None:
+            U = S.U.eval(env).iqopt
+            if not U.qval.is_unitary:
+                raise ValueError("The operator '" + str(S.U) + "' for unitary statement is not unitary.")
+            ops[S] = U
+        res.append((S, U))
+    return res
+
+
+def _cancel(gates : list[tuple[QProgAst, IQOpt | None]]) -> list[tuple[QProgAst, IQOpt | None]]:
+    '''
+    Remove the adjacent pairs `U; U^dagger` of unitary statements on the same quantum variable. The pairs exposed by the removal are removed as well.
+    '''
+    res : list[tuple[QProgAst, IQOpt | None]] = []
+    for S, U in gates:
+        if U is not None and len(res) > 0:
+            V = res[-1][1]
+            if V is not None and U.qvar.tuple == V.qvar.tuple and _is_identity(U @ V):
+                res.pop()
+                continue
+        res.append((S, U))
+    return res
+
+
+def _block(gates : list[tuple[QProgAst, IQOpt]]) -> list[QProgAst]:
+    '''
+    Return the statements of the fused block of the unitary statements `gates`: nothing for the identity, the statement itself for a single gate, and one unitary statement otherwise.
+    '''
+    if len(gates) == 1:
+        return [gates[0][0]]
+
+    U = gates[0][1]
+    for _, V in gates[1:]:
+        U = V @ U
+
+    if _is_identity(U):
+        return []
+
+    # the block matrix is stored densely, for it is applied many times
+    opt = QOpt(U.qval.m_repr)
+    opt.assert_unitary()
+    return [AstUnitary(EIQOpt(IQOpt(opt, U.qvar)))]
+
+
+def fuse_stmts(stmts : tuple[QProgAst, ...], env : Env) -> tuple[QProgAst, ...]:
+    '''
+    Fuse the adjacent unitary statements of the sequence `stmts` into blocks of at most `FUSE_MAX_QNUM` qubits. The gates on more qubits are kept alone.
+
+    Raises: `ValueError` if some unitary statement is not unitary.
+    '''
+    res : list[QProgAst] = []
+    block : list[tuple[QProgAst, IQOpt]] = []
+    qvar = QVar([])
+
+    for S, U in _cancel(_gates(stmts, env)):
+        if U is None:
+            if len(block) > 0:
+                res += _block(block)
+                block, qvar = [], QVar([])
+            res.append(S)
+            continue
+
+        qvar_next = qvar + U.qvar
+        if len(block) > 0 and qvar_next.qnum > FUSE_MAX_QNUM:
+            res += _block(block)
+            block, qvar_next = [], U.qvar
+
+        block.append((S, U))
+        qvar = qvar_next
+
+    if len(block) > 0:
+        res += _block(block)
+
+    return tuple(res)
+
+
+def fused_stmts(prog : AstSeq, env : Env) -> tuple[QProgAst, ...]:
+    '''
+    Return the statements of the sequential composition `prog` with the unitaries fused (see `fuse_stmts`), which are calculated once and then cached in the environment. An empty tuple is returned if all the statements cancel.
+    '''
+    fused : dict = env.eval_cache.table('fuse')
+
+    res = fused.get(prog)
+    if res is None:
+        res = fuse_stmts(prog.stmts, env)
+        fused[prog] = res
+
+    return res
+
+
+def optimize(prog : QProgAst, env : Env) -> QProgAst:
+    '''
+    Return the program `prog` with the unitaries of every sequential composition fused (see `fused_stmts`).
+
+    The program is traversed on an explicit stack (see `transform`).
+    '''
+    def optimize_node(S : QProgAst, subprogs : tuple[QProgAst, ...]) -> QProgAst:
+        S = S.rebuild(subprogs)
+        if not isinstance(S, AstSeq):
+            return S
+
+        stmts = fused_stmts(S, env)
+        if len(stmts) == 0:
+            return AstSkip()
+        return AstSeq(*stmts)
+
+    return transform(prog, optimize_node)
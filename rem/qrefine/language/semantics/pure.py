@@ -0,0 +1,227 @@
+'''
+The forward calculation on pure states.
+
+A rank-1 input `|v><v|` is calculated as an ensemble of (unnormalized) pure-state branches `|v_i>`, which stands for the state `sum_i |v_i><v_i|`. The unitaries and assertions act on every branch, while `if` and `init` split the branches. The branches are stacked in an array, and an operator on `k` qubits acts on the stack in O(b d 2^k) for `b` branches of dimension `d`, instead of O(d^2 2^k) on the density operator.
+
+The programs of unitaries, assertions, inits, ifs (and skips, aborts, sequences, probabilistic choices) are supported (see `pure_supported`). The ensemble is converted back into a density operator only at the end.
+'''
+
+from __future__ import annotations
+
+from .. import *
+import numpy as np
+from ....qplcomp import QOpt, IQOpt, QProj, QKron
+from ....qplcomp.qval import QVal
+
+from ...error import ValueError
+
+
+# the calculation stops when there are more branches, for the density operator is then cheaper
+PURE_MAX_BRANCHES = 64
+
+
+class PureCalcError(ValueError):
+    '''
+    The error for the ensembles with more than `PURE_MAX_BRANCHES` branches.
+    '''
+    pass
+
+
+def pure_vector(rho : IQOpt) -> np.ndarray | None:
+    '''
+    Return the vector `v` with `rho = |v><v|`, or `None` if `rho` is not of rank 1.
+
+    The rank-1 `QProj` instances (e.g. the projectors of kets) give their basis directly. Otherwise the rank is decided by the purity `tr(rho^2) = tr(rho)^2` in O(d^2).
+    '''
+    opt = rho.qval
+
+    if isinstance(opt, QProj):
+        if not opt.complemented and opt.rank == 1:
+            return opt.basis[:, 0]
+        return None
+
+    M = opt.m_repr
+    tr = np.trace(M).real
+    if tr < QVal.prec or abs(np.vdot(M, M).real - tr * tr) > QVal.prec:
+        return None
+
+    # the column of the largest diagonal entry is v conj(v_j)
+    j = int(np.argmax(np.diagonal(M).real))
+    return M[:, j] / np.sqrt(M[j, j].real)
+
+
+def pure_supported(prog : TypedTerm, env : Env) -> bool:
+    '''
+    Decide whether the definite program `prog` can be calculated on the pure-state ensembles.
+    '''
+    prog = prog.eval(env)
+
+    if isinstance(prog, (AstAbort, AstSkip, AstInit, AstUnitary, AstAssert)):
+        return True
+
+    elif isinstance(prog, AstPres):
+        return prog.SRefined is not None and pure_supported(prog.SRefined, env)
+
+    elif isinstance(prog, (AstSeq, AstProb, AstIf)):
+        return all(pure_supported(S, env) for S in prog.subprogs)
+
+    return False
+
+
+class Ensemble:
+    '''
+    The ensemble of pure-state branches on the quantum variable `qvar`, stacked in the tensor `V` of shape `(b,) + (2,)*n`.
+    '''
+    def __init__(self, V : np.ndarray, qvar : QVar):
+        self.V = V
+        self.qvar = qvar
+
+    @property
+    def size(self) -> int:
+        return self.V.shape[0]
+
+    def extend(self, qvarT : QVar) -> Ensemble:
+        '''
+        Return the ensemble on `qvar + qvarT`, extended by the zero state.
+        '''
+        qvar_all = self.qvar + qvarT
+        m = qvar_all.qnum - self.qvar.qnum
+        if m == 0:
+            return self
+
+        V = np.zeros(self.V.shape + (2,) * m, dtype = self.V.dtype)
+        V[(Ellipsis,) + (0,) * m] = self.V
+        return Ensemble(V, qvar_all)
+
+    def apply(self, opt : IQOpt) -> Ensemble:
+        '''
+        Return the ensemble with the operator `opt` applied on every branch.
+        '''
+        res = self.extend(opt.qvar)
+        pos = res.qvar.to(opt.qvar)
+        return Ensemble(_apply(opt.qval, res.V, [1 + p for p in pos]), res.qvar)
+
+    def __add__(self, other : Ensemble) -> Ensemble:
+        '''
+        Return the union of the branches.
+        '''
+        a = self.extend(other.qvar)
+        b = other.extend(a.qvar)
+        b_V = np.moveaxis(b.V, [1 + i for i in range(b.qvar.qnum)], [1 + p for p in a.qvar.to(b.qvar)])
+        return Ensemble(np.concatenate([a.V, b_V]), a.qvar)
+
+    def scale(self, p : float) -> Ensemble:
+        return Ensemble(self.V * np.sqrt(p), self.qvar)
+
+    def prune(self) -> Ensemble:
+        '''
+        Return the ensemble without the zero branches.
+
+        Raises: `PureCalcError` if there are more than `PURE_MAX_BRANCHES` branches.
+        '''
+        norms = np.sum(np.abs(self.V.reshape(self.size, 2**self.qvar.qnum))**2, axis = 1)
+        res = Ensemble(self.V[norms >= QVal.prec**2], self.qvar)
+
+        if res.size > PURE_MAX_BRANCHES:
+            raise PureCalcError(f"The pure-state ensemble has more than {PURE_MAX_BRANCHES} branches.")
+        return res
+
+    def iqopt(self) -> IQOpt:
+        '''
+        Return the density operator `sum_i |v_i><v_i|` of the ensemble.
+        '''
+        V = self.V.reshape(self.size, 2**self.qvar.qnum)
+        return IQOpt(QOpt(V.T @ V.conj()), self.qvar, True)
+
+
+def _apply(opt : QOpt, V : np.ndarray, axes : list[int]) -> np.ndarray:
+    '''
+    Apply the operator `opt` on the `axes` of the tensor `V`.
+    '''
+    k = len(axes)
+
+    # the factors are applied one by one, and the identity on the other positions is skipped
+    if isinstance(opt, QKron):
+        for f, qubits in opt.factors:
+            V = _apply(f, V, [axes[i] for i in qubits])
+        return V
+
+    # the projectors are applied by their bases, as `B B^dagger v` or `v - B B^dagger v`
+    if isinstance(opt, QProj):
+        B = opt.stored_basis.reshape((2,) * k + (-1,))
+        coef = np.tensordot(B.conj(), V, (list(range(k)), axes))
+        proj = np.moveaxis(np.tensordot(B, coef, ([k], [0])), list(range(k)), axes)
+        return V - proj if opt.complemented else proj
+
+    res = np.tensordot(opt.t_repr, V, (list(range(k, 2*k)), axes))
+    return np.moveaxis(res, list(range(k)), axes)
+
+
+def calc_pure(prog : TypedTerm, ens : Ensemble, env : Env) -> Ensemble:
+    '''
+    Calculate the execution result of the definite program `prog` on the ensemble `ens`.
+
+    Raises: `PureCalcError` if the ensemble grows over `PURE_MAX_BRANCHES` branches.
+    '''
+    if ens.size == 0:
+        return ens
+
+    prog = prog.eval(env)
+
+    if isinstance(prog, AstAbort):
+        return Ensemble(ens.V[:0], ens.qvar)
+
+    elif isinstance(prog, AstSkip):
+        return ens
+
+    elif isinstance(prog, AstInit):
+        qvar = prog.eqvar.eval(env).qvar
+        ens = ens.extend(qvar)
+
+        # every branch is split into the components of |0> and |1>, which are both reset to |0>
+        V = ens.V
+        for p in ens.qvar.to(qvar):
+            idx0 = (slice(None),) * (1 + p) + (0,)
+            idx1 = (slice(None),) * (1 + p) + (1,)
+
+            V1 = np.zeros_like(V)
+            V1[idx0] = V[idx1]
+            V = V.copy()
+            V[idx1] = 0.
+            V = np.concatenate([V, V1])
+
+        return Ensemble(V, ens.qvar).prune()
+
+    elif isinstance(prog, AstUnitary):
+        return ens.apply(prog.U.eval(env).iqopt)
+
+    elif isinstance(prog, AstAssert):
+        return ens.apply(prog.P.eval(env).iqopt).prune()
+
+    elif isinstance(prog, AstPres):
+        if prog.SRefined is None:
+            raise ValueError(f"The program\n\n{prog}\n\nis not definite therefore cannot calculate.")
+        return calc_pure(prog.SRefined, ens, env)
+
+    elif isinstance(prog, AstSeq):
+        for S in prog.stmts:
+            ens = calc_pure(S, ens, env)
+        return ens
+
+    elif isinstance(prog, AstProb):
+        ens_0 = calc_pure(prog.S0, ens.scale(1-prog.p), env)
+        ens_1 = calc_pure(prog.S1, ens.scale(prog.p), env)
+        return (ens_0 + ens_1).prune()
+
+    elif isinstance(prog, AstIf):
+        P = prog.P.eval(env).iqopt
+        ens = ens.extend(P.qvar)
+
+        ens_P = ens.apply(P)
+        ens_1 = calc_pure(prog.S1, ens_P.prune(), env)
+        ens_0 = calc_pure(prog.S0, Ensemble(ens.V - ens_P.V, ens.qvar).prune(), env)
+
+        return (ens_1 + ens_0).prune()
+
+    else:
+        raise ValueError(f"Cannot calculate the program\n\n{prog}\n\non pure states.")
@@ -5,17 +5,18 @@ The (finite step) forward calculation of this language.
 
 from .. import *
 import numpy as np
-from ....qplcomp import QOpt, IQOpt, QSOpt, IQSOpt
+from ....qplcomp import QOpt, IQOpt, linalgPP
+from ....qplcomp.qval import QVal
 
 from .extract import extract
+from .optimize import optimize
+from .superop import superop
+from .loop import loop_iterate, LoopCompileError
+from .pure import pure_vector, pure_supported, calc_pure, Ensemble, PureCalcError
 
 from ...error import ValueError
 
 
-P0 = QOpt(np.array([[1., 0.], [0., 0.]]))
-E10 = QOpt(np.array([[0., 1.], [0., 0.]]))
-ESet0 = QSOpt([P0, E10])
-
 class EIQOptCalc(EIQOptAbstract):
     '''
     The Expression of forward calculation.
@@ -42,6 +43,9 @@ class EIQOptCalc(EIQOptAbstract):
     
     def __str__(self) -> str:
         return f"[[{self.prog}]]({self.rho})"
+
+    def _struct_key(self) -> tuple:
+        return (self.prog, self.rho)
     
     @property
     def all_qvar(self) -> QVar:
@@ -49,13 +53,24 @@ class EIQOptCalc(EIQOptAbstract):
 
 
 
+def as_rho(rho : IQOpt) -> IQOpt:
+    '''
+    Return `rho` as a state, which is extended by the zero state. The input is not modified, for it can be a shared value (e.g. a cached evaluation of a definition).
+    '''
+    if rho.rho_extend:
+        return rho
+    return IQOpt(rho.qval, rho.qvar, True)
+
+
 def calc(prog : QProgAst, rho : IQOpt, env: Env) -> IQOpt:
     '''
     The method for initiating a execution calculation.
     Check of program and input state is implemented here.
+
+    The program is compiled into its superoperator (see `superop`), which is cached for the other input states. The pure input states of the programs without loops are calculated on the pure-state ensembles instead (see `calc_pure`). In both cases, the adjacent unitaries are fused first (see `optimize`).
     '''
 
-    rho.rho_extend = True
+    rho = as_rho(rho)
 
     extracted_prog = extract(prog)
 
@@ -66,9 +81,81 @@ def calc(prog : QProgAst, rho : IQOpt, env: Env) -> IQOpt:
     # check whether rho is a partial density
     if not rho.qval.is_pdo:
         raise ValueError("The input rho is not a partial density operator.")
+
+    extracted_prog = optimize(extracted_prog, env)
+
+    psi = pure_vector(rho)
+    if psi is not None and pure_supported(extracted_prog, env):
+        try:
+            ens = Ensemble(psi.reshape((1,) + (2,) * rho.qnum), rho.qvar)
+            return calc_pure(extracted_prog, ens, env).iqopt()
+
+        except PureCalcError:
+            # the ensemble grows too large, and the density operator is calculated instead
+            pass
     
-    return calc_iter(extracted_prog, rho, env)
-    
+    try:
+        so = superop(extracted_prog, env)
+
+    except LoopCompileError:
+        # the loops not terminating on all the states are unfolded on this input
+        return calc_iter(extracted_prog, rho, env)
+
+    return as_rho(so.apply(rho))
+
+
+def calc_batch(prog : QProgAst, rhos : np.ndarray, qvar : QVar, env: Env) -> tuple[np.ndarray, QVar]:
+    '''
+    The batched forward calculation of program `prog` on a stack of input states on the common quantum variable `qvar`.
+
+    The program is compiled once into its superoperator (see `superop`), which is applied to the whole stack in one contraction (see `linalgPP.kraus_apply_batch`). The inputs are extended by the zero state on the other quantum variables of the program, as in `calc`.
+
+    Parameters:
+        - prog : QProgAst, the definite program.
+        - rhos : np.ndarray, the input states in the shape `(k, d, d)`, for `d = 2^n` and `n` the qubit number of `qvar`.
+        - qvar : QVar, the quantum variable of the input states.
+        - env : Env.
+
+    Returns: tuple[np.ndarray, QVar], the results in the shape `(k, d', d')`, and the quantum variable of the results (`qvar` followed by the other quantum variables of the program).
+    '''
+    k = rhos.shape[0]
+    d = 2**qvar.qnum
+    if rhos.shape != (k, d, d):
+        raise ValueError(f"The input states of shape {rhos.shape} do not match the quantum variable '{qvar}'.")
+
+    extracted_prog = extract(prog)
+
+    if not extracted_prog.definite(env):
+        raise ValueError(f"The program\n\n{extracted_prog}\n\nis not definite therefore cannot calculate.")
+
+    if not np.all(linalgPP.is_pdo(rhos, QVal.prec)):
+        raise ValueError("Some input rho is not a partial density operator.")
+
+    extracted_prog = optimize(extracted_prog, env)
+
+    try:
+        so = superop(extracted_prog, env)
+
+    except LoopCompileError:
+        # the loops not terminating on all the states are unfolded on every input
+        res = [calc_iter(extracted_prog, IQOpt(QOpt(rho), qvar, True), env) for rho in rhos]
+
+        qvar_all = qvar
+        for rho in res:
+            qvar_all = qvar_all + rho.qvar
+        return np.stack([rho.extend(qvar_all).qval.m_repr for rho in res]), qvar_all
+
+    qvar_all = qvar + so.qvar
+
+    # the extension by the zero state on the appended qubits
+    m = qvar_all.qnum - qvar.qnum
+    if m > 0:
+        stride = 2**m
+        ext = np.zeros((k, d * stride, d * stride), dtype = rhos.dtype)
+        ext[:, ::stride, ::stride] = rhos
+        rhos = ext
+
+    return linalgPP.kraus_apply_batch(so.qval.stack, rhos, qvar_all.to(so.qvar)), qvar_all
 
 
 def calc_iter(prog : TypedTerm, rho : IQOpt, env: Env) -> IQOpt:
@@ -77,10 +164,10 @@ def calc_iter(prog : TypedTerm, rho : IQOpt, env: Env) -> IQOpt:
 
     Returns: `IQOpt`, the result of execution.
     '''
-    rho.rho_extend = True
+    rho = as_rho(rho)
 
-    # return zero if the input is zero
-    if rho == IQOpt.zero(is_rho=True):
+    # return zero if the input is zero, which is decided by the trace because the states are positive
+    if abs(np.trace(rho.qval.m_repr)) < QVal.prec:
         return IQOpt.zero(is_rho=True)
     
     prog.type_checking(QProgType())
@@ -93,12 +180,16 @@ def calc_iter(prog : TypedTerm, rho : IQOpt, env: Env) -> IQOpt:
         return rho
     
     elif isinstance(prog, AstInit):
-        res = rho
-        for q in prog.eqvar.eval(env).qvar:
-            IESet0 = IQSOpt(ESet0, QVar([q]))
-            res = IESet0.apply(res)
-            res.rho_extend = True
-        return res
+        qvar = prog.eqvar.eval(env).qvar
+        rho_ext = rho.extend(rho.qvar + qvar)
+
+        # the appended qubits are already in the zero state, and only the others are reset
+        pos = rho_ext.qvar.to(QVar([q for q in qvar if q in rho.qvar]))
+
+        res = QOpt(linalgPP.t_reset(rho_ext.qval.t_repr, pos))
+        if rho.qval.pdo_tag:
+            res.assert_pdo()
+        return IQOpt(res, rho_ext.qvar, True)
     
     elif isinstance(prog, AstUnitary):
         U = prog.U.eval(env).iqopt
@@ -114,8 +205,9 @@ def calc_iter(prog : TypedTerm, rho : IQOpt, env: Env) -> IQOpt:
         return calc_iter(prog.SRefined, rho, env)
     
     elif isinstance(prog, AstSeq):
-        rho1 = calc_iter(prog.S0, rho, env)
-        return calc_iter(prog.S1, rho, env)
+        for S in prog.stmts:
+            rho = calc_iter(S, rho, env)
+        return rho
     
     elif isinstance(prog, AstProb):
         rho_0 = calc_iter(prog.S0, rho, env)
@@ -135,16 +227,7 @@ def calc_iter(prog : TypedTerm, rho : IQOpt, env: Env) -> IQOpt:
     
     elif isinstance(prog, AstWhile):
         P = prog.P.eval(env).iqopt
-        P_comp = ~ P
-
-        # branch of `break`
-        rho_break = P_comp @ rho @ P_comp
-
-        # branch of `continue`
-        new_prog = AstSeq(prog.S, prog)
-        rho_continue = calc_iter(new_prog, P @ rho @ P, env)
-
-        return rho_break + rho_continue
+        return loop_iterate(P, lambda rho: calc_iter(prog.S, rho, env), rho)
     
     else:
         raise ValueError(f"Cannot execute the program\n\n{prog}")
\ No newline at end of file
@@ -0,0 +1,95 @@
+'''
+The compilation of definite programs into superoperators.
+
+The forward calculation `calc_iter` walks the program for every input state. A definite program is instead compiled once into its superoperator (an `IQSOpt` in Kraus representation, indexed by the quantum variables of the program), which is then applied to the input states directly. The loops are compiled as in `loop_superop`. The Kraus operators are compressed after every composition and sum, so that their number stays minimal.
+
+The compiled superoperators are cached in the environment (see `superop`).
+'''
+
+from .. import *
+import numpy as np
+from ....qplcomp import QOpt, QSOpt, IQSOpt
+
+from ...error import ValueError
+
+from .loop import loop_superop
+
+
+P0 = QOpt(np.array([[1., 0.], [0., 0.]]))
+E10 = QOpt(np.array([[0., 1.], [0., 0.]]))
+ESet0 = QSOpt([P0, E10], True)
+
+
+def superop(prog : QProgAst, env : Env) -> IQSOpt:
+    '''
+    Return the superoperator of the definite program `prog`, which is compiled once and then cached in the environment.
+    '''
+    compiled : dict = env.eval_cache.table('superop')
+
+    res = compiled.get(prog)
+    if res is None:
+        res = compile_prog(prog, env)
+        compiled[prog] = res
+
+    return res
+
+
+def compile_prog(prog : TypedTerm, env : Env) -> IQSOpt:
+    '''
+    Compile the definite program `prog` into its superoperator.
+
+    Returns: `IQSOpt`, the superoperator on the quantum variables of `prog`.
+    '''
+    prog.type_checking(QProgType())
+    prog = prog.eval(env)
+
+    if isinstance(prog, AstAbort):
+        return IQSOpt.zero()
+
+    elif isinstance(prog, AstSkip):
+        return IQSOpt.identity()
+
+    elif isinstance(prog, AstInit):
+        res = IQSOpt.identity()
+        for q in prog.eqvar.eval(env).qvar:
+            res = IQSOpt(ESet0, QVar([q])) @ res
+        return res
+
+    elif isinstance(prog, AstUnitary):
+        U = prog.U.eval(env).iqopt
+        return IQSOpt(QSOpt([U.qval], True), U.qvar)
+
+    elif isinstance(prog, AstAssert):
+        P = prog.P.eval(env).iqopt
+        return IQSOpt(QSOpt([P.qval], True), P.qvar)
+
+    elif isinstance(prog, AstPres):
+        if prog.SRefined is None:
+            raise ValueError(f"The program\n\n{prog}\n\nis not definite therefore cannot compile.")
+        return compile_prog(prog.SRefined, env)
+
+    elif isinstance(prog, AstSeq):
+        res = compile_prog(prog.stmts[0], env)
+        for S in prog.stmts[1:]:
+            res = compile_prog(S, env) @ res
+        return res
+
+    elif isinstance(prog, AstProb):
+        S0 = compile_prog(prog.S0, env)
+        S1 = compile_prog(prog.S1, env)
+        return ((1-prog.p) * S0 + prog.p * S1).compress()
+
+    elif isinstance(prog, AstIf):
+        P = prog.P.eval(env).iqopt
+        P_comp = ~ P
+
+        S1 = compile_prog(prog.S1, env) @ IQSOpt(QSOpt([P.qval], True), P.qvar)
+        S0 = compile_prog(prog.S0, env) @ IQSOpt(QSOpt([P_comp.qval], True), P_comp.qvar)
+        return (S1 + S0).compress()
+
+    elif isinstance(prog, AstWhile):
+        P = prog.P.eval(env).iqopt
+        return loop_superop(P, compile_prog(prog.S, env))
+
+    else:
+        raise ValueError(f"Cannot compile the program\n\n{prog}")
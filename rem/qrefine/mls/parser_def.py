@@ -304,11 +304,37 @@ def p_num(p):
 
 from ..language.ast import *
 
+class _PendingSeq:
+    '''
+    The sequential composition under parsing. The statements are collected into one `AstSeq` only when the composition is used (see `_stmt`), so that a long sequence is not rebuilt at every reduction.
+    '''
+    def __init__(self, S0, S1):
+        self.S0 = S0
+        self.S1 = S1
+
+def _stmt(S):
+    '''
+    Return the statement `S`, where the pending sequential composition is collected in linear time.
+    '''
+    if not isinstance(S, _PendingSeq):
+        return S
+
+    stmts = []
+    stack = [S]
+    while len(stack) > 0:
+        T = stack.pop()
+        if isinstance(T, _PendingSeq):
+            stack.append(T.S1)
+            stack.append(T.S0)
+        else:
+            stmts.append(T)
+    return AstSeq(*stmts)
+
 def p_stt_0(p):
     '''
     term    : statement
     '''
-    p[0] = p[1]
+    p[0] = _stmt(p[1])
 
 def p_stt_var(p):
     '''
@@ -356,25 +382,25 @@ def p_stt_6(p):
     '''
     statement    : statement statement
     '''
-    p[0] = AstSeq(p[1], p[2])
+    p[0] = _PendingSeq(p[1], p[2])
 
 def p_stt_7(p):
     '''
     statement    : '{' statement '[' OPLUS FLOATNUM ']' statement '}'
     '''
-    p[0] = AstProb(p[2], p[7], float(p[5]))
+    p[0] = AstProb(_stmt(p[2]), _stmt(p[7]), float(p[5]))
 
 def p_stt_8(p):
     '''
     statement    : IF term THEN statement ELSE statement END
     '''
-    p[0] = AstIf(p[2], p[4], p[6])
+    p[0] = AstIf(p[2], _stmt(p[4]), _stmt(p[6]))
 
 def p_stt_9(p):
     '''
     statement    : WHILE term DO statement END
     '''
-    p[0] = AstWhile(p[2], p[4])
+    p[0] = AstWhile(p[2], _stmt(p[4]))
 
 def p_stt_10(p):
     '''
@@ -383,7 +409,7 @@ def p_stt_10(p):
     # particularly, the first term should be a prescription
     if not isinstance(p[1], AstPres):
         raise ValueError("The first term should be a prescription.")
-    p[1].refine_wlp(p[3])
+    p[1].refine_wlp(_stmt(p[3]))
     p[0] = p[1]
 
 
@@ -392,14 +418,14 @@ def p_calc_iqopt(p):
     '''
     term    : '[' '[' statement ']' ']' '(' term ')'
     '''
-    p[0] = EIQOptCalc(p[3], p[7])
+    p[0] = EIQOptCalc(_stmt(p[3]), p[7])
 
 from ..language.semantics.extract import QProgExtract
 def p_extract_prog(p):
     '''
     statement   : EXTRACT statement
     '''
-    p[0] = QProgExtract(p[2])
+    p[0] = QProgExtract(_stmt(p[2]))
 
 from ..prover.ast import *
 
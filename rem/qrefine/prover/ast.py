@@ -38,10 +38,8 @@ class ImportQOpt(EQOptAbstract):
     def __str__(self) -> str:
         return f'Import "{self.path}"'
     
-    def __eq__(self, other: object) -> bool:
-        if isinstance(other, ImportQOpt):
-            return self.path == other.path
-        return False
+    def _struct_key(self) -> tuple:
+        return (self.path,)
     
 
 class RemAst(ABC):
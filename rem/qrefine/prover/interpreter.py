@@ -6,28 +6,35 @@ from ..language import AstPres, ValueError, EIQOptPair
 
 from .ast import *
 from ..language.semantics.state import calc
+from ..language.semantics.assertion import wlp_cache
 
 from ..language import refine
 
-from copy import deepcopy
-
 
 
 class Frame:
     '''
     An exclusive proof frame of the prover.
+
+    The proof trees are not modified, so the frames share them. A refinement step rebuilds the path from the refined goal to the root (see `Frame.refine_goal`).
     '''
     def __init__(self, env: Env, 
                  refine_proof_name: str,
-                 refine_proof: AstPres|None,
-                 info: str | Exception = ""):
+                 refine_proof: QProgAst|None,
+                 info: str | Exception = "",
+                 current_goals: list[AstPres]|None = None):
+        '''
+        If `current_goals` is `None`, the goals are the unsolved prescriptions of `refine_proof`.
+        '''
         self.env : Env = env.copy()
         self.refine_proof_name = refine_proof_name
-        self.refine_proof = deepcopy(refine_proof)
+        self.refine_proof = refine_proof
 
-        if self.refine_proof is None:
+        if current_goals is not None:
+            self.current_goals = current_goals.copy()
+        elif self.refine_proof is None:
             self.current_goals = []
-        if self.refine_proof:
+        else:
             self.current_goals = self.refine_proof.get_prescription()
 
     @property
@@ -57,7 +64,20 @@ class Frame:
         return Frame(
             self.env, 
             self.refine_proof_name,
-            self.refine_proof)
+            self.refine_proof,
+            current_goals = self.current_goals)
+
+    def refine_goal(self, SRefined: QProgAst) -> None:
+        '''
+        Refine the first goal to `SRefined`. The proof tree is rebuilt by path copying, and the new goals are the prescriptions in `SRefined` followed by the other goals.
+        '''
+        assert self.refine_proof is not None, "ASSERTION FAILED"
+
+        goal = self.current_goals[0]
+        refined = AstPres(goal.P, goal.Q, SRefined)
+
+        self.refine_proof = self.refine_proof.replace_pres(goal, refined)
+        self.current_goals = refined.get_prescription() + [g for g in self.current_goals[1:] if g is not goal]
     
     def __str__(self) -> str:
         return self.goals_str
@@ -109,26 +129,22 @@ class Interpreter:
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
-            refine.wlp_check(
-                new_frame.current_goals[0], 
+            new_frame.refine_goal(refine.wlp_check(
+                frame.current_goals[0], 
                 cmd.statement, 
-                frame.env)
-
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+                frame.env))
             
-            output = f"Refinement step succeeded."
+            output = f"Refinement step succeeded. ({wlp_cache(frame.env)})"
 
         # STEP REFINE_SEQ eiqopt '.'
         elif isinstance(cmd, StepRefineSeq):
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
-            refine.rule_seq_break(
-                new_frame.current_goals[0],
+            new_frame.refine_goal(refine.rule_seq_break(
+                frame.current_goals[0],
                 cmd.mid_assertion,
-                frame.env)
-
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+                frame.env))
             
             output = f"Refinement step succeeded."
 
@@ -137,12 +153,10 @@ class Interpreter:
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
-            refine.rule_if(
-                new_frame.current_goals[0],
+            new_frame.refine_goal(refine.rule_if(
+                frame.current_goals[0],
                 cmd.P,
-                frame.env)
-
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+                frame.env))
             
             output = f"Refinement step succeeded."
 
@@ -151,13 +165,11 @@ class Interpreter:
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
-            refine.rule_while(
-                new_frame.current_goals[0],
+            new_frame.refine_goal(refine.rule_while(
+                frame.current_goals[0],
                 cmd.P, 
                 cmd.inv, 
-                frame.env)
-
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+                frame.env))
             
             output = f"Refinement step succeeded."
 
@@ -166,12 +178,10 @@ class Interpreter:
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
-            refine.weaken_pre(
-                new_frame.current_goals[0],
+            new_frame.refine_goal(refine.weaken_pre(
+                frame.current_goals[0],
                 cmd.pre, 
-                frame.env)
-
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+                frame.env))
             
             output = f"Refinement step succeeded."
 
@@ -180,12 +190,10 @@ class Interpreter:
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
-            refine.strengthen_post(
-                new_frame.current_goals[0],
+            new_frame.refine_goal(refine.strengthen_post(
+                frame.current_goals[0],
                 cmd.post, 
-                frame.env)
-
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+                frame.env))
             
             output = f"Refinement step succeeded."
 
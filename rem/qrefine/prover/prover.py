@@ -37,3 +37,6 @@ class Prover:
         '''
         self.frame_stack.pop()
 
+        # the evaluations of the definitions in the popped frame are discarded
+        self.current_frame.env.eval_cache.invalidate(self.current_frame.env)
+
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+# the tests run on the sources of this repository, which are not installed as a package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from rem.qplcomp import IQOpt
+from rem.qrefine.mls.mls import MLS
+from rem.mTLC.env import Var
+
+
+def close(a : IQOpt, b : IQOpt, atol = 1e-8) -> bool:
+    '''
+    Decide whether the two operators are close entrywise, after the extension to their joint qubits.
+    '''
+    q = a.qvar + b.qvar
+    return np.allclose(a.extend(q).qval.m_repr, b.extend(q).qval.m_repr, atol = atol)
+
+
+class Session:
+    '''
+    A session of the prover, where the commands are run and the defined terms are looked up.
+    '''
+    def __init__(self):
+        self.mls = MLS()
+
+    def run(self, code : str) -> str:
+        res = self.mls.step_forward(code)
+        if res is None:
+            raise AssertionError(self.mls.error)
+        return res[1]
+
+    @property
+    def env(self):
+        return self.mls.selected_frame.env
+
+    def term(self, name : str):
+        return Var(name, self.env).eval(self.env)
+
+    def define(self, name : str, code : str):
+        self.run(f"Def {name} := {code}.")
+        return self.term(name)
+
+
+@pytest.fixture
+def session() -> Session:
+    return Session()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import QVar, QOpt, IQOpt, linalgPP
+from rem.qrefine.error import ValueError
+from rem.qrefine.language.semantics.state import calc, calc_batch
+
+
+PROGRAMS = [
+    "H[q0]; CX[q0 q1]; X[q2];",
+    "{ X[q0]; [\\oplus 0.3] H[q1]; } if P1[q0] then [q1] :=0 else CX[q1 q0]; end",
+    "H[q2]; assert Pp[q2] CX[q2 q0];",
+    "while P1[q0] do { H[q0]; [\\oplus 0.5] X[q1]; } end",
+    # a loop which does not terminate on all the states, calculated on every state
+    "while P1[q0] do skip end",
+]
+
+
+def random_states(rng, k : int, qnum : int) -> np.ndarray:
+    d = 2**qnum
+    A = rng.normal(size = (k, d, d)) + 1j * rng.normal(size = (k, d, d))
+    rhos = A @ A.conj().transpose(0, 2, 1)
+    return rhos / np.trace(rhos, axis1 = 1, axis2 = 2)[:, None, None] * rng.random((k, 1, 1))
+
+
+@pytest.mark.parametrize("code", PROGRAMS)
+@pytest.mark.parametrize("names", [["q0", "q1", "q2"], ["q1", "q0"], ["q2", "q3", "q0", "q1"]])
+def test_calc_batch_matches_calc(session, code, names):
+    prog = session.define("prog", code)
+    qvar = QVar(names)
+    rhos = random_states(np.random.default_rng(len(names)), 5, qvar.qnum)
+
+    res, qvar_res = calc_batch(prog, rhos, qvar, session.env)
+    assert res.shape[0] == 5 and qvar_res.tuple[:qvar.qnum] == qvar.tuple
+
+    for rho, out in zip(rhos, res):
+        expected = calc(prog, IQOpt(QOpt(rho), qvar, True), session.env)
+        assert IQOpt(QOpt(out), qvar_res, True) == expected
+
+
+def test_calc_batch_rejects_invalid_states(session):
+    prog = session.define("prog", "H[q0];")
+    rhos = random_states(np.random.default_rng(0), 3, 1)
+
+    with pytest.raises(ValueError):
+        calc_batch(prog, rhos, QVar(["q0", "q1"]), session.env)
+
+    rhos[1] = -rhos[1]
+    with pytest.raises(ValueError):
+        calc_batch(prog, rhos, QVar(["q0"]), session.env)
+
+
+@pytest.mark.parametrize("pos", [[0], [2, 1], [3, 0, 2], [0, 1, 2, 3]])
+def test_kraus_apply_batch_matches_dense(pos):
+    rng = np.random.default_rng(len(pos))
+    n, k = 4, len(pos)
+    kraus = rng.normal(size = (3, 2**k, 2**k)) + 1j * rng.normal(size = (3, 2**k, 2**k))
+    rhos = random_states(rng, 4, n)
+
+    res = linalgPP.kraus_apply_batch(kraus, rhos, pos)
+    E = [IQOpt(QOpt(K), QVar([f"q{p}" for p in pos])).extend(QVar([f"q{i}" for i in range(n)])).qval.m_repr for K in kraus]
+    for rho, out in zip(rhos, res):
+        assert np.allclose(out, sum(K @ rho @ K.conj().T for K in E))
@@ -0,0 +1,108 @@
+import gc
+
+import pytest
+
+from rem.mTLC import Env, TermError
+from rem.qplcomp import QVar
+from rem.qplcomp.qexpr.eqvar import EQVar
+
+
+def term(i : int) -> EQVar:
+    return EQVar(QVar([f"q{i}"]))
+
+
+def test_copies_are_independent():
+    env = Env()
+    env["a"] = term(0)
+    copy = env.copy()
+    copy["b"] = term(1)
+    env["c"] = term(2)
+
+    assert list(env.defs.keys()) == ["a", "c"]
+    assert list(copy.defs.keys()) == ["a", "b"]
+    assert copy.eval_cache is env.eval_cache
+
+    with pytest.raises(TermError):
+        copy["a"] = term(3)
+
+
+def test_append_deduplicates():
+    env = Env()
+    env["a"] = term(0)
+    env["X0"] = term(1)
+
+    # the first key defining the term is returned
+    assert env.append(term(0)) == "a"
+    assert env.append(EQVar(QVar(["q1"]))) == "X0"
+
+    # the unique names skip the used ones
+    assert env.append(term(2)) == "X1"
+    copy = env.copy()
+    assert copy.append(term(3)) == "X2"
+    assert env.append(term(4)) == "X2"
+    assert env.append(term(3)) == "X3"
+
+
+def test_eval_def_is_cached():
+    env = Env()
+    env["a"] = term(0)
+    cache = env.eval_cache
+
+    val = env.eval_def("a")
+    assert env.eval_def("a") is val
+    assert env.copy().eval_def("a") is val
+    assert (cache.evals, cache.hits) == (1, 2)
+
+
+def test_cache_entries_follow_the_definitions():
+    env = Env()
+    left, right = env.copy(), env.copy()
+    left["a"] = term(0)
+    right["a"] = term(1)
+
+    # the copies define the same name by different terms
+    assert left.eval_def("a") == term(0)
+    assert right.eval_def("a") == term(1)
+    assert left.eval_def("a") == term(0)
+
+    cache = env.eval_cache
+    cache.table("t")["k"] = 1
+    memo = cache.memo("m", dict)
+    memo["k"] = 1
+
+    cache.invalidate(env)
+    assert len(cache) == 0
+    assert cache.table("t") == {}
+    assert cache.memo("m", dict) is memo and memo == {"k": 1}
+
+
+def test_versions():
+    env = Env()
+    a, b = env.copy(), env.copy()
+    a["x"] = term(0)
+    a["y"] = term(1)
+    b["x"] = term(0)
+    b["y"] = term(1)
+    assert a.version is b.version
+
+    c = env.copy()
+    c["y"] = term(1)
+    c["x"] = term(0)
+    assert c.version is not a.version
+    assert env.version is Env.ROOT_VERSION
+
+
+def test_versions_released_with_the_terms():
+    env = Env()
+    cache = env.eval_cache
+    env["a"] = term(0)
+    n = len(cache._versions)
+
+    for i in range(100):
+        copy = env.copy()
+        copy[f"x{i}"] = term(i + 1)
+        del copy
+    gc.collect()
+
+    # the versions of the discarded definitions are released
+    assert len(cache._versions) == n
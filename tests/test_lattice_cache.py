@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import QOpt, QProj
+from rem.qplcomp.qval import LatticeCache, lattice_cache
+
+
+def random_proj(rng, qnum : int) -> QProj:
+    d = 2**qnum
+    A = rng.normal(size = (d, d // 2)) + 1j * rng.normal(size = (d, d // 2))
+    return QProj(np.linalg.qr(A)[0])
+
+
+@pytest.fixture
+def cache():
+    '''
+    The shared cache, emptied before the test and restored after it.
+    '''
+    lattice_cache.clear()
+    lattice_cache.reset_stats()
+    yield lattice_cache
+    lattice_cache.enabled = True
+    lattice_cache.budget = LatticeCache().budget
+    lattice_cache.clear()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_cached_results_match_uncached(cache, seed):
+    rng = np.random.default_rng(seed)
+    P, Q, R = random_proj(rng, 3), random_proj(rng, 3), random_proj(rng, 3)
+
+    def calculate():
+        return [(P | Q).m_repr, (P & Q).m_repr, (~ P).m_repr, P.Sasaki_imply(Q & R).m_repr, (P & Q) <= (P | R)]
+
+    cache.enabled = False
+    expected = calculate()
+    cache.enabled = True
+    first, second = calculate(), calculate()
+
+    for a, b, c in zip(expected, first, second):
+        assert np.allclose(a, b) and np.allclose(a, c)
+    assert cache.hits > 0
+
+
+def test_keys(cache):
+    rng = np.random.default_rng(0)
+    P, Q = random_proj(rng, 2), random_proj(rng, 2)
+
+    res = P | Q
+    # the symmetric operations ignore the order of operands
+    assert Q | P is res
+    # the operands are keyed by their contents, not by the objects
+    assert QProj(P.basis) | QProj(Q.basis) is res
+    assert cache.stats()['ops']['disjunct'] == (2, 1)
+
+    # the dense operators are keyed by their matrices, and the projectors in basis representation by their probes (see `QProj._digest`)
+    assert QOpt(P.m_repr) | QOpt(Q.m_repr) == res
+    assert QOpt(P.m_repr) | QOpt(Q.m_repr) is QOpt(P.m_repr) | QOpt(Q.m_repr)
+
+    # the results have derived fingerprints, so that they are cached operands without hashing their contents
+    assert res & P is res & P
+    assert cache.stats()['ops']['conjunct'] == (1, 1)
+
+
+def test_projectors_are_not_materialized(cache, monkeypatch):
+    rng = np.random.default_rng(0)
+    d = 2**8
+    A, B = (QProj(np.linalg.qr(rng.normal(size = (d, 3)) + 1j * rng.normal(size = (d, 3)))[0]) for _ in range(2))
+
+    def no_matrix(self):
+        raise AssertionError("the projector is materialized")
+    monkeypatch.setattr(QProj, "_matrix", no_matrix)
+
+    res = (A | B) & ~ A
+    assert (A | B) & ~ A is res
+    assert A.Sasaki_imply(B) is A.Sasaki_imply(B)
+    assert res.rank == 3 and cache.hits > 0
+
+
+def test_budget_evicts_least_recently_used(cache):
+    rng = np.random.default_rng(0)
+    projs = [random_proj(rng, 4) for _ in range(4)]
+
+    results = [~ P for P in projs]
+    nbytes = cache.nbytes // len(cache)
+
+    cache.budget = 2 * nbytes
+    assert len(cache) == 2 and cache.evictions == 2
+    assert cache.nbytes <= cache.budget
+
+    # the recent results are kept, and the evicted ones are calculated again
+    assert ~ projs[3] is results[3]
+    assert ~ projs[0] is not results[0]
+    assert ~ projs[0] == results[0]
@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import linalgPP
+
+
+PREC = 1e-10
+
+
+def random_matrix(rng, rows : int, cols : int, rank : int) -> np.ndarray:
+    '''
+    A random complex matrix of the given rank.
+    '''
+    L = rng.normal(size = (rows, rank)) + 1j * rng.normal(size = (rows, rank))
+    R = rng.normal(size = (rank, cols)) + 1j * rng.normal(size = (rank, cols))
+    return L @ R
+
+def span_proj(B : np.ndarray) -> np.ndarray:
+    return B @ B.conj().T
+
+
+SHAPES = [(8, 3, 2), (8, 8, 8), (16, 24, 5), (4, 10, 4), (16, 1, 1), (8, 6, 0)]
+
+
+@pytest.mark.parametrize("rows, cols, rank", SHAPES)
+def test_column_space(rows, cols, rank):
+    A = random_matrix(np.random.default_rng(rows + cols), rows, cols, rank)
+    B = linalgPP.column_space(A, PREC)
+
+    assert B.shape == (rows, rank)
+    assert np.allclose(B.conj().T @ B, np.eye(rank))
+    # every column of A is in the span
+    assert np.allclose(span_proj(B) @ A, A)
+
+
+@pytest.mark.parametrize("rows, cols, rank", SHAPES)
+def test_row_and_null_space(rows, cols, rank):
+    A = random_matrix(np.random.default_rng(rows * cols), rows, cols, rank)
+    R = linalgPP.row_space(A, PREC)
+    N = linalgPP.right_null_space(A, PREC)
+
+    assert R.shape == (cols, rank) and N.shape == (cols, cols - rank)
+    assert np.allclose(A @ N, 0.)
+    # the row space and the null space are complementary
+    assert np.allclose(span_proj(R) + span_proj(N), np.eye(cols))
+
+
+def test_column_space_rules_out_dependent_columns():
+    v = np.array([1., 1j, 0., 0.]) / np.sqrt(2)
+    A = np.stack([v, 2 * v, v + 1e-13, np.array([0., 0., 1., 0.])], axis = 1)
+
+    B = linalgPP.column_space(A, PREC)
+    assert B.shape == (4, 2)
+
+    assert linalgPP.column_space(np.zeros((4, 0)), PREC).shape == (4, 0)
+
+
+#######################################################################
+# the batched property verification
+
+def random_unitary(rng, d : int) -> np.ndarray:
+    return np.linalg.qr(rng.normal(size = (d, d)) + 1j * rng.normal(size = (d, d)))[0]
+
+def random_hermitian(rng, d : int, w : np.ndarray) -> np.ndarray:
+    U = random_unitary(rng, d)
+    return U @ np.diag(w) @ U.conj().T
+
+def candidates(rng, d : int) -> list[np.ndarray]:
+    '''
+    Valid and near-miss inputs for every property: unitaries, projectors, effects, density operators, and their perturbations just beyond the precision.
+    '''
+    eps = 1e-6
+    U = random_unitary(rng, d)
+    P = random_hermitian(rng, d, (rng.random(d) < 0.5).astype(float))
+    E = random_hermitian(rng, d, rng.random(d))
+    rho = E / np.trace(E).real
+    return [
+        U, U * (1 + eps), U + eps * rng.normal(size = (d, d)),
+        P, P + eps * np.eye(d), P + 1j * eps * (np.eye(d, k = 1) - np.eye(d, k = -1)),
+        E, random_hermitian(rng, d, np.r_[rng.random(d - 1), 1 + 10 * eps]), random_hermitian(rng, d, np.r_[rng.random(d - 1), -10 * eps]),
+        rho, rho * (1 + 10 * eps), 2 * E,
+        rng.normal(size = (d, d)), np.zeros((d, d)), np.eye(d),
+    ]
+
+def reference(check : str, A : np.ndarray) -> bool:
+    '''
+    The per-matrix definitions of the properties, calculated with the general eigenvalue solver.
+    '''
+    herm = np.max(np.abs(A - A.conj().T)) < PREC
+    if check == "is_unitary":
+        return np.max(np.abs(A @ A.conj().T - np.eye(len(A)))) < PREC
+    if check == "is_projector":
+        return herm and np.max(np.abs(A @ A - A)) < PREC
+    if not herm:
+        return False
+    w = np.linalg.eigvals(A).real
+    if check == "is_spd":
+        return w.min() >= -PREC
+    if check == "is_pdo":
+        return w.min() >= -PREC and np.trace(A).real <= 1 + PREC
+    if check == "is_effect":
+        return w.min() >= -PREC and w.max() <= 1 + PREC
+    raise ValueError(check)
+
+
+CHECKS = ["is_unitary", "is_spd", "is_pdo", "is_effect", "is_projector"]
+
+
+@pytest.mark.parametrize("check", CHECKS)
+@pytest.mark.parametrize("d", [2, 4, 8, 32])
+def test_verify_stack_matches_per_matrix(check, d):
+    rng = np.random.default_rng(d)
+    S = np.stack(candidates(rng, d))
+    f = getattr(linalgPP, check)
+
+    single = [f(A, PREC) for A in S]
+    assert all(isinstance(r, bool) for r in single)
+    assert single == [reference(check, A) for A in S]
+
+    # the stack mixes valid and invalid candidates
+    res = f(S, PREC)
+    assert res.shape == (len(S),) and 0 < res.sum() < len(S)
+    assert list(res) == single
+
+    # the batch shape is kept
+    assert f(S[:12].reshape(3, 4, d, d), PREC).tolist() == np.reshape(single[:12], (3, 4)).tolist()
+
+
+@pytest.mark.parametrize("d", [2, 8])
+def test_loewner_le_stack_matches_per_matrix(d):
+    rng = np.random.default_rng(d)
+    A = np.stack([random_hermitian(rng, d, rng.random(d)) for _ in range(10)])
+    B = np.stack([A[i] + random_hermitian(rng, d, rng.random(d)) if i % 2 else random_hermitian(rng, d, rng.random(d)) for i in range(10)])
+
+    res = linalgPP.Loewner_le(A, B, PREC)
+    assert list(res) == [linalgPP.Loewner_le(a, b, PREC) for a, b in zip(A, B)]
+    assert list(res) == [np.linalg.eigvalsh(b - a)[0] >= -PREC for a, b in zip(A, B)]
+
+    # a single matrix is broadcast against the stack
+    assert list(linalgPP.Loewner_le(np.zeros((d, d)), B, PREC)) == [linalgPP.is_spd(b, PREC) for b in B]
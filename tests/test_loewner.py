@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import QOpt, QProj, QPLCompError, linalgPP
+from rem.qplcomp.qval import QVal
+
+
+def random_proj(rng, d : int, r : int) -> np.ndarray:
+    A = rng.normal(size = (d, r)) + 1j * rng.normal(size = (d, r))
+    Q = np.linalg.qr(A)[0][:, :r]
+    return Q @ Q.conj().T
+
+def random_effect(rng, d : int) -> np.ndarray:
+    w = rng.random(d)
+    U = np.linalg.qr(rng.normal(size = (d, d)) + 1j * rng.normal(size = (d, d)))[0]
+    return U @ np.diag(w) @ U.conj().T
+
+def reference_le(A : np.ndarray, B : np.ndarray) -> bool:
+    return bool(np.linalg.eigvalsh(B - A)[0] >= -1e-8)
+
+def proj_representations(P : np.ndarray) -> list[QOpt]:
+    '''
+    The representations of the projector `P`: dense without tags, dense tagged, and the plain and complemented bases.
+    '''
+    w, U = np.linalg.eigh(P)
+    return [QOpt(P), QOpt(P, is_projector = True), QProj(U[:, w > 0.5]), QProj(U[:, w < 0.5], True)]
+
+def effect_representations(E : np.ndarray) -> list[QOpt]:
+    return [QOpt(E), QOpt(E, is_effect = True)]
+
+
+def projector_pair(rng) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Two random projectors, where the first one is included in the second one in half of the cases.
+    '''
+    d = 2**int(rng.integers(1, 4))
+    P = random_proj(rng, d, int(rng.integers(0, d + 1)))
+    if rng.random() < 0.5:
+        # the join of P with another subspace contains P
+        R = random_proj(rng, d, int(rng.integers(0, d + 1)))
+        w, U = np.linalg.eigh(P + R)
+        return P, U[:, w > 1e-8] @ U[:, w > 1e-8].conj().T
+    return P, random_proj(rng, d, int(rng.integers(0, d + 1)))
+
+def effect_pair(rng) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Two random effects, where the first one is below the second one in half of the cases.
+    '''
+    d = 2**int(rng.integers(1, 4))
+    A = random_effect(rng, d)
+    if rng.random() < 0.5:
+        return 0.5 * A, 0.5 * A + 0.5 * random_effect(rng, d)
+    return A, random_effect(rng, d)
+
+
+def test_projector_pairs_match_eigvalsh():
+    rng = np.random.default_rng(0)
+    for _ in range(250):
+        P, Q = projector_pair(rng)
+        ref = reference_le(P, Q)
+        for A in proj_representations(P):
+            for B in proj_representations(Q):
+                assert A.Loewner_le(B) == ref
+
+
+def test_effect_pairs_match_eigvalsh():
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        E, F = effect_pair(rng)
+        ref = reference_le(E, F)
+        for A in effect_representations(E):
+            for B in effect_representations(F):
+                assert A.Loewner_le(B) == ref
+
+
+def test_mixed_pairs_match_eigvalsh():
+    rng = np.random.default_rng(2)
+    for _ in range(50):
+        d = 2**int(rng.integers(1, 4))
+        P, E = random_proj(rng, d, int(rng.integers(0, d + 1))), random_effect(rng, d)
+        for A in proj_representations(P):
+            for B in effect_representations(E):
+                assert A.Loewner_le(B) == reference_le(P, E)
+                assert B.Loewner_le(A) == reference_le(E, P)
+
+
+def test_non_hermitian_operators_are_rejected():
+    M = np.array([[0., 1.], [0., 0.]])
+    with pytest.raises(QPLCompError):
+        QOpt(M).Loewner_le(QOpt(np.eye(2)))
+
+
+def test_cholesky_decides_the_order_that_holds(monkeypatch):
+    rng = np.random.default_rng(3)
+    E, F = 0.5 * random_effect(rng, 8), 0.5 * random_effect(rng, 8)
+
+    def no_eigvalsh(*args, **kwargs):
+        raise AssertionError("eigvalsh is called")
+    monkeypatch.setattr(np.linalg, "eigvalsh", no_eigvalsh)
+
+    assert linalgPP.Loewner_le(E, E + F, QVal.prec)
+    assert linalgPP.Loewner_le(np.stack([E, F]), np.stack([E + F, 2 * F]), QVal.prec).all()
+
+
+def test_projector_le_on_stacks():
+    rng = np.random.default_rng(4)
+    pairs = [projector_pair(rng) for _ in range(20)]
+    pairs = [(P, Q) for P, Q in pairs if len(P) == 4] + [(np.zeros((4, 4)), np.eye(4)), (np.eye(4), np.zeros((4, 4)))]
+
+    Ps, Qs = np.stack([P for P, _ in pairs]), np.stack([Q for _, Q in pairs])
+    res = linalgPP.projector_le(Ps, Qs, QVal.prec)
+
+    assert res.shape == (len(pairs),)
+    assert list(res) == [reference_le(P, Q) for P, Q in pairs]
+    assert list(res) == [linalgPP.projector_le(P, Q, QVal.prec) for P, Q in pairs]
@@ -0,0 +1,161 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import QVar, QOpt, IQOpt, QProj
+from rem.qplcomp.qexpr.eiqopt import EIQOpt
+from rem.qrefine.language.ast import *
+from rem.qrefine.language.semantics import assertion
+from rem.qrefine.language.semantics.assertion import wlp
+from rem.qrefine.language.semantics.loop import loop_superop, loop_iterate, loop_wlp, loop_wlp_superop, LoopCompileError
+from rem.qrefine.language.semantics.state import calc, calc_iter
+from rem.qrefine.language.semantics.superop import superop
+
+from conftest import close
+
+
+QUBITS = ["q1", "q2", "q3"]
+
+
+def random_qvar(rng, n_max = 2) -> QVar:
+    return QVar(list(rng.choice(QUBITS, rng.integers(1, n_max + 1), replace = False)))
+
+def random_proj(rng, qvar = None) -> IQOpt:
+    qvar = qvar or random_qvar(rng)
+    d = 2**qvar.qnum
+    A = rng.normal(size = (d, rng.integers(1, d))) + 1j * rng.normal(size = (d, 1))
+    return IQOpt(QProj(np.linalg.qr(A)[0]), qvar)
+
+def random_unitary(rng) -> IQOpt:
+    qvar = random_qvar(rng)
+    d = 2**qvar.qnum
+    A = rng.normal(size = (d, d)) + 1j * rng.normal(size = (d, d))
+    return IQOpt(QOpt(np.linalg.qr(A)[0]), qvar)
+
+def random_body(rng, depth : int) -> QProgAst:
+    '''
+    A random program without prescriptions and loops.
+    '''
+    c = rng.integers(0, 6) if depth > 0 else rng.integers(0, 3)
+    if c == 0:
+        return AstUnitary(EIQOpt(random_unitary(rng)))
+    if c == 1:
+        return AstAssert(EIQOpt(random_proj(rng)))
+    if c == 2:
+        return AstInit(EQVar(QVar([str(rng.choice(QUBITS))])))
+    if c == 3:
+        return AstIf(EIQOpt(random_proj(rng)), random_body(rng, depth - 1), random_body(rng, depth - 1))
+    if c == 4:
+        return AstProb(random_body(rng, depth - 1), random_body(rng, depth - 1), float(rng.random()))
+    return AstSeq(random_body(rng, depth - 1), random_body(rng, depth - 1))
+
+
+def naive_loop_wlp(P : IQOpt, S : QProgAst, post : IQOpt, env) -> IQOpt:
+    '''
+    The greatest fixpoint iterated until two iterations are equal.
+    '''
+    R = IQOpt.identity(False)
+    while True:
+        R_next = P.Sasaki_imply(wlp(S, R, env)) & (~ P).Sasaki_imply(post)
+        if R_next == R:
+            return R
+        R = R_next
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_loop_wlp_matches_naive_fixpoint(session, seed):
+    rng = np.random.default_rng(seed)
+    P, S, post = random_proj(rng), random_body(rng, 3), random_proj(rng, random_qvar(rng, 3))
+
+    res = loop_wlp(P, lambda R: wlp(S, R, session.env), post)
+    assert res == naive_loop_wlp(P, S, post, session.env)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_loop_wlp_superop_matches_loop_wlp(session, seed):
+    rng = np.random.default_rng(seed)
+    P, S, post = random_proj(rng), random_body(rng, 3), random_proj(rng, random_qvar(rng, 3))
+
+    res = loop_wlp_superop(P, superop(S, session.env), post)
+    assert res == loop_wlp(P, lambda R: wlp(S, R, session.env), post)
+
+
+@pytest.mark.parametrize("max_qnum", [0, 5])
+def test_wlp_of_while(session, monkeypatch, max_qnum):
+    monkeypatch.setattr(assertion, "LOOP_WLP_SUPEROP_MAX_QNUM", max_qnum)
+
+    rng = np.random.default_rng(7)
+    for _ in range(10):
+        P, S, post = random_proj(rng), random_body(rng, 2), random_proj(rng, random_qvar(rng, 3))
+        session.env.eval_cache.clear()
+        assert wlp(AstWhile(EIQOpt(P), S), post, session.env) == naive_loop_wlp(P, S, post, session.env)
+
+
+def unrolled(P : IQOpt, S : QProgAst, rho : IQOpt, env, k : int = 400) -> IQOpt:
+    '''
+    The sum of the outputs of the first `k` unfoldings.
+    '''
+    P_comp = ~ P
+    res = IQOpt.zero(is_rho = True)
+    for _ in range(k):
+        res = res + P_comp @ rho @ P_comp
+        rho = calc_iter(S, P @ rho @ P, env)
+    return res
+
+
+LOOPS = [
+    ("P1[q1]", "H[q1]; CX[q1 q2];"),
+    ("P1[q1]", "{ H[q1]; [\\oplus 0.3] CX[q2 q1]; }"),
+    ("P1[q1]", "if P1[q2] then H[q1]; else X[q2]; end"),
+    ("P0[q1] \\otimes P0[q2]", "[q1] :=0 H[q1]; H[q2];"),
+]
+
+
+def test_wlp_of_while_counts_qubits_before_compiling(session, monkeypatch):
+    monkeypatch.setattr(assertion, "LOOP_WLP_SUPEROP_MAX_QNUM", 2)
+
+    def no_superop(*args):
+        raise AssertionError("the body is compiled")
+    monkeypatch.setattr(assertion, "superop", no_superop)
+
+    rng = np.random.default_rng(3)
+    P, post = random_proj(rng, QVar(["q1"])), random_proj(rng, QVar(["q1"]))
+    S = AstSeq(AstUnitary(EIQOpt(random_unitary(rng))), AstInit(EQVar(QVar(["q2", "q3"]))))
+    assert wlp(AstWhile(EIQOpt(P), S), post, session.env) == naive_loop_wlp(P, S, post, session.env)
+
+
+@pytest.mark.parametrize("P, body", LOOPS)
+def test_loop_superop_and_iterate_match_unrolled(session, P, body):
+    P = session.define("guard", P).iqopt
+    S = session.define("body", body)
+    rho = session.define("rho", "(0.5 [|00>] + 0.5 [|11>])[q1 q2]").iqopt
+
+    ref = unrolled(P, S, rho, session.env)
+
+    so = loop_superop(P, superop(S, session.env))
+    assert close(so.apply(rho), ref)
+    assert close(loop_iterate(P, lambda r: calc_iter(S, r, session.env), rho), ref)
+
+
+@pytest.mark.parametrize("body", ["skip", "H[q2]; H[q2];", "X[q2];"])
+def test_non_terminating_loop(session, body):
+    P = session.define("guard", "P1[q1]").iqopt
+    S = session.define("body", body)
+    rho = session.define("rho", "[|1>][q1]").iqopt
+
+    # the states in P never leave the loop
+    with pytest.raises(LoopCompileError):
+        loop_superop(P, superop(S, session.env))
+
+    assert np.allclose(loop_iterate(P, lambda r: calc_iter(S, r, session.env), rho).qval.m_repr, 0.)
+
+    prog = session.define("prog", f"while P1[q1] do {body} end")
+    assert np.allclose(calc(prog, rho, session.env).qval.m_repr, 0.)
+
+
+def test_periodic_remainder(session):
+    # the part in P1[q1] flips q2 forever, and the part in P0[q1] leaves at once
+    prog = session.define("prog", "while P1[q1] do X[q2]; end")
+    rho = session.define("rho", "(0.5 [|00>] + 0.5 [|10>])[q1 q2]").iqopt
+    expected = session.define("expected", "(0.5 [|00>])[q1 q2]").iqopt
+
+    assert calc(prog, rho, session.env) == expected
@@ -0,0 +1,118 @@
+import random
+
+import pytest
+
+from rem.qplcomp import IQOpt
+from rem.qrefine.language.ast import *
+from rem.qrefine.language.semantics import optimize as opt
+from rem.qrefine.language.semantics.assertion import wlp
+from rem.qrefine.language.semantics.state import calc, calc_iter
+
+from conftest import close
+
+
+QUBITS = ["q1", "q2", "q3", "q4", "q5"]
+
+
+def random_circuit(rng : random.Random) -> str:
+    stmts = []
+    for _ in range(rng.randint(2, 25)):
+        r = rng.random()
+        if r < 0.5:
+            g = rng.choice(["H", "X", "S", "Z", "Y"]) + f"[{rng.choice(QUBITS)}];"
+        elif r < 0.8:
+            a, b = rng.sample(QUBITS, 2)
+            g = f"{rng.choice(['CX', 'SWAP'])}[{a} {b}];"
+        elif r < 0.88:
+            a, b, c = rng.sample(QUBITS, 3)
+            g = f"CCX[{a} {b} {c}];"
+        elif r < 0.94:
+            g = f"if P1[{rng.choice(QUBITS)}] then X[{rng.choice(QUBITS)}]; H[{rng.choice(QUBITS)}]; else skip end"
+        else:
+            g = f"[{rng.choice(QUBITS)}] :=0"
+        stmts.append(g)
+        # the self-inverse gates repeated cancel
+        if rng.random() < 0.3 and g[0] in "HXZYC":
+            stmts.append(g)
+    return " ".join(stmts)
+
+def wlp_unfused(prog : QProgAst, post : IQOpt, env) -> IQOpt:
+    '''
+    The weakest liberal precondition calculated statement by statement, without the fusion.
+    '''
+    if isinstance(prog, AstAbort):
+        return IQOpt.identity(False)
+    if isinstance(prog, AstSkip):
+        return post
+    if isinstance(prog, AstAssert):
+        return prog.P.eval(env).iqopt.Sasaki_imply(post)
+    if isinstance(prog, AstInit):
+        return post.initwlp(prog.eqvar.eval(env).qvar)
+    if isinstance(prog, AstUnitary):
+        U = prog.U.eval(env).iqopt
+        return U.dagger() @ post @ U
+    if isinstance(prog, AstSeq):
+        for S in reversed(prog.stmts):
+            post = wlp_unfused(S, post, env)
+        return post
+    if isinstance(prog, AstIf):
+        P = prog.P.eval(env).iqopt
+        return P.Sasaki_imply(wlp_unfused(prog.S1, post, env)) & (~ P).Sasaki_imply(wlp_unfused(prog.S0, post, env))
+    if isinstance(prog, AstProb):
+        return wlp_unfused(prog.S0, post, env) & wlp_unfused(prog.S1, post, env)
+    pytest.fail(f"The oracle does not support the program {prog}.")
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_fusion_preserves_semantics(session, seed):
+    prog = session.define("prog", random_circuit(random.Random(seed)))
+    post = session.define("post", "([|00000>] \\vee [|10101>])[q1 q2 q3 q4 q5]").iqopt
+
+    assert wlp(prog, post, session.env) == wlp_unfused(prog, post, session.env)
+
+    for i, code in enumerate(["[0.6|00000> + 0.8|11010>][q1 q2 q3 q4 q5]", "(0.5 [|00000>] + 0.5 [|11111>])[q1 q2 q3 q4 q5]"]):
+        rho = session.define(f"rho{i}", code).iqopt
+        assert close(calc(prog, rho, session.env), calc_iter(prog, rho, session.env))
+
+
+@pytest.mark.parametrize("code", [
+    "H[q1]; CX[q1 q2]; abort",
+    "H[q1]; assert Pp[q1] H[q1]; CX[q1 q2];",
+    "H[q1]; X[q2]; { CX[q2 q3]; [\\oplus 0.3] H[q2]; } CX[q3 q1]; H[q1];",
+])
+def test_fusion_around_other_statements(session, code):
+    prog = session.define("prog", code)
+    post = session.define("post", "([|00000>] \\vee [|10101>])[q1 q2 q3 q4 q5]").iqopt
+
+    assert wlp(prog, post, session.env) == wlp_unfused(prog, post, session.env)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_blocks(session, seed):
+    prog = session.define("prog", random_circuit(random.Random(seed)))
+    stmts = prog.stmts if isinstance(prog, AstSeq) else (prog,)
+    fused = opt.fuse_stmts(stmts, session.env)
+
+    assert len(fused) <= len(stmts)
+    # the other statements are kept in order
+    assert [S for S in fused if not isinstance(S, AstUnitary)] == [S for S in stmts if not isinstance(S, AstUnitary)]
+    for S in fused:
+        if isinstance(S, AstUnitary):
+            assert S.U.eval(session.env).iqopt.qnum <= opt.FUSE_MAX_QNUM
+
+
+def test_cancellation(session):
+    prog = session.define("prog", "H[q1]; CX[q1 q2]; S[q2]; S[q2]^\\dagger; CX[q1 q2]; H[q1];")
+    assert opt.fused_stmts(prog, session.env) == ()
+    assert isinstance(opt.optimize(prog, session.env), AstSkip)
+
+    # the cancellation does not cross other statements
+    prog = session.define("prog2", "H[q1]; [q2] :=0 H[q1];")
+    assert len(opt.fused_stmts(prog, session.env)) == 3
+
+
+def test_fused_stmts_are_cached(session):
+    prog = session.define("prog", "H[q1]; CX[q1 q2]; X[q2];")
+    fused = opt.fused_stmts(prog, session.env)
+    assert opt.fused_stmts(prog, session.env) is fused
+    assert len(fused) == 1
@@ -0,0 +1,86 @@
+import pickle
+import random
+
+import pytest
+
+from rem.mTLC import PMap
+
+
+class Key:
+    '''
+    A key with a chosen hash, for the collisions.
+    '''
+    def __init__(self, name : str, h : int):
+        self.name, self.h = name, h
+
+    def __hash__(self) -> int:
+        return self.h
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Key) and self.name == other.name
+
+    def __repr__(self) -> str:
+        return f"Key({self.name!r})"
+
+
+def check(m : PMap, d : dict) -> None:
+    assert len(m) == len(d)
+    assert m.items() == list(d.items())
+    for key, value in d.items():
+        assert key in m and m[key] == value and m.get(key) == value
+    assert m == d
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_dict_with_copies(seed):
+    '''
+    Random assignments on a family of copies, compared with dictionaries copied in the same way.
+    '''
+    rng = random.Random(seed)
+    maps, dicts = [PMap()], [{}]
+    for _ in range(2000):
+        i = rng.randrange(len(maps))
+        if rng.random() < 0.1:
+            maps.append(maps[i].copy())
+            dicts.append(dicts[i].copy())
+            continue
+
+        key = rng.choice([rng.randrange(300), f"k{rng.randrange(300)}", (rng.randrange(10), "t")])
+        value = rng.random()
+        maps[i][key] = value
+        dicts[i][key] = value
+
+    for m, d in zip(maps, dicts):
+        check(m, d)
+
+
+def test_collisions():
+    d = {}
+    m : PMap = PMap()
+    # the same full hash (a bucket), the same low bits only (deep nodes), and a negative hash
+    keys = [Key(f"a{i}", 12345) for i in range(4)] \
+         + [Key(f"b{i}", (i << 60) | 7) for i in range(4)] \
+         + [Key("c", -1), Key("d", 2**64 - 1)]
+    for i, key in enumerate(keys):
+        m[key] = d[key] = i
+    c = m.copy()
+    for key in keys[::2]:
+        m[key] = d[key] = -1
+
+    check(m, d)
+    check(c, {key : i for i, key in enumerate(keys)})
+    assert Key("a9", 12345) not in m and Key("b9", 7) not in m
+
+
+def test_order_and_pickle():
+    m = PMap([("x", 1), ("y", 2), ("z", 3)])
+    m["x"] = 4
+    m["w"] = 5
+
+    # the order of insertion is kept when a value is replaced, as in `dict`
+    assert m.keys() == ["x", "y", "z", "w"]
+    assert pickle.loads(pickle.dumps(m)) == m
+    assert m != {"x": 4} and m != PMap([("x", 4), ("y", 2), ("z", 3), ("w", 6)])
+
+    with pytest.raises(KeyError):
+        m["v"]
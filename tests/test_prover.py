@@ -0,0 +1,63 @@
+from rem.qrefine.language.ast import AstPres
+
+
+def frame(session):
+    return session.mls.selected_frame
+
+
+def test_steps_do_not_modify_earlier_frames(session):
+    session.run("Def Peq := [|00>] \\vee [|11>].")
+    session.run("Refine pf : < Peq[q1 q2], Peq[q1 q2] >.")
+    session.run("Step If P0[q1].")
+
+    before = frame(session)
+    tree, goals = str(before.refine_proof), [str(g) for g in before.current_goals]
+
+    session.run("Step skip.")
+    after = frame(session)
+
+    assert str(before.refine_proof) == tree
+    assert [str(g) for g in before.current_goals] == goals
+    assert str(after.refine_proof) != tree
+    assert len(after.current_goals) == len(goals) - 1
+
+    # the untouched goal is shared by the frames
+    assert after.current_goals[0] is before.current_goals[1]
+
+
+def test_choose_is_kept(session):
+    session.run("Refine pf : < P0[q], P0[q] >.")
+    session.run("Step If P0[q].")
+    second = frame(session).current_goals[1]
+
+    # the goals are numbered from 1
+    session.run("Choose 2.")
+    assert frame(session).current_goals[0] is second
+
+    session.run("Def x := P1.")
+    assert frame(session).current_goals[0] is second
+
+
+def test_step_backward_restores_the_goals(session):
+    session.run("Refine pf : < P0[q], P0[q] >.")
+    session.run("Step If P0[q].")
+    goals = frame(session).current_goals
+
+    session.run("Step skip.")
+    session.mls.step_backward()
+    assert frame(session).current_goals == goals
+
+
+def test_long_refinement(session):
+    '''
+    A refinement of nested sequential compositions, which exhausted the recursion when the proof trees were deep-copied.
+    '''
+    session.run("Refine pf : < P0[q], P0[q] >.")
+    for _ in range(150):
+        session.run("Step Seq P0[q].")
+    assert len(frame(session).current_goals) == 151
+
+    for _ in range(151):
+        session.run("Step skip.")
+    assert frame(session).current_goals == []
+    assert isinstance(frame(session).refine_proof, AstPres)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from rem.qrefine.language.semantics.pure import Ensemble, calc_pure, pure_vector
+from rem.qrefine.language.semantics.state import calc, calc_iter
+
+from conftest import close
+
+
+PROGRAMS = [
+    "H[q0]; CX[q0 q1]; X[q2];",
+    "H[q0]; if P1[q0] then X[q1]; else H[q2]; end",
+    "H[q0]; H[q1]; [q0] :=0 CX[q1 q2];",
+    "H[q2]; assert Pp[q2] { X[q0]; [\\oplus 0.3] H[q1]; }",
+    "H[q0]; if P1[q0] then [q1 q2] :=0 else assert P0[q0] CX[q0 q1]; end",
+]
+
+# every branch is pruned on the input |0000>
+EMPTY_PROGRAMS = [
+    "if P1[q3] then skip else abort end",
+    "if P1[q3] then X[q0]; else assert P1[q2] skip end",
+    "{ abort [\\oplus 0.5] assert P1[q1] }",
+]
+
+
+@pytest.mark.parametrize("code", PROGRAMS + EMPTY_PROGRAMS)
+def test_calc_pure_matches_calc_iter(session, code):
+    rho = session.define("rho", "[0.6|0000> + 0.8|1010>][q0 q1 q2 q3]").iqopt
+    prog = session.define("prog", code)
+
+    psi = pure_vector(rho)
+    assert psi is not None
+
+    ens = calc_pure(prog, Ensemble(psi.reshape((1,) + (2,) * rho.qnum), rho.qvar), session.env)
+    assert close(ens.iqopt(), calc_iter(prog, rho, session.env))
+
+
+@pytest.mark.parametrize("code", EMPTY_PROGRAMS)
+def test_calc_all_branches_pruned(session, code):
+    rho = session.define("rho", "[|0000>][q0 q1 q2 q3]").iqopt
+    prog = session.define("prog", code)
+
+    res = calc(prog, rho, session.env)
+    assert np.allclose(res.qval.m_repr, 0.)
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import QOpt, QProj, QKron
+
+
+N = 4
+
+
+def dense_extension(A : np.ndarray, pos : tuple[int, ...], n : int) -> np.ndarray:
+    '''
+    The matrix of `A ⊗ I` on `n` qubits, where `A` acts on the qubits `pos`, by the dense Kronecker product and a permutation.
+    '''
+    k = len(pos)
+    rest = [i for i in range(n) if i not in pos]
+    M = np.kron(A, np.eye(2**(n - k))).reshape((2,) * 2 * n)
+    order = [0] * n
+    for i, p in enumerate(list(pos) + rest):
+        order[p] = i
+    return M.transpose(order + [n + i for i in order]).reshape(2**n, 2**n)
+
+def random_layout(rng, projector : bool = False) -> tuple[QKron, np.ndarray]:
+    '''
+    A random `QKron` on `N` qubits, with factors on disjoint random positions and some positions left to the identity, and its dense matrix.
+    '''
+    qubits = list(rng.permutation(N))
+    factors = []
+    M = np.eye(2**N, dtype = complex)
+    while len(qubits) > 0:
+        k = int(rng.integers(1, min(2, len(qubits)) + 1))
+        pos, qubits = tuple(int(q) for q in qubits[:k]), qubits[k:]
+        if rng.random() < 0.25:
+            continue
+
+        d = 2**k
+        A = rng.normal(size = (d, d)) + 1j * rng.normal(size = (d, d))
+        if projector:
+            B = np.linalg.qr(A)[0][:, :int(rng.integers(1, d + 1))]
+            opt = QProj(B) if rng.random() < 0.5 else QOpt(B @ B.conj().T)
+            A = B @ B.conj().T
+        else:
+            A = A + A.conj().T
+            opt = QOpt(A)
+        factors.append((opt, pos))
+        M = M @ dense_extension(A, pos, N)
+
+    return QKron(N, factors), M
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_algebra_matches_dense(seed):
+    rng = np.random.default_rng(seed)
+    (A, MA), (B, MB) = random_layout(rng), random_layout(rng)
+
+    assert np.allclose(A.m_repr, MA)
+    assert np.allclose((A @ B).m_repr, MA @ MB)
+    assert np.allclose((A @ QOpt(MB)).m_repr, MA @ MB)
+    assert np.allclose((A + B).m_repr, MA + MB)
+    assert np.allclose((QOpt(MA) + B).m_repr, MA + MB)
+    assert np.allclose(A.dagger().m_repr, MA.conj().T)
+    assert np.allclose(A.scale(0.5j).m_repr, 0.5j * MA)
+
+    perm = [int(p) for p in rng.permutation(N)]
+    assert np.allclose(A.permute(perm).m_repr, QOpt(MA).permute(perm).m_repr)
+    assert np.allclose(A.tensor(QOpt(np.diag([1., 2.]))).m_repr, np.kron(MA, np.diag([1., 2.])))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_trace_and_equality_match_dense(seed):
+    rng = np.random.default_rng(seed)
+    (A, MA), (B, MB) = random_layout(rng), random_layout(rng)
+
+    qls = [int(q) for q in rng.choice(N, int(rng.integers(0, N + 1)), replace = False)]
+    assert np.allclose(A.trace(qls).m_repr, QOpt(MA).trace(qls).m_repr)
+
+    assert A == QOpt(MA) and QOpt(MA) == A
+    assert (A == B) == np.allclose(MA, MB)
+
+    # the scalars moved between the factors
+    assert A == QKron.of(QOpt(MA))
+    if len(A.factors) >= 2:
+        (X, pX), (Y, pY) = A.factors[:2]
+        moved = QKron(N, [(X.scale(2.), pX), (Y.scale(0.5), pY)] + list(A.factors[2:]))
+        assert moved == A
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_projector_lattice_matches_dense(seed):
+    rng = np.random.default_rng(seed)
+    (P, MP), (Q, MQ) = random_layout(rng, True), random_layout(rng, True)
+
+    assert (P <= Q) == QOpt(MP).Loewner_le(QOpt(MQ))
+    assert P <= P
+    assert np.allclose((P & Q).m_repr, (QOpt(MP) & QOpt(MQ)).m_repr)
+    assert np.allclose((P & P).m_repr, MP)
+    assert np.allclose((P | Q).m_repr, (QOpt(MP) | QOpt(MQ)).m_repr)
+    assert np.allclose((~ P).m_repr, np.eye(2**N) - MP)
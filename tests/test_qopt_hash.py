@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import QVar, QOpt, QProj, QKron, IQOpt
+from rem.qplcomp.qval import QVal
+
+
+def random_opt(rng, qnum : int) -> np.ndarray:
+    d = 2**qnum
+    return rng.normal(size = (d, d)) + 1j * rng.normal(size = (d, d))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_equal_values_have_equal_hashes(seed):
+    rng = np.random.default_rng(seed)
+    M = random_opt(rng, 2)
+    A, B = QOpt(M), QOpt(M + 1e-12 * random_opt(rng, 2))
+
+    assert A == B
+    assert hash(A) == hash(B)
+    assert {A: 1}[B] == 1
+
+
+def test_representations_have_equal_hashes():
+    rng = np.random.default_rng(0)
+    basis = np.linalg.qr(random_opt(rng, 2)[:, :2])[0]
+    P = QProj(basis)
+    assert hash(P) == hash(QOpt(basis @ basis.conj().T))
+
+    # a single factor on all positions shares the hash of the factor
+    M = random_opt(rng, 2)
+    assert hash(QKron(2, [(QOpt(M), [0, 1])])) == hash(QOpt(M))
+
+
+def test_kron_hash_is_factor_by_factor(monkeypatch):
+    rng = np.random.default_rng(0)
+    X, Y = QOpt(random_opt(rng, 1)), QOpt(random_opt(rng, 1))
+    K = QKron(3, [(X, [0]), (Y, [2])])
+
+    def no_fuse(*args):
+        raise AssertionError("the operator is materialized")
+    monkeypatch.setattr(QKron, "_fuse", no_fuse)
+
+    # the order of the factors and the explicit identity factors do not matter
+    assert hash(K) == hash(QKron(3, [(Y, [2]), (QOpt.eye_opt(1), [1]), (X, [0])]))
+    assert hash(K) != hash(QKron(3, [(Y, [0]), (X, [2])]))
+
+
+def test_indexed_kron_hash_is_canonical(monkeypatch):
+    rng = np.random.default_rng(0)
+    M, N = random_opt(rng, 2), random_opt(rng, 1)
+    A = IQOpt(QOpt(M), QVar(["q1", "q2"]))
+    B = IQOpt(QOpt(N), QVar(["q0"]))
+    h_A = hash(A)
+
+    def no_fuse(*args):
+        raise AssertionError("the operator is materialized")
+    monkeypatch.setattr(QKron, "_fuse", no_fuse)
+
+    # the cylinder extensions to many qubits are hashed on their factors
+    qvar = QVar([f"q{i}" for i in range(14, 2, -1)] + ["q2", "q1"])
+    assert hash(A.extend(qvar)) == h_A
+    assert hash(IQOpt(A.qval, A.qvar, True).extend(qvar)) == hash(IQOpt(A.qval, A.qvar, True))
+
+    # the products of the same factors on the same qubits
+    AB = IQOpt(QKron(3, [(A.qval, [1, 2]), (B.qval, [0])]), QVar(["q0", "q1", "q2"]))
+    BA = IQOpt(QKron(4, [(B.qval, [3]), (A.qval, [0, 1])]), QVar(["q1", "q2", "q5", "q0"]))
+    assert hash(AB) == hash(BA)
+
+
+def test_indexed_hash_is_canonical():
+    rng = np.random.default_rng(0)
+    M = random_opt(rng, 2)
+    A = IQOpt(QOpt(M), QVar(["q1", "q2"]))
+
+    # reordered qubits
+    B = IQOpt(QOpt(M.reshape(2, 2, 2, 2).transpose(1, 0, 3, 2).reshape(4, 4)), QVar(["q2", "q1"]))
+    # the cylinder extension
+    C = A.extend(QVar(["q3", "q1", "q2"]))
+
+    assert A == B == C
+    assert hash(A) == hash(B) == hash(C)
+
+
+def test_hash_does_not_change_with_precision(monkeypatch):
+    rng = np.random.default_rng(0)
+    A = QOpt(random_opt(rng, 2))
+    I = IQOpt(A, QVar(["q1", "q2"]))
+    table = {A: "A", I: "I"}
+    h_A, h_I = hash(A), hash(I)
+
+    monkeypatch.setattr(QVal, "prec", 1e-6)
+    assert hash(A) == h_A and hash(I) == h_I
+    assert table[A] == "A" and table[I] == "I"
+
+    # the hash of a new instance does not depend on the precision either
+    assert hash(QOpt(A.m_repr)) == h_A
+
+
+def test_equal_values_across_the_grid():
+    '''
+    The documented exception: equal values whose entries lie on the two sides of a grid line have different hashes, so the lookup misses.
+    '''
+    q = QOpt.HASH_GRID / 2
+    M = np.zeros((2, 2))
+    A = QOpt(M + (q / 2 - 1e-13))
+    B = QOpt(M + (q / 2 + 1e-13))
+
+    assert A == B
+    assert hash(A) != hash(B)
+    assert B not in {A}
+
+
+def test_unequal_values_are_not_confused():
+    A = QOpt(np.eye(2))
+    B = QOpt(np.eye(2) + 1e-8)
+
+    # equal hashes, because the difference is below the grid
+    assert hash(A) == hash(B)
+    assert A != B
+    assert B not in {A}
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import QOpt, QProj
+
+
+def orthonormal(rng, d : int, r : int) -> np.ndarray:
+    A = rng.normal(size = (d, r)) + 1j * rng.normal(size = (d, r))
+    return np.linalg.qr(A)[0][:, :r]
+
+def proj(B : np.ndarray) -> np.ndarray:
+    return B @ B.conj().T
+
+def span(*Ms : np.ndarray) -> np.ndarray:
+    '''
+    The projector onto the joined ranges of the matrices, calculated by numpy.
+    '''
+    U, S, _ = np.linalg.svd(np.hstack(Ms))
+    return proj(U[:, :np.count_nonzero(S > 1e-8)])
+
+def pair(rng, qnum : int) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Two random subspaces with a common part, so that the conjunction is not trivial.
+    '''
+    d = 2**qnum
+    common = orthonormal(rng, d, rng.integers(0, d // 2 + 1))
+    A = np.hstack((common, rng.normal(size = (d, rng.integers(0, d // 4 + 1)))))
+    B = np.hstack((common, rng.normal(size = (d, rng.integers(0, d // 4 + 1)))))
+    return span(A) if A.shape[1] > 0 else np.zeros((d, d)), span(B) if B.shape[1] > 0 else np.zeros((d, d))
+
+def representations(M : np.ndarray) -> list[QOpt]:
+    '''
+    The dense representation, and the basis representations of the projector `M`: plain, and complemented.
+    '''
+    w, U = np.linalg.eigh(M)
+    return [QOpt(M), QProj(U[:, w > 0.5]), QProj(U[:, w < 0.5], True)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_lattice_operations_match_dense(seed):
+    rng = np.random.default_rng(seed)
+    P, Q = pair(rng, int(rng.integers(1, 5)))
+    I = np.eye(len(P))
+
+    meet = I - span(I - P, I - Q)
+    for A in representations(P):
+        for B in representations(Q):
+            assert np.allclose((A | B).m_repr, span(P, Q))
+            assert np.allclose((A & B).m_repr, meet)
+            assert np.allclose((~ A).m_repr, I - P)
+            assert np.allclose(A.Sasaki_imply(B).m_repr, span(I - P, meet))
+            assert (A <= B) == np.allclose(Q @ P, P)
+            assert (A == B) == np.allclose(P, Q)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_structure_matches_dense(seed):
+    rng = np.random.default_rng(seed)
+    P, Q = pair(rng, 2)
+
+    for A in representations(P):
+        for B in representations(Q):
+            assert np.allclose(A.tensor(B).m_repr, np.kron(P, Q))
+        assert np.allclose(A.permute([1, 0]).m_repr, P.reshape(2, 2, 2, 2).transpose(1, 0, 3, 2).reshape(4, 4))
+        if isinstance(A, QProj):
+            assert A.rank == round(np.trace(P).real)
+
+
+def test_support_and_eigen1space():
+    rng = np.random.default_rng(0)
+    B = orthonormal(rng, 8, 3)
+    M = B @ np.diag([1., 0.5, 2.]) @ B.conj().T
+
+    assert np.allclose(QOpt(M).support().m_repr, proj(B))
+    assert np.allclose(QOpt(M).eigen1space().m_repr, proj(B[:, :1]))
+    assert isinstance(QOpt(M).support(), QProj)
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import QVar, QOpt, IQOpt, QPLCompError, linalgPP
+from rem.qplcomp.qval import QVal
+from rem.qplcomp.qval.qso import QSOpt
+
+
+def random_kraus(rng, r : int, d : int) -> np.ndarray:
+    return rng.normal(size = (r, d, d)) + 1j * rng.normal(size = (r, d, d))
+
+def random_channel(rng, r : int, d : int) -> np.ndarray:
+    '''
+    Random Kraus operators of a trace-preserving channel, the blocks of an isometry `d -> r d`.
+    '''
+    V = np.linalg.qr(rng.normal(size = (r * d, d)) + 1j * rng.normal(size = (r * d, d)))[0]
+    return V.reshape(r, d, d)
+
+def random_state(rng, d : int) -> np.ndarray:
+    A = rng.normal(size = (d, d)) + 1j * rng.normal(size = (d, d))
+    rho = A @ A.conj().T
+    return rho / np.trace(rho)
+
+RESET = np.array([[[1., 0.], [0., 0.]], [[0., 1.], [0., 0.]]])
+
+
+@pytest.mark.parametrize("r, d", [(3, 4), (16, 4), (40, 4), (200, 8)])
+def test_kraus_compress_preserves_liouville(r, d):
+    # r < d^2 goes through the SVD, and r > d^2 through the eigendecomposition of the Choi matrix
+    kraus = random_kraus(np.random.default_rng(r), r, d)
+    res = linalgPP.kraus_compress(kraus, QVal.prec)
+
+    assert len(res) == min(r, d * d)
+    assert np.allclose(linalgPP.kraus_to_liouville(res), linalgPP.kraus_to_liouville(kraus))
+
+
+def test_kraus_compress_of_low_rank_stacks():
+    rng = np.random.default_rng(0)
+    # 30 > d^2 operators, all multiples of 2 operators
+    base = random_kraus(rng, 2, 4)
+    kraus = np.einsum('ra,aij->rij', rng.normal(size = (30, 2)), base)
+    res = linalgPP.kraus_compress(kraus, QVal.prec)
+
+    assert len(res) == 2
+    assert np.allclose(linalgPP.kraus_to_liouville(res), linalgPP.kraus_to_liouville(kraus))
+
+    zero = linalgPP.kraus_compress(np.zeros((5, 2, 2)), QVal.prec)
+    assert zero.shape == (1, 2, 2) and not zero.any()
+
+
+def test_is_qo():
+    rng = np.random.default_rng(1)
+    channel = random_channel(rng, 3, 4)
+
+    assert linalgPP.is_qo(RESET, QVal.prec)
+    assert linalgPP.is_qo(channel, QVal.prec)
+    assert linalgPP.is_qo(np.sqrt(0.5) * channel, QVal.prec)
+
+    # twice a channel
+    assert not linalgPP.is_qo(np.sqrt(2) * RESET, QVal.prec)
+    assert not linalgPP.is_qo(np.sqrt(2) * channel, QVal.prec)
+
+    assert QSOpt(RESET).is_qo
+    assert not QSOpt(RESET).scale(2).is_qo
+
+
+@pytest.mark.parametrize("names", [["q0"], ["q2", "q0"], ["q3", "q1"], ["q0", "q1", "q2", "q3"]])
+def test_kraus_extend_matches_iqopt_extend(names):
+    n, k = 4, len(names)
+    kraus = random_kraus(np.random.default_rng(k), 3, 2**k)
+    qvar, qvarT = QVar(names), QVar([f"q{i}" for i in range(n)])
+
+    res = linalgPP.kraus_extend(kraus, qvarT.to(qvar), n)
+    assert res.shape == (3, 2**n, 2**n)
+    for E, ext in zip(kraus, res):
+        assert np.allclose(ext, IQOpt(QOpt(E), qvar).extend(qvarT).qval.m_repr)
+
+
+def test_compose():
+    rng = np.random.default_rng(2)
+    A = QSOpt(random_channel(rng, 3, 4), True)
+    B = QSOpt(random_channel(rng, 2, 4), True)
+    rho = QOpt(random_state(rng, 4))
+
+    res = A.compose(B)
+    assert res.compressed and res.qo
+    assert (A @ B).apply(rho) == A.apply(B.apply(rho))
+    assert np.allclose(res.liouville, A.liouville @ B.liouville)
+
+    with pytest.raises(QPLCompError):
+        A.compose(QSOpt(RESET))
+
+
+def test_scale():
+    rng = np.random.default_rng(3)
+    S = QSOpt(random_channel(rng, 3, 2), True)
+    rho = QOpt(random_state(rng, 2))
+
+    assert np.allclose((0.3 * S).liouville, 0.3 * S.liouville)
+    assert (S * 0.3).apply(rho) == QOpt(0.3 * S.apply(rho).m_repr)
+    assert (0.3 * S).qo and (2 * S).qo is None
+
+    with pytest.raises(QPLCompError):
+        S.scale(-1)
+
+
+def test_dagger():
+    rng = np.random.default_rng(4)
+    S = QSOpt(random_kraus(rng, 3, 4))
+    rho, X = random_state(rng, 4), random_state(rng, 4)
+
+    assert np.allclose(S.dagger().liouville, S.liouville.conj().T)
+    # the adjoint: tr(S(rho) X) = tr(rho S^dagger(X))
+    lhs = np.trace(S.apply(QOpt(rho)).m_repr @ X)
+    rhs = np.trace(rho @ S.dagger().apply(QOpt(X)).m_repr)
+    assert np.isclose(lhs, rhs)
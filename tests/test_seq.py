@@ -0,0 +1,39 @@
+import numpy as np
+
+from rem.qrefine.language.ast import *
+from rem.qrefine.language.semantics.assertion import wlp
+from rem.qrefine.language.semantics.extract import extract
+from rem.qrefine.language.semantics.state import calc_iter
+
+
+# the gates are self-inverse, so every block of the gates followed by their reverse is the identity
+GATES = ["H[q0];", "CX[q0 q1];", "X[q2];", "CX[q1 q2];", "H[q1];"]
+BLOCK = GATES + GATES[::-1]
+
+def straight_line(N : int) -> str:
+    return " ".join(BLOCK[i % len(BLOCK)] for i in range(N))
+
+
+def test_nested_sequences_are_flattened(session):
+    S0, S1, S2 = session.define("S0", "H[q0];"), session.define("S1", "X[q1];"), session.define("S2", "CX[q0 q1];")
+
+    assert AstSeq(AstSeq(S0, S1), S2) == AstSeq(S0, AstSeq(S1, S2))
+    assert AstSeq(AstSeq(S0, S1), S2).stmts == (S0, S1, S2)
+    assert session.define("prog", "H[q0]; X[q1]; CX[q0 q1];").stmts == (S0, S1, S2)
+
+
+def test_long_straight_line_program(session):
+    # the recursive traversals raised RecursionError at a few hundred statements
+    N = 2000
+    prog = session.define("prog", straight_line(N))
+    assert isinstance(prog, AstSeq) and len(prog.stmts) == N
+
+    assert len(prog.prefix_str().splitlines()) == N
+    assert extract(prog) == prog
+    assert prog.get_prescription() == []
+
+    post = session.define("post", "[|101>][q0 q1 q2]").iqopt
+    assert wlp(prog, post, session.env) == post
+
+    rho = session.define("rho", "[|101>][q0 q1 q2]").iqopt
+    assert np.allclose(calc_iter(prog, rho, session.env).qval.m_repr, rho.qval.m_repr)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import QVar, QOpt, IQOpt
+from rem.qrefine.language.semantics.state import calc, calc_iter
+from rem.qrefine.language.semantics.superop import compile_prog
+
+
+PROGRAMS = [
+    "X[q0]; H[q0];",
+    "H[q0]; CX[q0 q1]; [q0] :=0",
+    "{ X[q0]; [\\oplus 0.3] H[q1]; } if P1[q0] then [q1] :=0 else CX[q1 q0]; end",
+    "H[q1]; assert Pp[q1] CX[q1 q0];",
+    "while P1[q0] do { H[q0]; [\\oplus 0.5] X[q1]; } end",
+]
+
+SEQUENCES = [
+    ("X[q0];", "H[q0];"),
+    ("H[q0];", "[q0] :=0"),
+    ("CX[q0 q1];", "H[q0]; CX[q1 q0];"),
+    ("if P1[q0] then X[q1]; else skip end", "H[q1];"),
+]
+
+
+def random_state(rng, qnum : int) -> np.ndarray:
+    d = 2**qnum
+    A = rng.normal(size = (d, d)) + 1j * rng.normal(size = (d, d))
+    rho = A @ A.conj().T
+    return rho / np.trace(rho)
+
+
+def test_sequence_runs_the_second_statement_on_the_result(session):
+    prog = session.define("prog", "X[q0]; H[q0];")
+    rho = session.define("rho", "[|0>][q0]").iqopt
+    minus = np.array([1., -1.]) / np.sqrt(2)
+
+    assert calc(prog, rho, session.env) == IQOpt(QOpt(np.outer(minus, minus)), QVar(["q0"]), True)
+
+
+@pytest.mark.parametrize("S0, S1", SEQUENCES)
+def test_calc_of_sequence_is_the_composition(session, S0, S1):
+    prog = session.define("prog", f"{S0} {S1}")
+    S0, S1 = session.define("S0", S0), session.define("S1", S1)
+    rho = IQOpt(QOpt(random_state(np.random.default_rng(0), 2)), QVar(["q0", "q1"]), True)
+
+    res = calc(prog, rho, session.env)
+    assert res == calc(S1, calc(S0, rho, session.env), session.env)
+    assert res == calc_iter(prog, rho, session.env)
+
+
+@pytest.mark.parametrize("code", PROGRAMS)
+def test_compile_prog_matches_calc_iter(session, code):
+    prog = session.define("prog", code)
+    rng = np.random.default_rng(1)
+
+    so = compile_prog(prog, session.env)
+    for _ in range(3):
+        rho = IQOpt(QOpt(random_state(rng, 2)), QVar(["q0", "q1"]), True)
+        assert so.apply(rho) == calc_iter(prog, rho, session.env)
@@ -0,0 +1,104 @@
+import copy
+import pickle
+import sys
+
+import numpy as np
+
+from rem.qplcomp import QVar, QOpt, QProj, QKron, IQOpt
+from rem.qplcomp.qexpr.eqopt import EQOpt
+from rem.qplcomp.qexpr.eiqopt import EIQOpt, EIQOptAdd
+from rem.qrefine.language.ast import AstPres, AstSkip, AstUnitary, AstSeq, AstProb
+
+
+def leaf(M : np.ndarray, names : list[str]) -> EIQOpt:
+    '''
+    A new leaf, with a new `IQOpt` object of the value.
+    '''
+    return EIQOpt(IQOpt(QOpt(M), QVar(names)))
+
+H = np.array([[1., 1.], [1., -1.]]) / np.sqrt(2)
+X = np.array([[0., 1.], [1., 0.]])
+
+
+def test_equal_terms_from_the_same_subterms_are_interned():
+    A, B = leaf(H, ["q"]), leaf(X, ["r"])
+    assert EIQOptAdd(A, B) is EIQOptAdd(A, B)
+    assert EIQOptAdd(A, B) is not EIQOptAdd(B, A)
+
+    U, V = AstUnitary(A), AstUnitary(B)
+    assert U is AstUnitary(A)
+    assert AstSeq(U, V) is AstSeq(U, V)
+    assert AstProb(U, V, 0.3) is AstProb(U, V, 0.3)
+    assert AstProb(U, V, 0.3) is not AstProb(U, V, 0.4)
+
+
+def test_structural_equality_across_objects():
+    # the leaves hold different operator objects, so that the terms are not interned
+    A1, A2 = leaf(H, ["q"]), leaf(H, ["q"])
+    assert A1 is not A2
+    assert A1 == A2 and hash(A1) == hash(A2)
+
+    S1 = AstSeq(AstUnitary(A1), AstSkip())
+    S2 = AstSeq(AstUnitary(A2), AstSkip())
+    assert S1 is not S2
+    assert S1 == S2 and hash(S1) == hash(S2)
+    assert {S1: 1}[S2] == 1
+
+    assert S1 != AstSeq(AstUnitary(leaf(X, ["q"])), AstSkip())
+    assert AstUnitary(A1) != AstUnitary(leaf(H, ["r"]))
+
+
+def test_hash_restored_after_copy_and_pickle():
+    S = AstProb(AstSeq(AstUnitary(leaf(H, ["q"])), AstUnitary(leaf(X, ["r"]))), AstSkip(), 0.5)
+    h = hash(S)
+
+    for T in (copy.deepcopy(S), pickle.loads(pickle.dumps(S))):
+        assert T is not S
+        assert T.__dict__['_hash'] == h
+        assert T == S and hash(T) == h
+
+
+def test_deep_terms_are_compared_without_recursion():
+    depth = 4 * sys.getrecursionlimit()
+
+    def nested(base : AstUnitary):
+        S = base
+        for _ in range(depth):
+            S = AstProb(AstSkip(), S, 0.5)
+        return S
+
+    S1, S2 = nested(AstUnitary(leaf(H, ["q"]))), nested(AstUnitary(leaf(H, ["q"])))
+    assert S1 is not S2
+    assert S1 == S2 and hash(S1) == hash(S2)
+    assert S1 != nested(AstUnitary(leaf(X, ["q"])))
+
+
+def test_leaves_are_hashed_without_materializing(monkeypatch):
+    rng = np.random.default_rng(0)
+    qvar = QVar([f"q{i}" for i in range(12)])
+    K = IQOpt(QOpt(rng.normal(size = (4, 4))), QVar(["q0", "q1"])).extend(qvar)
+    P = IQOpt(QProj(np.linalg.qr(rng.normal(size = (4, 2)))[0]), QVar(["q2", "q3"])).extend(qvar)
+    assert isinstance(K.qval, QKron) and isinstance(P.qval, QProj)
+
+    def no_materialization(*args):
+        raise AssertionError("the operator is materialized")
+    monkeypatch.setattr(QKron, "_fuse", no_materialization)
+    monkeypatch.setattr(QProj, "_matrix", no_materialization)
+
+    for iqopt in (K, P):
+        assert hash(EIQOpt(iqopt)) == hash(EIQOpt(iqopt))
+        assert hash(EQOpt(iqopt.qval)) == hash(EQOpt(iqopt.qval))
+
+
+def test_prescriptions_differ_by_refinement():
+    P = EIQOpt(IQOpt(QOpt(np.diag([1., 0.])), QVar(["q"])))
+    U = AstUnitary(EIQOpt(IQOpt(QOpt(np.diag([1., -1.])), QVar(["q"]))))
+
+    refined_skip, refined_unitary = AstPres(P, P, AstSkip()), AstPres(P, P, U)
+    assert refined_skip != refined_unitary
+    assert len({refined_skip, refined_unitary, AstPres(P, P)}) == 3
+
+    # the prescriptions are not interned, and the equal ones are equal structurally
+    again = AstPres(P, P, AstSkip())
+    assert again is not refined_skip
+    assert again == refined_skip and hash(again) == hash(refined_skip)
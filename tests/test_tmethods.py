@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import linalgPP
+from rem.qrefine.language.semantics.state import calc_iter
+
+
+def random_tensor(rng, qnum : int) -> np.ndarray:
+    d = 2**qnum
+    return (rng.normal(size = (d, d)) + 1j * rng.normal(size = (d, d))).reshape((2,) * 2 * qnum)
+
+def dense_extension(A : np.ndarray, pos : list[int], n : int) -> np.ndarray:
+    '''
+    The matrix of `A ⊗ I` on `n` qubits, where `A` acts on the qubits `pos`, by the dense Kronecker product and a permutation.
+    '''
+    k = len(pos)
+    rest = [i for i in range(n) if i not in pos]
+    M = np.kron(A.reshape(2**k, 2**k), np.eye(2**(n - k))).reshape((2,) * 2 * n)
+    # the qubits of the product are in the order pos + rest
+    order = [0] * n
+    for i, p in enumerate(pos + rest):
+        order[p] = i
+    return M.transpose(order + [n + i for i in order]).reshape(2**n, 2**n)
+
+def matrix(T : np.ndarray) -> np.ndarray:
+    d = 2**(T.ndim // 2)
+    return T.reshape(d, d)
+
+
+LAYOUTS = [(3, [1]), (3, [2, 0]), (4, [3, 1]), (4, [0, 1, 2]), (2, [0, 1]), (5, [4, 0, 2])]
+
+
+@pytest.mark.parametrize("n, pos", LAYOUTS)
+def test_apply_matches_dense(n, pos):
+    rng = np.random.default_rng(n)
+    A, T = random_tensor(rng, len(pos)), random_tensor(rng, n)
+    E = dense_extension(A, pos, n)
+
+    assert np.allclose(matrix(linalgPP.t_apply_left(A, T, pos)), E @ matrix(T))
+    assert np.allclose(matrix(linalgPP.t_apply_right(T, A, pos)), matrix(T) @ E)
+
+
+@pytest.mark.parametrize("n, pos", LAYOUTS)
+def test_add_local_matches_dense(n, pos):
+    rng = np.random.default_rng(n)
+    A, T = random_tensor(rng, len(pos)), random_tensor(rng, n)
+    T_before = T.copy()
+
+    res = linalgPP.t_add_local(T, A, pos)
+    assert np.allclose(matrix(res), matrix(T) + dense_extension(A, pos, n))
+    # the operand is not modified
+    assert np.array_equal(T, T_before)
+
+
+def test_Loewner_nonneg():
+    rng = np.random.default_rng(0)
+    V = rng.normal(size = (4, 4)) + 1j * rng.normal(size = (4, 4))
+    D = V @ V.conj().T
+
+    assert linalgPP.Loewner_nonneg(D, 1e-10)
+    assert not linalgPP.Loewner_nonneg(D - 2 * np.linalg.eigvalsh(D)[0] * np.eye(4), 1e-10)
+    assert linalgPP.Loewner_le(np.zeros((4, 4)), D, 1e-10) == linalgPP.Loewner_nonneg(D, 1e-10)
+
+
+def reset_by_kraus(M : np.ndarray, pos : list[int], n : int) -> np.ndarray:
+    '''
+    Reset the qubits one by one, by the Kraus operators `|0><0|` and `|0><1|` extended to `n` qubits.
+    '''
+    K0 = np.array([[1., 0.], [0., 0.]])
+    K1 = np.array([[0., 1.], [0., 0.]])
+    for p in pos:
+        E0, E1 = dense_extension(K0, [p], n), dense_extension(K1, [p], n)
+        M = E0 @ M @ E0.conj().T + E1 @ M @ E1.conj().T
+    return M
+
+
+@pytest.mark.parametrize("n, pos", [(1, [0]), (3, [1]), (3, [2, 0]), (4, [3, 1, 0]), (4, [0, 1, 2, 3])])
+def test_reset_matches_kraus(n, pos):
+    rng = np.random.default_rng(n)
+    T = random_tensor(rng, n)
+
+    assert np.allclose(matrix(linalgPP.t_reset(T, pos)), reset_by_kraus(matrix(T), pos, n))
+
+
+def test_init_statement(session):
+    prog = session.define("prog", "[q2 q0] :=0")
+    rho = session.define("rho", "(0.3 [|01>] + 0.5 [|11>] + 0.2 [|10>])[q0 q1]").iqopt
+
+    res = calc_iter(prog, rho, session.env)
+    # q2 is not in the input, and is appended in the zero state
+    expected = reset_by_kraus(np.kron(rho.qval.m_repr, np.diag([1., 0.])), [0], 3)
+    assert res.qvar.tuple == ("q0", "q1", "q2")
+    assert np.allclose(res.qval.m_repr, expected)
+    assert res.qval.pdo_tag == rho.qval.pdo_tag
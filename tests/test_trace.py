@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from rem.qplcomp import QVar, QOpt, QProj, IQOpt
+
+
+def random_opt(rng, qnum : int) -> np.ndarray:
+    d = 2**qnum
+    return rng.normal(size = (d, d)) + 1j * rng.normal(size = (d, d))
+
+def random_proj(rng, qvar : QVar) -> IQOpt:
+    d = 2**qvar.qnum
+    B = np.linalg.qr(random_opt(rng, qvar.qnum))[0][:, :int(rng.integers(1, d))]
+    return IQOpt(QProj(B), qvar)
+
+def trace_one_by_one(M : np.ndarray, qls : list[int]) -> np.ndarray:
+    '''
+    Trace out the qubits one at a time, from the last position, by `np.trace` on the tensor.
+    '''
+    T = M.reshape((2,) * (2 * (len(M).bit_length() - 1)))
+    for q in sorted(qls, reverse = True):
+        n = T.ndim // 2
+        T = np.trace(T, axis1 = q, axis2 = n + q)
+    d = 2**(T.ndim // 2)
+    return T.reshape(d, d)
+
+
+@pytest.mark.parametrize("qls", [[], [0], [2], [0, 3], [4, 1, 2], [0, 1, 2, 3, 4]])
+def test_trace_matches_one_by_one(qls):
+    M = random_opt(np.random.default_rng(len(qls)), 5)
+    assert np.allclose(QOpt(M).trace(qls).m_repr, trace_one_by_one(M, qls))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_init_matches_one_by_one(seed):
+    rng = np.random.default_rng(seed)
+    names = ["q0", "q1", "q2", "q3", "q4"]
+    init = QVar([str(q) for q in rng.choice(names, int(rng.integers(1, 4)), replace = False)])
+
+    # a random subspace joined with one in `|0...0>` on the initialized qubits, so that the results are not trivial
+    P = random_proj(rng, QVar([str(q) for q in rng.permutation(names)]))
+    Q = random_proj(rng, QVar(names) - init)
+    for q in init:
+        Q = Q @ IQOpt(QOpt(np.diag([1., 0.])), QVar([q]))
+    P = P | Q
+
+    R1, R2 = P, P
+    for q in init:
+        R1 = R1.initwlp(QVar([q]))
+        R2 = R2.initwlp2(QVar([q]))
+
+    assert P.initwlp(init) == R1
+    assert P.initwlp2(init) == R2
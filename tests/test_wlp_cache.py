@@ -0,0 +1,46 @@
+from rem.qrefine.language.ast import AstPres, AstSkip
+from rem.qrefine.language.semantics.assertion import wlp, wlp_calc, wlp_cache
+
+
+def test_version_distinguishes_refinements(session):
+    env = session.env
+    pres = session.define("pres", "< P0[q], P0[q] >")
+    refined_skip = AstPres(pres.P, pres.Q, AstSkip())
+    refined_unitary = AstPres(pres.P, pres.Q, session.define("U", "Z[q];"))
+
+    env_skip = env.copy()
+    env_skip["R"] = refined_skip
+    env_unitary = env.copy()
+    env_unitary["R"] = refined_unitary
+    assert env_skip.version is not env_unitary.version
+
+    # the same definition gives the same version
+    env_again = env.copy()
+    env_again["R"] = refined_skip
+    assert env_again.version is env_skip.version
+
+
+def test_wlp_cache_matches_calculation(session):
+    prog = session.define("prog", "H[q]; if P1[q] then X[r]; else skip end CX[q r];")
+    post = session.define("post", "[|00>][q r]").iqopt
+
+    res = wlp(prog, post, session.env)
+    assert res == wlp_calc(prog, post, session.env)
+
+    hits = wlp_cache(session.env).hits
+    assert wlp(prog, post, session.env) is res
+    assert wlp_cache(session.env).hits == hits + 1
+
+
+def test_wlp_cache_reused_after_step_backward(session):
+    session.define("post", "[|00>][q r]")
+    session.run("Refine pf : < post, post >.")
+    session.run("Step H[q]; H[q];.")
+
+    cache = wlp_cache(session.env)
+    misses = cache.misses
+
+    session.mls.step_backward()
+    session.run("Step H[q]; H[q];.")
+
+    assert cache.misses == misses